@@ -723,6 +723,23 @@ async function getCurrentComparison() {
     }
 }
 
+// Comparison cards show posters well under 500px wide: use the API's resized thumbnails
+// (/api/poster/<size>/<file>, cached on the server) for TMDb posters.
+function setComparisonPoster(img, movie) {
+    const posterUrl = movie.poster_url || 'https://via.placeholder.com/300x450?text=No+Poster';
+    img.alt = movie.title;
+    const tmdb = posterUrl.match(/^https:\/\/image\.tmdb\.org\/t\/p\/w\d+\/([A-Za-z0-9_-]+\.(?:jpg|jpeg|png))$/);
+    if (tmdb) {
+        const thumb = (size) => `${apiUrl}/api/poster/${size}/${tmdb[1]}`;
+        img.src = thumb('w342');
+        img.srcset = `${thumb('w154')} 154w, ${thumb('w342')} 342w, ${posterUrl} 500w`;
+        img.sizes = '(max-width: 640px) 154px, 342px';
+    } else {
+        img.removeAttribute('srcset');
+        img.src = posterUrl;
+    }
+}
+
 function displayComparison(comparison, status) {
     const leftMovie = comparison.left_movie;
     const rightMovie = comparison.right_movie;
@@ -733,18 +750,7 @@ function displayComparison(comparison, status) {
     document.getElementById('left-rating').textContent = `⭐ ${leftMovie.vote_average || 'N/A'}`;
     document.getElementById('left-overview').textContent = leftMovie.overview || 'No overview available';
     const leftPoster = document.getElementById('left-poster');
-    const leftPosterUrl = leftMovie.poster_url || 'https://via.placeholder.com/300x450?text=No+Poster';
-    leftPoster.src = leftPosterUrl;
-    leftPoster.alt = leftMovie.title;
-    if (leftPosterUrl.includes('w500')) {
-        leftPoster.srcset = `${leftPosterUrl.replace('w500', 'w300')} 300w, ${leftPosterUrl.replace('w500', 'w500')} 500w, ${leftPosterUrl.replace('w500', 'w780')} 780w`;
-        leftPoster.sizes = '(max-width: 640px) 300px, (max-width: 1024px) 500px, 780px';
-    } else if (leftPosterUrl.includes('image.tmdb.org')) {
-        // Handle other TMDb image sizes
-        const baseUrl = leftPosterUrl.split('/').slice(0, -1).join('/');
-        leftPoster.srcset = `${baseUrl}/w300 300w, ${baseUrl}/w500 500w, ${baseUrl}/w780 780w`;
-        leftPoster.sizes = '(max-width: 640px) 300px, (max-width: 1024px) 500px, 780px';
-    }
+    setComparisonPoster(leftPoster, leftMovie);
 
     // Right movie
     document.getElementById('right-title').textContent = rightMovie.title;
@@ -752,18 +758,7 @@ function displayComparison(comparison, status) {
     document.getElementById('right-rating').textContent = `⭐ ${rightMovie.vote_average || 'N/A'}`;
     document.getElementById('right-overview').textContent = rightMovie.overview || 'No overview available';
     const rightPoster = document.getElementById('right-poster');
-    const rightPosterUrl = rightMovie.poster_url || 'https://via.placeholder.com/300x450?text=No+Poster';
-    rightPoster.src = rightPosterUrl;
-    rightPoster.alt = rightMovie.title;
-    if (rightPosterUrl.includes('w500')) {
-        rightPoster.srcset = `${rightPosterUrl.replace('w500', 'w300')} 300w, ${rightPosterUrl.replace('w500', 'w500')} 500w, ${rightPosterUrl.replace('w500', 'w780')} 780w`;
-        rightPoster.sizes = '(max-width: 640px) 300px, (max-width: 1024px) 500px, 780px';
-    } else if (rightPosterUrl.includes('image.tmdb.org')) {
-        // Handle other TMDb image sizes
-        const baseUrl = rightPosterUrl.split('/').slice(0, -1).join('/');
-        rightPoster.srcset = `${baseUrl}/w300 300w, ${baseUrl}/w500 500w, ${baseUrl}/w780 780w`;
-        rightPoster.sizes = '(max-width: 640px) 300px, (max-width: 1024px) 500px, 780px';
-    }
+    setComparisonPoster(rightPoster, rightMovie);
 
     // Progress - calculate based on comparisons made
     if (totalMoviesToRank > 0) {
@@ -818,7 +813,7 @@ async function makeChoice(choice) {
         const data = await apiCall(
             `/api/session/${sessionId}/ranking/choice`,
             'POST',
-            { choice }
+            { choice, version: currentComparison.version }
         );
 
         if (data.message === 'Ranking complete' && data.results) {
@@ -858,6 +853,10 @@ async function makeChoice(choice) {
         showLoading(false);
         document.body.style.overflow = '';
         console.error('Failed to make choice:', error);
+        if (error.message.startsWith('Stale comparison')) {
+            // Already answered (e.g. double click): show the pair the server is on now
+            getCurrentComparison();
+        }
     }
 }
 
@@ -0,0 +1,165 @@
+"""
+Batch title matcher for TMDb enrichment.
+
+Scores many (query, candidate) pairs at once instead of one title at a time:
+query and candidate titles are normalized once each (precompiled patterns,
+duplicates collapsed), candidates shared between searches are tokenized once,
+and word overlap plus quality signals are computed in bulk with NumPy when it
+is installed. Decisions are identical to scoring each pair with
+title_index.score_candidate: same float arithmetic, same first-best tie rule,
+same 0.55/0.35 thresholds.
+"""
+import importlib.util
+from typing import Dict, List, Optional, Sequence
+
+import title_index
+
+# Optional: pure-Python scoring is used without it. NumPy is only imported on the first batch
+# that needs it, which keeps it out of the server's cold-start import path.
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+
+def _candidate_key(movie: Dict):
+    return movie.get("id") or id(movie)
+
+
+class BatchMatcher:
+    """Best TMDb result per query title, for a batch of queries and their search results."""
+
+    def __init__(self):
+        self._norms: Dict[str, str] = {}
+
+    def normalize(self, title: str) -> str:
+        norm = self._norms.get(title)
+        if norm is None:
+            norm = title_index.normalize_for_match(title)
+            self._norms[title] = norm
+        return norm
+
+    def match(self, titles: Sequence[str], results: Sequence[List[Dict]]) -> List[Optional[Dict]]:
+        """For each title, the best of its results if it clears the threshold, else None."""
+        queries = [self.normalize(t) for t in titles]
+
+        # Unique candidates across all result lists, normalized and tokenized once
+        cand_index: Dict = {}
+        cand_movies: List[Dict] = []
+        pair_query: List[int] = []
+        pair_cand: List[int] = []
+        for qi, res in enumerate(results):
+            for movie in res:
+                key = _candidate_key(movie)
+                ci = cand_index.get(key)
+                if ci is None:
+                    ci = len(cand_movies)
+                    cand_index[key] = ci
+                    cand_movies.append(movie)
+                pair_query.append(qi)
+                pair_cand.append(ci)
+        if not pair_query:
+            return [None] * len(queries)
+
+        cand_norms = [self.normalize(m.get("title") or m.get("original_title") or "") for m in cand_movies]
+        if NUMPY_AVAILABLE:
+            scores = self._score_numpy(queries, cand_norms, cand_movies, pair_query, pair_cand)
+        else:
+            scores = self._score_python(queries, cand_norms, cand_movies, pair_query, pair_cand)
+
+        # Pairs are grouped by query in result order: first strictly-greater score wins
+        best: List[Optional[Dict]] = [None] * len(queries)
+        best_score = [-1.0] * len(queries)
+        for qi, ci, score in zip(pair_query, pair_cand, scores):
+            if score > best_score[qi]:
+                best_score[qi] = score
+                best[qi] = cand_movies[ci]
+        return [
+            movie if movie is not None and best_score[qi] >= title_index.min_score(queries[qi]) else None
+            for qi, movie in enumerate(best)
+        ]
+
+    @staticmethod
+    def _score_python(queries, cand_norms, cand_movies, pair_query, pair_cand) -> List[float]:
+        cand_tokens = [set(n.split()) for n in cand_norms]
+        cand_years = [title_index.release_year(m.get("release_date")) for m in cand_movies]
+        query_tokens = [set(q.split()) for q in queries]
+        scores = []
+        for qi, ci in zip(pair_query, pair_cand):
+            norm_q = queries[qi]
+            norm_c = cand_norms[ci]
+            if norm_c == norm_q and norm_c:
+                score = 1.0
+            else:
+                wa = query_tokens[qi]
+                wb = cand_tokens[ci]
+                overlap = len(wa & wb) / len(wa | wb) if wa and wb else 0.0
+                score = 0.6 * overlap
+                if title_index.is_short_query(norm_q):
+                    if norm_c.startswith(norm_q):
+                        score += 0.3
+                elif norm_q and norm_q in norm_c:
+                    score += 0.15
+            movie = cand_movies[ci]
+            score += min((movie.get("vote_count") or 0) / 5000.0, 0.2)
+            score += min((movie.get("vote_average") or 0.0) / 50.0, 0.1)
+            score += min((movie.get("popularity") or 0.0) / 500.0, 0.1)
+            year = cand_years[ci]
+            if year is not None and year < 1980 and norm_c != norm_q:
+                score -= 0.15
+            scores.append(score)
+        return scores
+
+    @staticmethod
+    def _score_numpy(queries, cand_norms, cand_movies, pair_query, pair_cand) -> List[float]:
+        import numpy as np
+        # Token incidence over the query vocabulary only: candidate words no query uses
+        # cannot intersect, they just count toward the candidate's set size
+        vocab: Dict[str, int] = {}
+        query_tokens = [set(q.split()) for q in queries]
+        for tokens in query_tokens:
+            for t in tokens:
+                vocab.setdefault(t, len(vocab))
+        cand_tokens = [set(n.split()) for n in cand_norms]
+        q_mat = np.zeros((len(queries), max(len(vocab), 1)), dtype=np.float32)
+        cells = [(qi, vocab[t]) for qi, tokens in enumerate(query_tokens) for t in tokens]
+        if cells:
+            q_mat[tuple(np.array(cells).T)] = 1.0
+        c_mat = np.zeros((len(cand_norms), max(len(vocab), 1)), dtype=np.float32)
+        cells = [(ci, vocab[t]) for ci, tokens in enumerate(cand_tokens) for t in tokens if t in vocab]
+        if cells:
+            c_mat[tuple(np.array(cells).T)] = 1.0
+
+        pq = np.asarray(pair_query, dtype=np.intp)
+        pc = np.asarray(pair_cand, dtype=np.intp)
+        inter = np.einsum("ij,ij->i", q_mat[pq], c_mat[pc]).astype(np.float64)
+        q_size = np.array([len(t) for t in query_tokens], dtype=np.float64)[pq]
+        c_size = np.array([len(t) for t in cand_tokens], dtype=np.float64)[pc]
+        union = q_size + c_size - inter
+        with np.errstate(divide="ignore", invalid="ignore"):
+            overlap = np.where((q_size > 0) & (c_size > 0), inter / union, 0.0)
+
+        # Equality via interned norm ids; substring tests stay per pair, everything numeric is vectorized
+        norm_ids: Dict[str, int] = {}
+        q_ids = np.array([norm_ids.setdefault(q, len(norm_ids)) for q in queries])
+        c_ids = np.array([norm_ids.setdefault(n, len(norm_ids)) for n in cand_norms])
+        same = q_ids[pq] == c_ids[pc]
+        exact = same & (np.array([len(n) for n in cand_norms]) > 0)[pc]
+        short = [title_index.is_short_query(q) for q in queries]
+        bonus = np.array([
+            (0.3 if cand_norms[ci].startswith(queries[qi]) else 0.0) if short[qi]
+            else (0.15 if queries[qi] and queries[qi] in cand_norms[ci] else 0.0)
+            for qi, ci in zip(pair_query, pair_cand)
+        ], dtype=np.float64)
+        score = np.where(exact, 1.0, 0.6 * overlap + bonus)
+
+        votes = np.array([m.get("vote_count") or 0 for m in cand_movies], dtype=np.float64)
+        rating = np.array([m.get("vote_average") or 0.0 for m in cand_movies], dtype=np.float64)
+        popularity = np.array([m.get("popularity") or 0.0 for m in cand_movies], dtype=np.float64)
+        old_movie = []
+        for m in cand_movies:
+            year = title_index.release_year(m.get("release_date"))
+            old_movie.append(year is not None and year < 1980)
+        score = score + np.minimum(votes / 5000.0, 0.2)[pc]
+        score = score + np.minimum(rating / 50.0, 0.1)[pc]
+        score = score + np.minimum(popularity / 500.0, 0.1)[pc]
+        old = np.array(old_movie, dtype=bool)[pc] & ~same
+        score = np.where(old, score - 0.15, score)
+        return score.tolist()
@@ -0,0 +1,228 @@
+"""
+End-to-end API benchmark against the offline TMDb stub.
+
+Drives create -> load (year / category / set_bulk) -> start -> choices -> results
+through Flask's test client, with TMDb served by benchmarks/tmdb_stub_server.py,
+and reports p50/p95/p99 latency per step and upstream TMDb calls per flow
+(read from each response's Server-Timing header).
+
+By default every flow draws its inputs (years, categories, movie ids) from the
+stub's fixture file, so responses have TMDb's full shapes and realistic sizes.
+The committed fixtures are synthetic (see tmdb_stub_server.py); pass --fixtures
+with a file captured by --record to benchmark against real TMDb responses.
+--generate switches to random inputs answered by the stub's generated catalog,
+for scale tests beyond what the fixtures hold.
+
+Usage:
+  python benchmarks/bench_api.py --iterations 20 --latency-ms 40
+  python benchmarks/bench_api.py --flows year,set_bulk --json bench_output.json
+  python benchmarks/bench_api.py --generate --max-movies 500
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import Dict, List
+from urllib.parse import parse_qsl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tmdb_stub_server import StubConfig, start_stub_server  # noqa: E402
+
+FLOWS = ("year", "category", "set_bulk")
+_UPSTREAM_RE = re.compile(r'tmdb;dur=[0-9.]+;desc="(\d+) calls"')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of values (0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lo = int(rank)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+class FixtureInputs:
+    """Flow inputs that the fixture file can answer without the generated catalog."""
+
+    def __init__(self, fixtures: Dict[str, Dict], categories: Dict[str, Dict]):
+        self.years: Dict[int, int] = {}
+        self.movie_ids: List[int] = []
+        collections = set()
+        for key, body in fixtures.items():
+            path, _, query = key.partition("?")
+            params = dict(parse_qsl(query))
+            if path == "/discover/movie" and params.get("primary_release_year") and params.get("page") == "1":
+                self.years[int(params["primary_release_year"])] = len(body.get("results", []))
+            elif path.startswith("/movie/"):
+                self.movie_ids.append(int(path.rsplit("/", 1)[1]))
+            elif path.startswith("/collection/"):
+                collections.add(int(path.rsplit("/", 1)[1]))
+        self.movie_ids.sort()
+        self.categories = sorted(name for name, info in categories.items()
+                                 if info.get("collection_id") in collections)
+
+    def missing(self, flows: List[str]) -> List[str]:
+        needs = {"year": self.years, "category": self.categories, "set_bulk": self.movie_ids}
+        return [flow for flow in flows if not needs[flow]]
+
+
+class FlowRecorder:
+    """Collects per-step latencies and upstream call counts for one flow."""
+
+    def __init__(self):
+        self.steps: Dict[str, List[float]] = {}
+        self.totals: List[float] = []
+        self.upstream: List[int] = []
+        self.errors = 0
+
+    def summary(self) -> Dict:
+        def stats(values):
+            return {
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "n": len(values)
+            }
+        return {
+            "total": stats(self.totals),
+            "steps": {name: stats(values) for name, values in self.steps.items()},
+            "upstream_calls_per_flow": {
+                "mean": round(sum(self.upstream) / len(self.upstream), 2) if self.upstream else 0,
+                "max": max(self.upstream) if self.upstream else 0
+            },
+            "errors": self.errors
+        }
+
+
+def run_flow(client, flow: str, rng: random.Random, args, recorder: FlowRecorder, inputs=None):
+    upstream = 0
+    flow_started = time.perf_counter()
+
+    def call(step: str, method: str, url: str, **kwargs):
+        nonlocal upstream
+        started = time.perf_counter()
+        resp = getattr(client, method)(url, **kwargs)
+        recorder.steps.setdefault(step, []).append(time.perf_counter() - started)
+        match = _UPSTREAM_RE.search(resp.headers.get("Server-Timing", ""))
+        if match:
+            upstream += int(match.group(1))
+        if resp.status_code >= 400:
+            raise RuntimeError(f"{step} failed with {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+        return resp.get_json()
+
+    session_id = call("create", "post", "/api/session/create")["session_id"]
+    base = f"/api/session/{session_id}"
+    if flow == "year":
+        if inputs:
+            # The fixtures hold only the first discover page of each year
+            year = rng.choice(sorted(inputs.years))
+            max_movies = min(args.max_movies, inputs.years[year])
+        else:
+            year, max_movies = rng.randint(1990, 2024), args.max_movies
+        call("load_year", "post", f"{base}/movies/load", json={"year": year, "max_movies": max_movies})
+    elif flow == "category":
+        categories = inputs.categories if inputs else args.categories
+        call("load_category", "post", f"{base}/movies/load",
+             json={"category": rng.choice(categories), "max_movies": args.max_movies})
+    else:
+        if inputs:
+            ids = rng.sample(inputs.movie_ids, min(args.max_movies, len(inputs.movie_ids)))
+        else:
+            ids = [rng.randint(100, 900000) for _ in range(args.max_movies)]
+        call("set_bulk", "post", f"{base}/movies/set_bulk", json={"items": [{"id": i} for i in ids]})
+
+    data = call("start", "post", f"{base}/ranking/start")
+    choices = 0
+    while data.get("comparison") and choices < args.max_choices:
+        choice = rng.choices(("left", "right", "skip"), weights=(0.47, 0.47, 0.06))[0]
+        data = call("choice", "post", f"{base}/ranking/choice", json={"choice": choice})
+        choices += 1
+    call("results", "get", f"{base}/ranking/results")
+    call("delete", "delete", base)
+
+    recorder.totals.append(time.perf_counter() - flow_started)
+    recorder.upstream.append(upstream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end API benchmark (offline TMDb stub)")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--flows", default=",".join(FLOWS))
+    parser.add_argument("--max-movies", type=int, default=50)
+    parser.add_argument("--max-choices", type=int, default=400)
+    parser.add_argument("--categories", default="star_wars,harry_potter,james_bond,pixar,marvel_mcu",
+                        help="Categories for --generate runs; other runs use the collections in the fixtures")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub latency per TMDb call")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "tmdb_synthetic.json"))
+    parser.add_argument("--generate", action="store_true",
+                        help="Random inputs answered by the stub's generated catalog (scale tests)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="Also write the summary to this file")
+    args = parser.parse_args()
+    args.categories = [c for c in args.categories.split(",") if c]
+
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.rate_429, args.fixtures, seed=args.seed,
+                        generate=args.generate)
+    server, stub, base_url = start_stub_server(config)
+    # The API reads these at import time
+    os.environ["TMDB_API_BASE"] = base_url
+    os.environ.setdefault("TMDB_API_KEY", "stub-key")
+    # Start from an empty TMDb response cache rather than a local snapshot or disk cache
+    os.environ.setdefault("CACHE_SNAPSHOT_PATH", "")
+    os.environ.setdefault("TMDB_DISK_CACHE_PATH", "")
+    import movie_ranker_api
+
+    flows = [f for f in args.flows.split(",") if f]
+    for flow in flows:
+        if flow not in FLOWS:
+            parser.error(f"Unknown flow '{flow}' (choose from {', '.join(FLOWS)})")
+    inputs = None
+    if not args.generate:
+        inputs = FixtureInputs(stub.fixtures, movie_ranker_api.MOVIE_CATEGORIES)
+        missing = inputs.missing(flows)
+        if missing:
+            parser.error(f"{args.fixtures} has no inputs for: {', '.join(missing)} "
+                         f"(capture some with tmdb_stub_server.py --record, or pass --generate)")
+
+    client = movie_ranker_api.app.test_client()
+    rng = random.Random(args.seed)
+    report = {}
+    for flow in flows:
+        recorder = FlowRecorder()
+        for _ in range(args.iterations):
+            try:
+                run_flow(client, flow, rng, args, recorder, inputs)
+            except RuntimeError as e:
+                recorder.errors += 1
+                print(f"[{flow}] {e}")
+        report[flow] = recorder.summary()
+
+    server.shutdown()
+
+    source = "generated catalog" if args.generate else f"{len(stub.fixtures)} fixture responses"
+    print(f"\nStub latency {args.latency_ms}±{args.jitter_ms} ms, 429 rate {args.rate_429}, "
+          f"{args.iterations} iterations per flow, {source}\n")
+    print(f"{'flow':<10} {'step':<14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'n':>6}")
+    for flow, summary in report.items():
+        rows = [("TOTAL", summary["total"])] + list(summary["steps"].items())
+        for step, s in rows:
+            print(f"{flow:<10} {step:<14} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['n']:>6}")
+        up = summary["upstream_calls_per_flow"]
+        print(f"{flow:<10} upstream calls/flow: mean {up['mean']}, max {up['max']}; errors {summary['errors']}\n")
+    print(f"Stub call counts: {stub.counts}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "flows": report, "stub_counts": stub.counts}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
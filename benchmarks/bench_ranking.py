@@ -0,0 +1,278 @@
+"""
+Ranking-engine microbenchmark with simulated users.
+
+Drives the shared ranking core (ranking_engine.MergeRanker) directly and through both
+front ends, the API (MovieRankingSession.start_ranking / make_choice) and the desktop
+app (MovieRanker, headless), with a scripted oracle that answers from
+a hidden true order, with configurable noise (wrong answers) and skip rates.
+Reports comparisons per movie, time per choice and peak memory per n, and
+fails (exit code 1) when a result crosses its regression threshold.
+
+Usage:
+  python benchmarks/bench_ranking.py
+  python benchmarks/bench_ranking.py --sizes 10,100,1000,5000 --noise 0.05 --skip 0.02
+  python benchmarks/bench_ranking.py --engines core,api --thresholds my_thresholds.json --json bench_output.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+
+# Regression thresholds. comparisons_per_movie is checked against log2(n) + slack (merge sort
+# needs at most n*log2(n) comparisons); time and memory limits are keyed by the largest n they cover.
+DEFAULT_THRESHOLDS = {
+    "comparisons_per_movie_slack": 1.0,
+    "max_mean_us_per_choice": {
+        "core": {"100": 20, "1000": 20, "5000": 20},
+        "api": {"100": 200, "1000": 500, "5000": 2000},
+        "desktop": {"100": 200, "1000": 500, "5000": 2000}
+    },
+    "max_peak_kb_per_movie": {
+        "core": 1.0,
+        "api": 2.0,
+        "desktop": 2.0
+    }
+}
+
+
+class Oracle:
+    """Answers comparisons from a hidden true order, with noise and skip rates."""
+
+    def __init__(self, movies: List[Dict], noise: float, skip: float, seed: int):
+        rng = random.Random(seed)
+        order = list(range(len(movies)))
+        rng.shuffle(order)
+        self.true_rank = {movies[i]["id"]: rank for rank, i in enumerate(order)}
+        self.noise = noise
+        self.skip = skip
+        self.rng = rng
+
+    def __call__(self, left: Dict, right: Dict) -> str:
+        if self.skip and self.rng.random() < self.skip:
+            return "skip"
+        prefer_left = self.true_rank[left["id"]] < self.true_rank[right["id"]]
+        if self.noise and self.rng.random() < self.noise:
+            prefer_left = not prefer_left
+        return "left" if prefer_left else "right"
+
+
+def make_movies(n: int) -> List[Dict]:
+    return [{
+        "id": 1000 + i,
+        "title": f"Movie {i}",
+        "poster_path": f"/p{i}.jpg",
+        "poster_url": f"https://image.tmdb.org/t/p/w500/p{i}.jpg",
+        "release_date": f"{1980 + i % 45}-01-01",
+        "vote_average": round((i * 37 % 100) / 10.0, 1),
+        "overview": "An overview of moderate length for memory realism..."
+    } for i in range(n)]
+
+
+def run_core_engine(movies: List[Dict], oracle: Callable, timings: Optional[List[float]]) -> Dict:
+    from ranking_engine import MergeRanker
+
+    engine = MergeRanker(len(movies))
+    pair = engine.next_pair()
+    choices = 0
+    while pair:
+        choice = oracle(movies[pair[0]], movies[pair[1]])
+        started = time.perf_counter()
+        pair = engine.answer(choice)
+        if timings is not None:
+            timings.append(time.perf_counter() - started)
+        choices += 1
+    return {"choices": choices, "ranked": len(engine.ranked), "unseen": len(engine.unseen)}
+
+
+def run_api_engine(movies: List[Dict], oracle: Callable, timings: Optional[List[float]]) -> Dict:
+    from movie_ranker_api import MovieRankingSession
+
+    session = MovieRankingSession("bench")
+    session.movies = movies
+    session.start_ranking()
+    comparison = session.current_comparison
+    choices = 0
+    while comparison:
+        choice = oracle(comparison["left_movie"], comparison["right_movie"])
+        started = time.perf_counter()
+        comparison = session.make_choice(choice)
+        if timings is not None:
+            timings.append(time.perf_counter() - started)
+        choices += 1
+    return {"choices": choices, "ranked": len(session.ranked_movies), "unseen": len(session.unseen_movies)}
+
+
+def _headless_ranker_class():
+    """MovieRanker with the Tk UI stubbed out, so the engine can run without a display."""
+    import movie_ranker
+
+    class _SilentMessagebox:
+        @staticmethod
+        def showinfo(*args, **kwargs):
+            pass
+
+    movie_ranker.messagebox = _SilentMessagebox
+
+    class HeadlessMovieRanker(movie_ranker.MovieRanker):
+        def __init__(self, movies: List[Dict]):
+            self.root = None
+            self.movies = movies
+            self.ranked_movies = []
+            self.unseen_movies = []
+            self.comparison_queue = []
+            self.current_comparison = None
+            self.is_ranking = False
+            self.checkpoint = None
+            self.engine = None
+
+        def _start_checkpoint(self):
+            pass
+
+        def display_comparison(self, movie1: Dict, movie2: Dict):
+            pass
+
+        def _update_progress(self):
+            pass
+
+        def display_results(self):
+            pass
+
+    return HeadlessMovieRanker
+
+
+def run_desktop_engine(movies: List[Dict], oracle: Callable, timings: Optional[List[float]]) -> Dict:
+    ranker = _headless_ranker_class()(movies)
+    ranker.start_ranking()
+    choices = 0
+    while ranker.is_ranking and ranker.current_comparison:
+        left_movie, right_movie = ranker.current_comparison
+        choice = oracle(left_movie, right_movie)
+        started = time.perf_counter()
+        ranker.make_choice(choice)
+        if timings is not None:
+            timings.append(time.perf_counter() - started)
+        choices += 1
+    return {"choices": choices, "ranked": len(ranker.ranked_movies), "unseen": len(ranker.unseen_movies)}
+
+
+ENGINES = {"core": run_core_engine, "api": run_api_engine, "desktop": run_desktop_engine}
+
+
+def bench_one(engine: str, n: int, args) -> Dict:
+    runner = ENGINES[engine]
+    movies = make_movies(n)
+
+    # Timing pass (no tracemalloc overhead)
+    timings: List[float] = []
+    started = time.perf_counter()
+    outcome = runner(movies, Oracle(movies, args.noise, args.skip, args.seed + n), timings)
+    wall = time.perf_counter() - started
+
+    # Memory pass with the same oracle seed, so it replays the same answers
+    movies = make_movies(n)
+    tracemalloc.start()
+    runner(movies, Oracle(movies, args.noise, args.skip, args.seed + n), None)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    choices = outcome["choices"]
+    return {
+        "engine": engine,
+        "n": n,
+        "choices": choices,
+        "comparisons_per_movie": round(choices / n, 3),
+        "mean_us_per_choice": round(sum(timings) / len(timings) * 1e6, 2) if timings else 0.0,
+        "p95_us_per_choice": round(timings[int(len(timings) * 0.95)] * 1e6, 2) if timings else 0.0,
+        "wall_seconds": round(wall, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "ranked": outcome["ranked"],
+        "unseen": outcome["unseen"]
+    }
+
+
+def _limit_for(table: Dict[str, float], n: int) -> Optional[float]:
+    """Limit from the smallest size bucket that covers n."""
+    for bound in sorted(table, key=int):
+        if n <= int(bound):
+            return table[bound]
+    return None
+
+
+def check_thresholds(result: Dict, thresholds: Dict) -> List[str]:
+    failures = []
+    n = result["n"]
+    engine = result["engine"]
+    max_cpm = math.log2(n) + thresholds["comparisons_per_movie_slack"]
+    if result["comparisons_per_movie"] > max_cpm:
+        failures.append(f"comparisons/movie {result['comparisons_per_movie']} > {max_cpm:.2f}")
+    us_limit = _limit_for(thresholds["max_mean_us_per_choice"].get(engine, {}), n)
+    if us_limit is not None and result["mean_us_per_choice"] > us_limit:
+        failures.append(f"mean us/choice {result['mean_us_per_choice']} > {us_limit}")
+    kb_limit = thresholds["max_peak_kb_per_movie"].get(engine)
+    if kb_limit is not None and result["peak_kb"] / n > kb_limit:
+        failures.append(f"peak KB/movie {result['peak_kb'] / n:.2f} > {kb_limit}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranking-engine microbenchmark with simulated oracles")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES))
+    parser.add_argument("--engines", default="core,api,desktop")
+    parser.add_argument("--noise", type=float, default=0.02, help="Probability the oracle answers wrongly")
+    parser.add_argument("--skip", type=float, default=0.01, help="Probability the oracle answers 'skip'")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--thresholds", help="JSON file overriding DEFAULT_THRESHOLDS")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this file")
+    args = parser.parse_args()
+
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if args.thresholds:
+        with open(args.thresholds, "r", encoding="utf-8") as f:
+            thresholds.update(json.load(f))
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    engines = [e for e in args.engines.split(",") if e]
+    results = []
+    failures = []
+    print(f"noise={args.noise} skip={args.skip} seed={args.seed}\n")
+    print(f"{'engine':<8} {'n':>6} {'choices':>8} {'cmp/movie':>10} {'mean us':>9} {'p95 us':>9} {'peak KB':>9} {'wall s':>8}")
+    for engine in engines:
+        if engine not in ENGINES:
+            parser.error(f"Unknown engine '{engine}' (choose from {', '.join(ENGINES)})")
+        for n in sizes:
+            try:
+                result = bench_one(engine, n, args)
+            except ImportError as e:
+                print(f"{engine:<8} skipped: {e}")
+                break
+            results.append(result)
+            print(f"{engine:<8} {n:>6} {result['choices']:>8} {result['comparisons_per_movie']:>10} "
+                  f"{result['mean_us_per_choice']:>9} {result['p95_us_per_choice']:>9} "
+                  f"{result['peak_kb']:>9} {result['wall_seconds']:>8}")
+            for failure in check_thresholds(result, thresholds):
+                failures.append(f"{engine} n={n}: {failure}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "thresholds": thresholds, "results": results}, f, indent=2)
+
+    if failures:
+        print("\nRegression thresholds exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nAll thresholds met.")
+
+
+if __name__ == "__main__":
+    main()
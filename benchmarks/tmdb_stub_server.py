@@ -0,0 +1,294 @@
+"""
+Offline TMDb stand-in for benchmarks and CI.
+
+Serves the subset of the TMDb v3 API the backend uses:
+  /discover/movie, /collection/<id>, /movie/<id>, /search/movie
+
+Responses come from a fixture file (JSON mapping "path?sorted-query" to the
+response body). The committed benchmarks/fixtures/tmdb_synthetic.json is
+synthetic, not captured from TMDb: hand-built bodies in TMDb's v3 response
+schemas for real titles, with made-up image paths, overviews and IMDb ids and
+approximate vote/popularity/box-office figures. --record captures real responses
+into a fixture file of your own. Calls missing from the fixture file get a 404
+unless --generate is given, in which case they are answered from a deterministic
+generated catalog - for scale tests only, since its bodies are far smaller than
+TMDb's. Latency and 429 rate-limit responses can be injected.
+
+Usage:
+  python benchmarks/tmdb_stub_server.py --port 8765 --latency-ms 80 --jitter-ms 20 --rate-429 0.01
+  TMDB_API_BASE=http://127.0.0.1:8765/3 TMDB_API_KEY=stub python movie_ranker_api.py
+  python benchmarks/tmdb_stub_server.py --generate       # any year, collection or id
+
+Capture real responses into a fixture file (needs a real key):
+  python benchmarks/tmdb_stub_server.py --record --api-key $TMDB_API_KEY --fixtures benchmarks/fixtures/tmdb_captured.json
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+
+REAL_TMDB_BASE = "https://api.themoviedb.org/3"
+PAGE_SIZE = 20
+
+_WORDS = [
+    "Night", "Shadow", "River", "Last", "Iron", "Silent", "Golden", "Storm", "Lost", "City",
+    "Dream", "Fire", "Glass", "Winter", "Summer", "Hunter", "Kingdom", "Empire", "Star", "Ghost",
+    "Echo", "Blood", "Heart", "Road", "Ocean", "Midnight", "Crown", "Edge", "Wild", "Signal"
+]
+
+
+class StubConfig:
+    """Runtime knobs for the stub: injected latency, 429 rate, fixture handling and generated fallback."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, rate_429: float = 0.0,
+                 fixtures_path: Optional[str] = None, record: bool = False,
+                 upstream_base: str = REAL_TMDB_BASE, api_key: Optional[str] = None, seed: int = 1,
+                 generate: bool = False):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.fixtures_path = fixtures_path
+        self.record = record
+        self.upstream_base = upstream_base.rstrip("/")
+        self.api_key = api_key
+        self.seed = seed
+        self.generate = generate
+
+
+class SyntheticCatalog:
+    """Deterministic fake TMDb data: any id, year, collection, keyword or query yields stable results."""
+
+    def __init__(self, seed: int = 1):
+        self.seed = seed
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(zlib.crc32(repr((self.seed,) + key).encode("utf-8")))
+
+    def _title(self, rng: random.Random) -> str:
+        return " ".join(rng.sample(_WORDS, rng.randint(1, 3)))
+
+    def movie(self, movie_id: int, year: Optional[int] = None, title: Optional[str] = None) -> Dict:
+        rng = self._rng("movie", movie_id)
+        if year is None:
+            year = movie_id // 1000 if 1900 <= movie_id // 1000 <= 2100 else rng.randint(1970, 2025)
+        return {
+            "id": movie_id,
+            "title": title or self._title(rng),
+            "original_title": title or self._title(rng),
+            "poster_path": f"/stub{movie_id}.jpg",
+            "backdrop_path": None,
+            "release_date": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "vote_average": round(rng.uniform(4.0, 8.8), 3),
+            "vote_count": rng.randint(10, 25000),
+            "popularity": round(rng.uniform(1.0, 400.0), 3),
+            "overview": " ".join(rng.choice(_WORDS).lower() for _ in range(40)),
+            "genre_ids": rng.sample([12, 14, 16, 18, 28, 35, 53, 80, 878], 2),
+            "adult": False,
+            "video": False,
+            "original_language": "en"
+        }
+
+    def year_movies(self, year: int) -> List[Dict]:
+        count = 120 + self._rng("year", year).randint(0, 80)
+        movies = [self.movie(year * 1000 + i, year) for i in range(count)]
+        movies.sort(key=lambda m: m["popularity"], reverse=True)
+        return movies
+
+    def related_movies(self, kind: str, key: int, base: int) -> List[Dict]:
+        rng = self._rng(kind, key)
+        movies = [self.movie(base + key * 100 + i) for i in range(rng.randint(8, 45))]
+        movies.sort(key=lambda m: m["release_date"])
+        return movies
+
+    def search(self, query: str, year: Optional[int]) -> List[Dict]:
+        rng = self._rng("search", query.lower(), year)
+        base = 7_000_000 + (zlib.crc32(query.lower().encode("utf-8")) % 1_000_000) * 40
+        results = [self.movie(base, year, title=query)]
+        results += [self.movie(base + i, year, title=f"{query} {self._title(rng)}") for i in range(1, rng.randint(5, 35))]
+        return results
+
+
+def _page(results: List[Dict], page: int) -> Dict:
+    total_pages = max(1, (len(results) + PAGE_SIZE - 1) // PAGE_SIZE)
+    start = (page - 1) * PAGE_SIZE
+    return {
+        "page": page,
+        "results": results[start:start + PAGE_SIZE],
+        "total_pages": total_pages,
+        "total_results": len(results)
+    }
+
+
+class TMDbStub:
+    """Request routing, fixtures, fault injection and per-endpoint call counters."""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.catalog = SyntheticCatalog(config.seed)
+        self.fixtures: Dict[str, Dict] = {}
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(config.seed)
+        if config.fixtures_path and os.path.exists(config.fixtures_path):
+            with open(config.fixtures_path, "r", encoding="utf-8") as f:
+                self.fixtures = json.load(f)
+
+    @staticmethod
+    def fixture_key(path: str, query: Dict[str, str]) -> str:
+        params = {k: v for k, v in query.items() if k != "api_key"}
+        return f"{path}?{urlencode(sorted(params.items()))}"
+
+    @staticmethod
+    def endpoint_type(path: str) -> str:
+        parts = path.strip("/").split("/")
+        if parts[:2] == ["discover", "movie"]:
+            return "discover"
+        if parts[:2] == ["search", "movie"]:
+            return "search"
+        return parts[0] if parts else "unknown"
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+    def inject_faults(self) -> bool:
+        """Sleep for the configured latency; return True if this call should get a 429."""
+        delay = self.config.latency_ms + self.config.jitter_ms * self._rng.uniform(-1.0, 1.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        return self.config.rate_429 > 0 and self._rng.random() < self.config.rate_429
+
+    def record(self, path: str, query: Dict[str, str]) -> Optional[Dict]:
+        params = dict(query, api_key=self.config.api_key)
+        resp = requests.get(f"{self.config.upstream_base}{path}", params=params, timeout=20)
+        if resp.status_code != 200:
+            return None
+        body = resp.json()
+        with self._lock:
+            self.fixtures[self.fixture_key(path, query)] = body
+            with open(self.config.fixtures_path, "w", encoding="utf-8") as f:
+                json.dump(self.fixtures, f, ensure_ascii=False, indent=1, sort_keys=True)
+                f.write("\n")
+        return body
+
+    def synthesize(self, path: str, query: Dict[str, str]) -> Optional[Dict]:
+        parts = path.strip("/").split("/")
+        page = int(query.get("page", 1) or 1)
+        if parts == ["discover", "movie"]:
+            if query.get("primary_release_year"):
+                return _page(self.catalog.year_movies(int(query["primary_release_year"])), page)
+            if query.get("with_keywords"):
+                return _page(self.catalog.related_movies("keyword", int(query["with_keywords"]), 6_000_000), page)
+            if query.get("with_companies"):
+                return _page(self.catalog.related_movies("company", int(query["with_companies"]), 8_000_000), page)
+            return _page([], page)
+        if len(parts) == 2 and parts[0] == "collection" and parts[1].isdigit():
+            cid = int(parts[1])
+            return {"id": cid, "name": f"Stub Collection {cid}",
+                    "parts": self.catalog.related_movies("collection", cid, 5_000_000)}
+        if len(parts) == 2 and parts[0] == "movie" and parts[1].isdigit():
+            return self.catalog.movie(int(parts[1]))
+        if parts == ["search", "movie"]:
+            year = int(query["year"]) if (query.get("year") or "").isdigit() else None
+            return _page(self.catalog.search(query.get("query", ""), year), page)
+        return None
+
+    def handle(self, path: str, query: Dict[str, str]):
+        """Return (status, body dict, extra headers) for a stub request."""
+        if path.startswith("/3/"):
+            path = path[2:]
+        endpoint = self.endpoint_type(path)
+        self.count(endpoint)
+        if self.inject_faults():
+            self.count("429")
+            return 429, {"status_code": 25, "status_message": "Your request count is over the allowed limit."}, {"Retry-After": "1"}
+        body = self.fixtures.get(self.fixture_key(path, query))
+        source = "fixture"
+        if body is None and self.config.record and self.config.fixtures_path:
+            body = self.record(path, query)
+        if body is None and self.config.generate:
+            body, source = self.synthesize(path, query), "generated"
+        if body is None:
+            self.count("404")
+            return 404, {"status_code": 34, "status_message": "The resource you requested could not be found."}, {}
+        self.count(source)
+        return 200, body, {}
+
+
+def make_handler(stub: TMDbStub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path == "/__stats":
+                status, body, headers = 200, {"counts": dict(stub.counts)}, {}
+            else:
+                status, body, headers = stub.handle(parsed.path, dict(parse_qsl(parsed.query)))
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json;charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_stub_server(config: StubConfig, host: str = "127.0.0.1", port: int = 0):
+    """Start the stub in a daemon thread. Returns (server, stub, base_url) where base_url ends in /3."""
+    stub = TMDbStub(config)
+    server = ThreadingHTTPServer((host, port), make_handler(stub))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, stub, f"http://{host}:{server.server_address[1]}/3"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline TMDb stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability of answering 429")
+    parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(__file__), "fixtures", "tmdb_synthetic.json"))
+    parser.add_argument("--record", action="store_true", help="Fetch calls missing from the fixtures from real TMDb and save them")
+    parser.add_argument("--generate", action="store_true",
+                        help="Answer calls missing from the fixtures from the generated catalog (scale tests only)")
+    parser.add_argument("--api-key", default=os.getenv("TMDB_API_KEY"))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.api_key:
+            parser.error("--record needs --api-key or TMDB_API_KEY")
+        os.makedirs(os.path.dirname(os.path.abspath(args.fixtures)), exist_ok=True)
+
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.rate_429, args.fixtures,
+                        args.record, REAL_TMDB_BASE, args.api_key, args.seed, args.generate)
+    stub = TMDbStub(config)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(stub))
+    server.daemon_threads = True
+    print(f"TMDb stub listening on http://{args.host}:{args.port}/3 ({len(stub.fixtures)} fixture responses from {args.fixtures})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Per-session event log for Server-Sent Events.
+
+Each session keeps its most recent events (next comparison, status changes,
+job progress) in a small ring buffer with increasing ids. Stream handlers wait
+on it for anything newer than the last id they sent, so a client reconnecting
+with Last-Event-ID gets exactly the events it missed. If those have already
+been dropped from the buffer, replay() says so and the caller resends the
+current state instead.
+"""
+import json
+import threading
+from collections import deque
+from typing import Any, List, Optional, Tuple
+
+
+class EventLog:
+    """Bounded, thread-safe log of (id, event, data) with blocking waits for new entries."""
+
+    def __init__(self, capacity: int):
+        self._events: deque = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self.last_id = 0
+        self.closed = False
+
+    def publish(self, event: str, data: Any) -> int:
+        """Append an event (data is JSON-encoded once, here) and wake waiting streams."""
+        payload = json.dumps(data, separators=(",", ":"), default=str)
+        with self._cond:
+            self.last_id += 1
+            self._events.append((self.last_id, event, payload))
+            self._cond.notify_all()
+            return self.last_id
+
+    def replay(self, after_id: int) -> Tuple[List[Tuple[int, str, str]], bool]:
+        """Events newer than after_id, and whether that covers everything since after_id
+        (False once some of them have fallen out of the buffer, or if after_id is from another
+        log, e.g. before a restart)."""
+        with self._cond:
+            events = [e for e in self._events if e[0] > after_id]
+            oldest = self._events[0][0] if self._events else self.last_id + 1
+            complete = oldest - 1 <= after_id <= self.last_id
+            return events, complete
+
+    def wait(self, after_id: int, timeout: float) -> bool:
+        """Block until there is an event newer than after_id, the log is closed, or timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.last_id > after_id or self.closed, timeout)
+
+    def close(self):
+        """Wake and end every stream on this log (e.g. the session was deleted)."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+def format_event(event_id: Optional[int], event: str, payload: str) -> str:
+    """One SSE message; payload is already JSON (a single line)."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,27 @@
+# Gunicorn settings for the Movie Ranking API: gunicorn -c gunicorn.conf.py movie_ranker_api:app
+# Bind address and worker count keep gunicorn's defaults ($PORT, $WEB_CONCURRENCY, flags).
+import os
+
+# Threaded workers: a Server-Sent Events stream or a slow request holds one thread, not a process.
+# The API caps open streams at GUNICORN_THREADS - 2 per worker (SSE_MAX_STREAMS overrides it)
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# Import the app (and restore the TMDb cache snapshot) once in the master; forked workers
+# share those pages copy-on-write instead of each loading their own copy
+preload_app = True
+
+
+def when_ready(server):
+    import movie_ranker_api
+    movie_ranker_api.prepare_for_fork()
+
+
+def post_fork(server, worker):
+    import movie_ranker_api
+    movie_ranker_api.after_fork()
+
+
+def worker_exit(server, worker):
+    import movie_ranker_api
+    movie_ranker_api.save_cache_snapshot()
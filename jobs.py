@@ -0,0 +1,204 @@
+"""
+Background jobs for long-running loads and imports.
+
+Work that can outlast a request (loading hundreds of TMDb ids, enriching a
+large import) is submitted to a JobRunner and runs on a small thread pool, so
+the request returns a job id at once instead of holding a worker past its
+timeout. The runner admits at most `workers + max_queued` unfinished jobs and
+rejects the rest with QueueFull, which the API turns into a 503 with
+Retry-After.
+
+A job's work function receives the Job and reports through it: progress
+(done/total), partial results as they are produced, and cancellation checks
+between units of work. Finished jobs are kept for a while so clients can fetch
+the result.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    """The runner already has its maximum number of unfinished jobs."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a work function (by Job.check) once the job has been cancelled."""
+
+
+class Job:
+    """One submitted unit of work and everything a client can ask about it."""
+
+    def __init__(self, kind: str, session_id: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.session_id = session_id
+        self.state = QUEUED
+        self.done = 0
+        self.total: Optional[int] = None
+        self.partial: List[Any] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        # Set by the submitter when the job finishes (e.g. upstream calls and cache hits it made)
+        self.metrics: Optional[Dict] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.listeners: List[Callable[["Job"], None]] = []
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._future = None
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check(self):
+        """Call between units of work: raises JobCancelled once cancellation was requested."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def progress(self, done: int, total: Optional[int] = None, partial: Optional[List[Any]] = None):
+        """Report progress, optionally appending newly finished partial results."""
+        with self._lock:
+            self.done = done
+            if total is not None:
+                self.total = total
+            if partial:
+                self.partial.extend(partial)
+        self._notify()
+
+    def _notify(self):
+        for listener in list(self.listeners):
+            try:
+                listener(self)
+            except Exception as e:
+                print(f"Job listener failed: {e}")
+
+    def to_dict(self, partial_since: Optional[int] = None, include_result: bool = True) -> Dict:
+        """Job status (with the result once done, unless include_result is False); with
+        partial_since, also the partial results from that offset on."""
+        with self._lock:
+            info = {
+                "job_id": self.id,
+                "type": self.kind,
+                "session_id": self.session_id,
+                "state": self.state,
+                "done": self.done,
+                "total": self.total,
+                "partial_count": len(self.partial),
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+            if self.error is not None:
+                info["error"] = self.error
+            if self.metrics is not None:
+                info["metrics"] = self.metrics
+            if self.state == DONE and include_result:
+                info["result"] = self.result
+            if partial_since is not None:
+                info["partial"] = self.partial[max(partial_since, 0):]
+        return info
+
+
+class JobRunner:
+    """Bounded pool for Jobs. Safe to share across threads."""
+
+    def __init__(self, workers: int, max_queued: int, keep_finished: int = 200, finished_ttl: float = 3600):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self.finished_ttl = finished_ttl
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._unfinished = 0
+        self.stats = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0, "cancelled": 0}
+
+    def submit(self, kind: str, work: Callable[[Job], Dict], session_id: Optional[str] = None,
+               on_done: Optional[Callable[[Job], None]] = None,
+               listener: Optional[Callable[[Job], None]] = None) -> Job:
+        """Queue work(job) -> result dict. on_done runs on the worker once it succeeded (e.g. to
+        attach the result to a session). Raises QueueFull when the runner is at capacity."""
+        job = Job(kind, session_id)
+        if listener is not None:
+            job.listeners.append(listener)
+        with self._lock:
+            self._prune()
+            if self._unfinished >= self.workers + self.max_queued:
+                self.stats["rejected"] += 1
+                raise QueueFull(f"{self._unfinished} jobs already queued or running")
+            self._unfinished += 1
+            self.stats["submitted"] += 1
+            self._jobs[job.id] = job
+        job._future = self._pool.submit(self._run, job, work, on_done)
+        return job
+
+    def _run(self, job: Job, work: Callable[[Job], Dict], on_done: Optional[Callable[[Job], None]]):
+        try:
+            job.check()
+            job.state = RUNNING
+            job.started_at = time.time()
+            job._notify()
+            result = work(job)
+            job.check()
+            with job._lock:
+                job.result = result
+            if on_done is not None:
+                on_done(job)
+            self._finish(job, DONE)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, FAILED)
+
+    def _finish(self, job: Job, state: str):
+        with job._lock:
+            job.state = state
+            job.finished_at = time.time()
+        with self._lock:
+            self._unfinished -= 1
+            self.stats[state] += 1
+        job._notify()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond keep_finished or finished_ttl (lock held)."""
+        now = time.time()
+        finished = [j for j in self._jobs.values() if j.state in FINISHED]
+        excess = len(finished) - self.keep_finished
+        for job in finished:
+            if excess <= 0 and now - job.finished_at < self.finished_ttl:
+                break
+            del self._jobs[job.id]
+            excess -= 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Request cancellation: a queued job never starts, a running one stops at its next check."""
+        job = self.get(job_id)
+        if job is None or job.state in FINISHED:
+            return job
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            # Never started, so _run will not finish it
+            self._finish(job, CANCELLED)
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "unfinished": self._unfinished}
@@ -198,7 +198,7 @@
       const enriched = (parsed.items || []).map((p) => {
         const poster = p.tmdbPosterUrl || p.lbPosterUrl || p.posterUrl || p.poster_url || null;
         return {
-          id: null,
+          id: p.tmdb_id || null,
           matched: Boolean(p.title) && Boolean(p.lbPosterUrl || poster),
           title: (p.title || '').replace(/\s*\(\d{4}\)\s*$/, '').trim(),
           release_date: p.year && p.year !== 'TBD' ? `${p.year}-01-01` : null,
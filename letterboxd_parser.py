@@ -0,0 +1,181 @@
+"""
+Incremental Letterboxd list-page parser.
+
+A SAX-style html.parser.HTMLParser subclass: pages can be fed chunk by chunk
+as they download, and only compact items are kept ({title, year, slug,
+tmdb_id}). Recognizes the same markup as parseLetterboxd.js: LazyPoster
+react components, legacy .film-poster blocks and film-list items, with the
+ld+json ItemList as a fallback. Also reports pagination (next link, last
+page number) so the remaining pages can be fetched concurrently.
+"""
+import json
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+_YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+_TRAILING_YEAR_RE = re.compile(r"\s*\(\d{4}\)\s*$")
+_SLUG_YEAR_RE = re.compile(r"-(\d{4})(?:/|$)")
+_PAGE_RE = re.compile(r"/page/(\d+)/?")
+_SLUG_RE = re.compile(r"/film/([^/]+)/?")
+_SHARE_RE = re.compile(r"/share/.*$")
+
+# Same exclusions as the client-side parser
+_EXCLUDED = ("tv series", "(tv)", "short")
+
+
+def _slug(value: str) -> Optional[str]:
+    """Film slug from a data-item-slug / data-target-link value ("/film/alien/" or "alien")."""
+    if not value:
+        return None
+    m = _SLUG_RE.search(value)
+    if m:
+        return m.group(1)
+    value = value.strip("/")
+    return value if value and "/" not in value else None
+
+
+def _year_from(*texts: Optional[str]) -> Optional[str]:
+    for text in texts:
+        if text:
+            m = _YEAR_RE.search(text)
+            if m:
+                return m.group(0)
+    return None
+
+
+def _tmdb_id(value: Optional[str]) -> Optional[int]:
+    return int(value) if value and value.isdigit() else None
+
+
+class LetterboxdListParser(HTMLParser):
+    """Collects list items and pagination from one Letterboxd list page. Feed with feed(), then close()."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.items: List[Dict] = []
+        self.next_href: Optional[str] = None
+        self.last_page = 1
+        self._seen_slugs = set()
+        self._ld_json: List[str] = []
+        self._in_ld_json = False
+        self._in_pagination = 0
+        # film-list-item parsing: pending item waiting for its title/year text
+        self._list_item: Optional[Dict] = None
+        self._capture: Optional[str] = None
+
+    # Item collection
+
+    def _add(self, title: str, year: Optional[str], slug: Optional[str], tmdb_id: Optional[int]):
+        title = _TRAILING_YEAR_RE.sub("", (title or "").strip()).strip()
+        lower = title.lower()
+        if len(title) < 2 or any(x in lower for x in _EXCLUDED):
+            return
+        if slug:
+            if slug in self._seen_slugs:
+                return
+            self._seen_slugs.add(slug)
+        item = {"title": title, "year": year, "slug": slug}
+        if tmdb_id:
+            item["tmdb_id"] = tmdb_id
+        self.items.append(item)
+
+    def handle_starttag(self, tag: str, attrs):
+        a = dict(attrs)
+        classes = (a.get("class") or "").split()
+
+        if tag == "script" and a.get("type") == "application/ld+json":
+            self._in_ld_json = True
+            return
+
+        if a.get("data-component-class") == "LazyPoster":
+            name = a.get("data-item-name") or a.get("data-item-full-display-name") or ""
+            slug_attr = a.get("data-item-slug") or a.get("data-target-link") or ""
+            self._add(name, _year_from(name) or _year_from(*_SLUG_YEAR_RE.findall(slug_attr)),
+                      _slug(slug_attr), _tmdb_id(a.get("data-tmdb-id")))
+            return
+
+        if "film-poster" in classes and (a.get("data-film-name") or a.get("data-film-slug") or a.get("data-target-link")):
+            name = a.get("data-film-name") or a.get("data-original-title") or a.get("title") or ""
+            slug_attr = a.get("data-film-slug") or a.get("data-target-link") or ""
+            self._add(name, _year_from(a.get("data-film-release-year"), name), _slug(slug_attr),
+                      _tmdb_id(a.get("data-tmdb-id")))
+            return
+
+        if tag == "li" and ("film-list-item" in classes or "listitem" in classes):
+            self._list_item = {"title": "", "year": None, "slug": None, "tmdb_id": _tmdb_id(a.get("data-tmdb-id"))}
+        elif self._list_item is not None:
+            if tag == "a" and self._list_item["slug"] is None:
+                self._list_item["slug"] = _slug(a.get("href") or "")
+            if tag == "a" and self._capture is None and not self._list_item["title"]:
+                self._capture = "title"
+            elif tag == "span" and "release-year" in classes:
+                self._capture = "year"
+            elif tag == "time" and a.get("datetime"):
+                self._list_item["year"] = self._list_item["year"] or _year_from(a["datetime"])
+
+        # Pagination
+        if tag == "div" and ("pagination" in classes or "paginate-pages" in classes):
+            self._in_pagination += 1
+        if tag == "a" and a.get("href"):
+            href = a["href"]
+            if "next" in classes or a.get("rel") == "next":
+                self.next_href = href
+            m = _PAGE_RE.search(href)
+            if m and (self._in_pagination or "next" in classes):
+                self.last_page = max(self.last_page, int(m.group(1)))
+
+    def handle_endtag(self, tag: str):
+        if tag == "script":
+            self._in_ld_json = False
+        elif tag == "a" and self._capture == "title":
+            self._capture = None
+        elif tag == "span" and self._capture == "year":
+            self._capture = None
+        elif tag == "li" and self._list_item is not None:
+            item = self._list_item
+            self._list_item = None
+            self._capture = None
+            if item["title"]:
+                self._add(item["title"], item["year"], item["slug"], item["tmdb_id"])
+        elif tag == "div" and self._in_pagination:
+            self._in_pagination -= 1
+
+    def handle_data(self, data: str):
+        if self._in_ld_json:
+            self._ld_json.append(data)
+        elif self._capture == "title" and self._list_item is not None:
+            self._list_item["title"] += data
+        elif self._capture == "year" and self._list_item is not None:
+            self._list_item["year"] = self._list_item["year"] or _year_from(data)
+
+    def close(self):
+        super().close()
+        if not self.items and self._ld_json:
+            self._parse_ld_json("".join(self._ld_json))
+
+    def _parse_ld_json(self, text: str):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(data, dict):
+            return
+        for entry in data.get("itemListElement") or []:
+            it = entry.get("item") or entry.get("url") or entry.get("name") if isinstance(entry, dict) else None
+            if isinstance(it, dict):
+                url = it.get("url") or ""
+                date = it.get("datePublished") or it.get("dateCreated") or ""
+                self._add(it.get("name") or it.get("headline") or it.get("title") or "",
+                          _year_from(str(date)) or _year_from(*_SLUG_YEAR_RE.findall(url)), _slug(url), None)
+            elif isinstance(it, str):
+                self._add(it, _year_from(*_SLUG_YEAR_RE.findall(it)), _slug(it), None)
+
+
+def page_url(list_url: str, page: int) -> str:
+    """URL of page N of a list, given any page or share link of it (pages are /page/N/ suffixes)."""
+    base = _PAGE_RE.sub("/", list_url.split("?")[0].split("#")[0])
+    base = _SHARE_RE.sub("/", base)
+    if not base.endswith("/"):
+        base += "/"
+    return base if page <= 1 else f"{base}page/{page}/"
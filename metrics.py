@@ -0,0 +1,185 @@
+"""
+Minimal Prometheus-style metrics for the Movie Ranking API.
+
+Counters, histograms and scrape-time gauges rendered in the text exposition
+format (version 0.0.4). Updates take one short per-metric lock and touch a
+single preallocated slot, so collection is cheap enough to leave on in
+production; rendering happens only when /metrics is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds) shared by route and upstream histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def items(self) -> List[Tuple[Tuple, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def collect(self) -> Tuple[str, List[Sample]]:
+        return "counter", [
+            (self.name, dict(zip(self.labelnames, key)), value) for key, value in self.items()
+        ]
+
+
+class Histogram:
+    """Bucketed histogram with optional labels; buckets are rendered cumulatively."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last slot is +Inf), sum, count]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labelvalues] = series
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self) -> Tuple[str, List[Sample]]:
+        with self._lock:
+            snapshot = [(key, list(s[0]), s[1], s[2]) for key, s in self._series.items()]
+        samples: List[Sample] = []
+        for key, counts, total, count in snapshot:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return "histogram", samples
+
+
+class CallbackMetric:
+    """Metric whose samples are produced by a callback at scrape time.
+
+    Used for gauges (live sessions) and for counters kept elsewhere (cache hit/miss stats).
+    """
+
+    def __init__(self, name: str, help_text: str,
+                 callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]], kind: str = "gauge"):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self._callback = callback
+
+    def collect(self) -> Tuple[str, List[Sample]]:
+        return self.kind, [(self.name, labels, value) for labels, value in self._callback()]
+
+
+class RateWindow:
+    """Events over the trailing window, kept in one-second slots (e.g. comparisons per minute)."""
+
+    def __init__(self, seconds: int = 60):
+        self.seconds = seconds
+        self._slots = [[0, 0] for _ in range(seconds)]  # [epoch second, count]
+        self._lock = threading.Lock()
+
+    def add(self, amount: int = 1, now: Optional[float] = None):
+        second = int(now if now is not None else time.time())
+        slot = self._slots[second % self.seconds]
+        with self._lock:
+            if slot[0] != second:
+                slot[0] = second
+                slot[1] = 0
+            slot[1] += amount
+
+    def total(self, now: Optional[float] = None) -> int:
+        second = int(now if now is not None else time.time())
+        oldest = second - self.seconds
+        with self._lock:
+            return sum(count for ts, count in self._slots if ts > oldest)
+
+
+class Registry:
+    """Holds metrics and renders them in Prometheus text exposition format.
+
+    const_labels are added to every sample, e.g. the worker process id: each gunicorn
+    worker keeps its own values, and the label keeps their series apart.
+    """
+
+    def __init__(self, const_labels: Optional[Dict[str, str]] = None):
+        self._metrics = []
+        self.const_labels = dict(const_labels or {})
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, callback, kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, help_text, callback, kind))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        const = self.const_labels
+        for metric in self._metrics:
+            kind, samples = metric.collect()
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            for name, labels, value in samples:
+                if const:
+                    labels = {**const, **labels}
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
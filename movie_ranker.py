@@ -1,11 +1,284 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import requests
 import json
 import os
-from typing import List, Dict, Optional, Tuple
+import io
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
 from functools import cmp_to_key
 
+from poster_cache import ResizedPosterCache
+from ranking_engine import MergeRanker
+
+POSTER_SIZE = (200, 300)
+POSTER_WORKERS = 4
+POSTER_MEMORY_ITEMS = 64  # decoded PhotoImages kept in memory
+PREFETCH_PAIRS = 3        # upcoming comparisons whose posters are fetched ahead
+POSTER_DISK_CACHE = "poster_cache_desktop"
+POSTER_DISK_MAX_BYTES = 100 * 1024 * 1024
+DISCOVER_MAX_PAGES = 5    # Limit to 5 pages
+DISCOVER_PAGE_SIZE = 20   # results per TMDb discover page
+LOAD_WORKERS = 5
+CHECKPOINT_VERSION = 2
+CHECKPOINT_COMPACT_EVERY = 200  # choices logged before the checkpoint is rewritten as one snapshot
+
+
+def _movie_key(movie: Dict):
+    return movie.get("id") or id(movie)
+
+
+class PosterLoader:
+    """Loads posters off the UI thread.
+
+    Downloads and decodes run on a small thread pool with a pooled HTTP session; finished
+    images are handed back to the Tk thread through root.after, where the PhotoImage is
+    created (Tk objects must only be touched from the UI thread). Decoded PhotoImages are
+    kept in an LRU, so posters seen recently or prefetched display immediately. Behind that,
+    resized posters persist in an optional disk cache, so later runs skip the network.
+    """
+
+    def __init__(self, root, image_base: str, size: Tuple[int, int] = POSTER_SIZE,
+                 workers: int = POSTER_WORKERS, capacity: int = POSTER_MEMORY_ITEMS,
+                 disk_cache: Optional[ResizedPosterCache] = None):
+        self.root = root
+        self.image_base = image_base
+        self.size = size
+        self.capacity = capacity
+        self.disk_cache = disk_cache
+        self._http = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="poster")
+        self._photos: "OrderedDict[str, object]" = OrderedDict()
+        self._pending = set()
+        self._waiters: Dict[str, List[Callable]] = {}
+        self._done: "queue.Queue[Tuple[str, object]]" = queue.Queue()
+        self._polling = False
+
+    def get(self, poster_path: str, callback: Callable):
+        """Call callback(photo) on the UI thread with the poster's PhotoImage (None if unavailable)."""
+        photo = self._photos.get(poster_path)
+        if photo is not None:
+            self._photos.move_to_end(poster_path)
+            callback(photo)
+            return
+        self._waiters.setdefault(poster_path, []).append(callback)
+        self._submit(poster_path)
+
+    def prefetch(self, poster_paths: List[str]):
+        """Start loading posters that are likely to be shown soon."""
+        for poster_path in poster_paths:
+            if poster_path and poster_path not in self._photos:
+                self._submit(poster_path)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, poster_path: str):
+        if poster_path in self._pending:
+            return
+        self._pending.add(poster_path)
+        future = self._executor.submit(self._load, poster_path)
+        future.add_done_callback(lambda f, path=poster_path: self._finished(path, f))
+        if not self._polling:
+            self._polling = True
+            self.root.after(20, self._drain)
+
+    def _finished(self, poster_path: str, future):
+        """Worker thread: queue the outcome for the UI thread."""
+        ok = not future.cancelled() and future.exception() is None
+        self._done.put((poster_path, future.result() if ok else None))
+
+    def _fetch(self, poster_path: str) -> bytes:
+        response = self._http.get(f"{self.image_base}{poster_path}", timeout=5)
+        response.raise_for_status()
+        return response.content
+
+    def _load(self, poster_path: str):
+        """Worker thread: a resized PIL image of the poster (raises on failure)."""
+        from PIL import Image
+
+        if self.disk_cache is not None:
+            img = Image.open(io.BytesIO(self.disk_cache.get(poster_path, self._fetch)))
+            img.load()
+            return img
+        img = Image.open(io.BytesIO(self._fetch(poster_path)))
+        img.draft("RGB", self.size)
+        return img.resize(self.size, Image.Resampling.LANCZOS)
+
+    def _drain(self):
+        """UI thread: turn finished images into PhotoImages and notify waiters."""
+        while True:
+            try:
+                poster_path, img = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending.discard(poster_path)
+            photo = None
+            if img is not None:
+                from PIL import ImageTk
+
+                photo = ImageTk.PhotoImage(img)
+                self._photos[poster_path] = photo
+                while len(self._photos) > self.capacity:
+                    self._photos.popitem(last=False)
+            for callback in self._waiters.pop(poster_path, []):
+                callback(photo)
+        if self._pending:
+            self.root.after(20, self._drain)
+        else:
+            self._polling = False
+
+
+class MovieLoadJob:
+    """Fetches a year's discover pages on a worker thread; the UI thread polls its progress.
+
+    Pages are requested concurrently in waves sized to what is still missing and merged in
+    page order, so the result is the same list a page-by-page load would produce.
+    """
+
+    def __init__(self, http: requests.Session, api_base: str, api_key: str, year: int, max_movies: int):
+        self.http = http
+        self.api_base = api_base
+        self.api_key = api_key
+        self.year = year
+        self.max_movies = max_movies
+        self.status = "Loading movies..."
+        self.movies: Optional[List[Dict]] = None
+        self.error: Optional[str] = None
+        self.done = False
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def start(self):
+        threading.Thread(target=self.run, name="movie-load", daemon=True).start()
+
+    def run(self):
+        try:
+            self.movies = self._load()
+        except requests.exceptions.RequestException as e:
+            self.error = f"Failed to load movies: {e}"
+        except Exception as e:
+            self.error = f"Unexpected error: {e}"
+        finally:
+            self.done = True
+
+    def _fetch_page(self, page: int) -> Optional[Dict]:
+        if self.cancelled:
+            return None
+        params = {
+            "api_key": self.api_key,
+            "primary_release_year": self.year,
+            "sort_by": "popularity.desc",
+            "page": page
+        }
+        response = self.http.get(f"{self.api_base}/discover/movie", params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def _load(self) -> Optional[List[Dict]]:
+        all_movies = []
+        page = 1
+        pool = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="discover")
+        try:
+            while len(all_movies) < self.max_movies and page <= DISCOVER_MAX_PAGES:
+                # As many pages as are needed if every remaining result qualified
+                missing = self.max_movies - len(all_movies)
+                wave = min(DISCOVER_MAX_PAGES - page + 1, -(-missing // DISCOVER_PAGE_SIZE))
+                futures = [pool.submit(self._fetch_page, p) for p in range(page, page + wave)]
+                exhausted = False
+                for future in futures:
+                    data = future.result()
+                    if self.cancelled:
+                        return None
+                    for movie in data.get("results", []):
+                        if movie.get("poster_path") and movie.get("title"):
+                            all_movies.append({
+                                "id": movie["id"],
+                                "title": movie["title"],
+                                "poster_path": movie.get("poster_path", ""),
+                                "release_date": movie.get("release_date", ""),
+                                "vote_average": movie.get("vote_average", 0),
+                                "overview": movie.get("overview", "")[:200] + "..." if movie.get("overview") else ""
+                            })
+                            if len(all_movies) >= self.max_movies:
+                                break
+                    self.status = f"Loading movies... ({min(len(all_movies), self.max_movies)}/{self.max_movies})"
+                    if not data.get("results"):
+                        exhausted = True
+                    if exhausted or len(all_movies) >= self.max_movies:
+                        break
+                    page += 1
+                if exhausted:
+                    break
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return all_movies[:self.max_movies]
+
+
+class RankingCheckpoint:
+    """Append-only checkpoint of a ranking session (JSON lines).
+
+    Line 1 holds the movies, line 2 a ranking engine snapshot (which refers to movies by their
+    index in that list), and each later line is one choice made after the snapshot, so
+    saving a click is a single short append. Resuming restores the snapshot and applies the
+    logged choices directly to the engine; nothing is asked again. Every
+    CHECKPOINT_COMPACT_EVERY choices the file is rewritten as a fresh snapshot, which bounds
+    both its size and the work done on resume.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._since_snapshot = 0
+
+    def write_snapshot(self, header: Dict, state: Dict):
+        self.close()
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            f.write(json.dumps({"snapshot": state}, separators=(",", ":")) + "\n")
+        os.replace(tmp, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._since_snapshot = 0
+
+    def append_choice(self, choice: str) -> bool:
+        """Log one choice; returns True when it is time to compact into a new snapshot."""
+        self._file.write(f'{{"choice":"{choice}"}}\n')
+        self._file.flush()
+        self._since_snapshot += 1
+        return self._since_snapshot >= CHECKPOINT_COMPACT_EVERY
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def read(path: str) -> Tuple[Dict, Dict, List[str]]:
+        """Header, snapshot and the choices logged after it."""
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CHECKPOINT_VERSION:
+                raise ValueError(f"unsupported checkpoint version {header.get('version')}")
+            state = json.loads(f.readline())["snapshot"]
+            choices = []
+            for line in f:
+                try:
+                    choices.append(json.loads(line)["choice"])
+                except (ValueError, KeyError):
+                    break  # torn last line from an interrupted write
+        return header, state, choices
+
+
 class MovieRanker:
     def __init__(self, root):
         self.root = root
@@ -15,7 +288,7 @@ class MovieRanker:
         # API Configuration
         self.api_key = None
         self.api_base = "https://api.themoviedb.org/3"
-        self.image_base = "https://image.tmdb.org/t/p/w500"
+        self.image_base = "https://image.tmdb.org/t/p/w342"  # smallest TMDb size covering the 200x300 display
         
         # Data
         self.movies: List[Dict] = []
@@ -24,11 +297,33 @@ class MovieRanker:
         self.comparison_queue: List[Tuple] = []
         self.current_comparison: Optional[Tuple] = None
         self.is_ranking = False
+        self.http = requests.Session()
+        self.load_job: Optional[MovieLoadJob] = None
+        self.checkpoint: Optional[RankingCheckpoint] = None
+        self.engine: Optional[MergeRanker] = None
+        
+        # Posters load in the background, backed by a disk cache that survives restarts
+        try:
+            disk_cache = ResizedPosterCache(POSTER_DISK_CACHE, POSTER_DISK_MAX_BYTES, POSTER_SIZE)
+        except OSError as e:
+            print(f"Poster disk cache disabled: {e}")
+            disk_cache = None
+        self.poster_loader = PosterLoader(self.root, self.image_base, disk_cache=disk_cache)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Setup UI
         self.setup_ui()
         self.load_api_key()
         
+    def on_close(self):
+        """Stop background work and close the window"""
+        if self.load_job:
+            self.load_job.cancel()
+        if self.checkpoint:
+            self.checkpoint.close()
+        self.poster_loader.shutdown()
+        self.root.destroy()
+        
     def setup_ui(self):
         # Main container
         main_frame = ttk.Frame(self.root, padding="10")
@@ -63,7 +358,8 @@ class MovieRanker:
         self.max_movies_entry.insert(0, "50")
         self.max_movies_entry.grid(row=0, column=3, padx=(0, 10))
         
-        ttk.Button(selection_frame, text="Load Movies", command=self.load_movies).grid(row=0, column=4, padx=(10, 0))
+        self.load_button = ttk.Button(selection_frame, text="Load Movies", command=self.load_movies)
+        self.load_button.grid(row=0, column=4, padx=(10, 0))
         ttk.Button(selection_frame, text="Start Ranking", command=self.start_ranking).grid(row=0, column=5, padx=(10, 0))
         
         self.status_label = ttk.Label(selection_frame, text="Ready", foreground="green")
@@ -158,7 +454,11 @@ class MovieRanker:
         self.api_key = self.api_key_entry.get().strip()
     
     def load_movies(self):
-        """Load movies from TMDb API"""
+        """Load movies from TMDb API in the background (pressing again while loading cancels)"""
+        if self.load_job:
+            self.cancel_loading()
+            return
+        
         if not self.api_key:
             messagebox.showerror("Error", "Please enter your TMDb API key first!")
             return
@@ -171,57 +471,41 @@ class MovieRanker:
             return
         
         self.status_label.config(text="Loading movies...", foreground="blue")
-        self.root.update()
+        self.load_button.config(text="Cancel Loading")
+        self.load_job = MovieLoadJob(self.http, self.api_base, self.api_key, year, max_movies)
+        self.load_job.start()
+        self.root.after(100, self._poll_load, self.load_job)
+    
+    def cancel_loading(self):
+        """Abandon the running load; pages already in flight finish and are discarded"""
+        if self.load_job:
+            self.load_job.cancel()
+            self.load_job = None
+        self.load_button.config(text="Load Movies")
+        self.status_label.config(text="Loading cancelled", foreground="orange")
+    
+    def _poll_load(self, job: MovieLoadJob):
+        """Show load progress; apply the result once the worker finishes"""
+        if job is not self.load_job:
+            return  # cancelled or superseded
+        if not job.done:
+            self.status_label.config(text=job.status, foreground="blue")
+            self.root.after(100, self._poll_load, job)
+            return
         
-        try:
-            # Fetch popular movies for the year
-            url = f"{self.api_base}/discover/movie"
-            params = {
-                "api_key": self.api_key,
-                "primary_release_year": year,
-                "sort_by": "popularity.desc",
-                "page": 1
-            }
-            
-            all_movies = []
-            page = 1
-            
-            while len(all_movies) < max_movies and page <= 5:  # Limit to 5 pages
-                params["page"] = page
-                response = requests.get(url, params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
-                for movie in data.get("results", []):
-                    if movie.get("poster_path") and movie.get("title"):
-                        all_movies.append({
-                            "id": movie["id"],
-                            "title": movie["title"],
-                            "poster_path": movie.get("poster_path", ""),
-                            "release_date": movie.get("release_date", ""),
-                            "vote_average": movie.get("vote_average", 0),
-                            "overview": movie.get("overview", "")[:200] + "..." if movie.get("overview") else ""
-                        })
-                        if len(all_movies) >= max_movies:
-                            break
-                
-                if not data.get("results"):
-                    break
-                page += 1
-            
-            self.movies = all_movies[:max_movies]
-            self.status_label.config(
-                text=f"Loaded {len(self.movies)} movies from {year}", 
-                foreground="green"
-            )
-            messagebox.showinfo("Success", f"Loaded {len(self.movies)} movies!")
-            
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Error", f"Failed to load movies: {e}")
-            self.status_label.config(text="Error loading movies", foreground="red")
-        except Exception as e:
-            messagebox.showerror("Error", f"Unexpected error: {e}")
+        self.load_job = None
+        self.load_button.config(text="Load Movies")
+        if job.error:
+            messagebox.showerror("Error", job.error)
             self.status_label.config(text="Error loading movies", foreground="red")
+            return
+        
+        self.movies = job.movies
+        self.status_label.config(
+            text=f"Loaded {len(self.movies)} movies from {job.year}", 
+            foreground="green"
+        )
+        messagebox.showinfo("Success", f"Loaded {len(self.movies)} movies!")
     
     def start_ranking(self):
         """Start the ranking process"""
@@ -236,140 +520,58 @@ class MovieRanker:
         self.is_ranking = True
         self.ranked_movies = []
         self.unseen_movies = []
+        self.current_comparison = None
         
-        # Filter out movies user hasn't seen (we'll handle this during comparison)
-        # Start merge sort with all movies
-        self.movies_to_rank = [m for m in self.movies if m not in self.unseen_movies]
-        
-        # Initialize merge sort state
-        self.merge_sort_state = {
-            "sorted_sublists": [[m] for m in self.movies_to_rank],  # Start with single-element lists
-            "current_merge": None,
-            "merge_stack": []
-        }
+        # The engine ranks positions in this list
+        self.movies_to_rank = list(self.movies)
+        self.engine = MergeRanker(len(self.movies_to_rank))
         
-        # Build initial merge stack
-        self._prepare_merge_round()
+        # Checkpoint so the session can be resumed if the app is closed mid-ranking
+        self._start_checkpoint()
         
         # Start first comparison
         self.next_comparison()
     
-    def _prepare_merge_round(self):
-        """Prepare the next round of merges"""
-        sublists = self.merge_sort_state["sorted_sublists"]
-        
-        if len(sublists) <= 1:
-            # Done! All movies are sorted
-            if sublists:
-                self.ranked_movies = sublists[0]
-            return
-        
-        # Pair up sublists for merging
-        new_sublists = []
-        i = 0
-        while i < len(sublists):
-            if i + 1 < len(sublists):
-                # Pair up two sublists
-                self.merge_sort_state["merge_stack"].append({
-                    "left": sublists[i],
-                    "right": sublists[i + 1],
-                    "left_idx": 0,
-                    "right_idx": 0,
-                    "result": []
-                })
-                i += 2
-            else:
-                # Odd one out, add to next round
-                new_sublists.append(sublists[i])
-                i += 1
-        
-        self.merge_sort_state["sorted_sublists"] = new_sublists
+    def _checkpoint_path(self) -> str:
+        return f"movie_ranking_{self.year_entry.get()}.session.jsonl"
+    
+    def _start_checkpoint(self):
+        """Begin a new checkpoint file for this ranking"""
+        if self.checkpoint:
+            self.checkpoint.close()
+        self.checkpoint = RankingCheckpoint(self._checkpoint_path())
+        self._write_snapshot()
+    
+    def _write_snapshot(self):
+        """Rewrite the checkpoint as a snapshot of the current state"""
+        header = {"version": CHECKPOINT_VERSION, "year": self.year_entry.get(), "movies": self.movies_to_rank}
+        try:
+            self.checkpoint.write_snapshot(header, self.engine.snapshot())
+        except OSError as e:
+            print(f"Checkpoint disabled: {e}")
+            self.checkpoint = None
     
     def next_comparison(self):
         """Get the next comparison to make"""
         if not self.is_ranking:
             return
-        
-        # Check if we have an active merge
-        if self.merge_sort_state["current_merge"]:
-            merge = self.merge_sort_state["current_merge"]
-            left_list = merge["left"]
-            right_list = merge["right"]
-            left_idx = merge["left_idx"]
-            right_idx = merge["right_idx"]
-            
-            # Check if merge is complete
-            if left_idx >= len(left_list) and right_idx >= len(right_list):
-                # This merge is done, move to next
-                self.merge_sort_state["current_merge"] = None
-                self.next_comparison()
-                return
-            elif left_idx >= len(left_list):
-                # Left exhausted, add remaining right (filter unseen)
-                remaining = [m for m in right_list[right_idx:] if m not in self.unseen_movies]
-                merge["result"].extend(remaining)
-                self._complete_current_merge()
-                return
-            elif right_idx >= len(right_list):
-                # Right exhausted, add remaining left (filter unseen)
-                remaining = [m for m in left_list[left_idx:] if m not in self.unseen_movies]
-                merge["result"].extend(remaining)
-                self._complete_current_merge()
-                return
-            else:
-                # Need to compare - but skip if movies are already unseen
-                left_movie = left_list[left_idx]
-                right_movie = right_list[right_idx]
-                
-                # Skip if either movie is already marked as unseen
-                if left_movie in self.unseen_movies:
-                    merge["left_idx"] += 1
-                    self.next_comparison()
-                    return
-                if right_movie in self.unseen_movies:
-                    merge["right_idx"] += 1
-                    self.next_comparison()
-                    return
-                
-                self.current_comparison = (left_movie, right_movie, merge)
-                self.display_comparison(left_movie, right_movie)
-                self._update_progress()
-                return
-        
-        # No active merge, get next from stack
-        if self.merge_sort_state["merge_stack"]:
-            merge = self.merge_sort_state["merge_stack"].pop(0)
-            self.merge_sort_state["current_merge"] = merge
-            self.next_comparison()
-        else:
-            # Current round done, prepare next round
-            if len(self.merge_sort_state["sorted_sublists"]) > 1:
-                self._prepare_merge_round()
-                self.next_comparison()
-            else:
-                # All done!
-                if self.merge_sort_state["sorted_sublists"]:
-                    self.ranked_movies = self.merge_sort_state["sorted_sublists"][0]
-                self.finish_ranking()
+        self._show_pair(self.engine.next_pair())
     
-    def _complete_current_merge(self):
-        """Complete the current merge and add result to sorted_sublists"""
-        merge = self.merge_sort_state["current_merge"]
-        self.merge_sort_state["sorted_sublists"].append(merge["result"])
-        self.merge_sort_state["current_merge"] = None
-        self.next_comparison()
+    def _show_pair(self, pair):
+        """Display an engine pair, or finish when there is none"""
+        if pair is None:
+            self.finish_ranking()
+            return
+        left_movie = self.movies_to_rank[pair[0]]
+        right_movie = self.movies_to_rank[pair[1]]
+        self.current_comparison = (left_movie, right_movie)
+        self.display_comparison(left_movie, right_movie)
+        self._update_progress()
     
     def _update_progress(self):
         """Update progress label"""
         total_movies = len(self.movies)
         ranked_count = len(self.ranked_movies)
-        remaining_merges = len(self.merge_sort_state["merge_stack"])
-        if self.merge_sort_state["current_merge"]:
-            remaining_merges += 1
-        
-        # Estimate comparisons (roughly n*log2(n) for merge sort)
-        estimated_total = int(total_movies * (total_movies.bit_length() - 1))
-        completed = estimated_total - remaining_merges * 2  # Rough estimate
         
         self.progress_label.config(
             text=f"Ranking in progress... ({ranked_count}/{total_movies} movies ranked)"
@@ -382,6 +584,13 @@ class MovieRanker:
         
         # Right movie
         self.display_movie(movie2, self.right_poster_label, self.right_title_label, self.right_info_label)
+        
+        # Warm the posters of the comparisons that can come next
+        self.poster_loader.prefetch([m.get("poster_path") for m in self._upcoming_movies()])
+    
+    def _upcoming_movies(self, pairs: int = PREFETCH_PAIRS) -> List[Dict]:
+        """Movies in the next few likely comparisons"""
+        return [self.movies_to_rank[i] for i in self.engine.upcoming(pairs)]
     
     def display_movie(self, movie: Dict, poster_label, title_label, info_label):
         """Display a single movie"""
@@ -391,24 +600,22 @@ class MovieRanker:
         info_text += f"Rating: {movie.get('vote_average', 0):.1f}/10"
         info_label.config(text=info_text)
         
-        # Load poster image
-        if movie.get("poster_path"):
-            poster_url = f"{self.image_base}{movie['poster_path']}"
-            try:
-                response = requests.get(poster_url, timeout=5)
-                if response.status_code == 200:
-                    from PIL import Image, ImageTk
-                    import io
-                    
-                    img = Image.open(io.BytesIO(response.content))
-                    img = img.resize((200, 300), Image.Resampling.LANCZOS)
-                    photo = ImageTk.PhotoImage(img)
-                    poster_label.config(image=photo, text="")
-                    poster_label.image = photo  # Keep a reference
+        # Load poster image (cached or in the background)
+        poster_path = movie.get("poster_path")
+        poster_label.poster_path = poster_path
+        if poster_path:
+            poster_label.config(image="", text="Loading...")
+            
+            def show(photo, label=poster_label, path=poster_path):
+                if getattr(label, "poster_path", None) != path:
+                    return  # a newer comparison is on screen
+                if photo is None:
+                    label.config(image="", text="Poster\nNot Available")
                 else:
-                    poster_label.config(image="", text="Poster\nNot Available")
-            except Exception as e:
-                poster_label.config(image="", text="Poster\nNot Available")
+                    label.config(image=photo, text="")
+                    label.image = photo  # Keep a reference
+            
+            self.poster_loader.get(poster_path, show)
         else:
             poster_label.config(image="", text="No Poster")
     
@@ -417,48 +624,33 @@ class MovieRanker:
         if not self.current_comparison:
             return
         
-        left_movie, right_movie, merge = self.current_comparison
-        
+        pair = self.engine.answer(choice)
         if choice == "skip":
-            # User hasn't seen one or both movies
-            # Add both to unseen list (don't include in ranking)
-            if left_movie not in self.unseen_movies:
-                self.unseen_movies.append(left_movie)
-            if right_movie not in self.unseen_movies:
-                self.unseen_movies.append(right_movie)
-            
-            # Skip both movies - advance indices to continue merge
-            # We'll handle the actual removal when building final list
-            merge["left_idx"] += 1
-            merge["right_idx"] += 1
-            
-        elif choice == "left":
-            # Prefer left movie (only add if not unseen)
-            if left_movie not in self.unseen_movies:
-                merge["result"].append(left_movie)
-            merge["left_idx"] += 1
-            
-        elif choice == "right":
-            # Prefer right movie (only add if not unseen)
-            if right_movie not in self.unseen_movies:
-                merge["result"].append(right_movie)
-            merge["right_idx"] += 1
+            # User hasn't seen one or both movies: both are excluded from the ranking
+            self.unseen_movies.extend(self.current_comparison)
+        if self.checkpoint:
+            try:
+                if self.checkpoint.append_choice(choice):
+                    self._write_snapshot()
+            except OSError as e:
+                print(f"Checkpoint disabled: {e}")
+                self.checkpoint = None
         
         # Continue with next comparison
-        self.next_comparison()
+        self._show_pair(pair)
     
     def finish_ranking(self):
         """Finish the ranking process"""
         self.is_ranking = False
         self.current_comparison = None
         
-        # Filter out unseen movies from final ranking
-        self.ranked_movies = [m for m in self.ranked_movies if m not in self.unseen_movies]
+        # The engine's order already excludes unseen movies
+        self.ranked_movies = [self.movies_to_rank[i] for i in self.engine.ranked]
         
         # Ensure all seen movies are in ranked list (in case any were missed)
-        for movie in self.movies:
-            if movie not in self.ranked_movies and movie not in self.unseen_movies:
-                self.ranked_movies.append(movie)
+        placed = {_movie_key(m) for m in self.ranked_movies}
+        placed.update(_movie_key(m) for m in self.unseen_movies)
+        self.ranked_movies.extend(m for m in self.movies if _movie_key(m) not in placed)
         
         # Display results
         self.display_results()
@@ -514,9 +706,45 @@ class MovieRanker:
             messagebox.showerror("Error", f"Failed to save results: {e}")
     
     def load_results(self):
-        """Load results from a file"""
-        # This would load a previous ranking session
-        messagebox.showinfo("Info", "Load functionality can be extended to restore previous sessions")
+        """Resume a ranking session (or reopen a finished one) from its checkpoint"""
+        path = filedialog.askopenfilename(
+            title="Resume Ranking Session",
+            initialfile=self._checkpoint_path(),
+            filetypes=[("Ranking sessions", "*.session.jsonl"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        
+        try:
+            header, state, choices = RankingCheckpoint.read(path)
+            engine = MergeRanker.restore(state)
+            # Re-apply the choices logged after the snapshot, without showing their comparisons
+            for choice in choices:
+                if engine.next_pair() is None:
+                    break
+                engine.answer(choice)
+        except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+            messagebox.showerror("Error", f"Failed to load session: {e}")
+            return
+        
+        self.movies = header["movies"]
+        self.movies_to_rank = list(self.movies)
+        self.engine = engine
+        self.ranked_movies = []
+        self.unseen_movies = [self.movies_to_rank[i] for i in engine.unseen]
+        self.current_comparison = None
+        self.year_entry.delete(0, tk.END)
+        self.year_entry.insert(0, str(header.get("year", "")))
+        self.is_ranking = True
+        
+        # Continue logging into the same file, starting from a compacted snapshot
+        if self.checkpoint:
+            self.checkpoint.close()
+        self.checkpoint = RankingCheckpoint(path)
+        self._write_snapshot()
+        
+        self.status_label.config(text=f"Resumed session with {len(self.movies)} movies", foreground="green")
+        self.next_comparison()
     
     def export_json(self):
         """Export results to JSON"""
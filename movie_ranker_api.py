@@ -1,24 +1,247 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, send_file, redirect, g, stream_with_context
 from flask_cors import CORS
 import requests
 import os
 import zlib
-from typing import List, Dict, Optional
+import gzip
+import hashlib
+import hmac
+import threading
+import time
+import codecs
+import contextvars
+import functools
+import atexit
+import gc
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+from typing import Callable, List, Dict, Optional
 import uuid
+import random
 from datetime import datetime, timedelta
 import re
 from urllib.parse import urlparse
 
+import serialization
+import metrics
+import tmdb_catalog
+import title_index
+import batch_matcher
+import letterboxd_parser
+import poster_cache
+import ranking_engine
+import state_token
+import jobs
+import event_stream
+import tmdb_cache
+import movie_table
+
+try:
+    import brotli  # Optional: enables 'br' Content-Encoding when installed
+except ImportError:
+    brotli = None
+
 app = Flask(__name__)
 # Enable CORS for all routes and origins - allow requests from anywhere (Pages, localhost, etc.)
 CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 
+# Metrics (rendered at /metrics in Prometheus text format). Values live in each worker process, so
+# every sample carries the worker's pid (reset in after_fork) and a scrape shows one worker's series
+METRICS = metrics.Registry({"worker": str(os.getpid())})
+HTTP_REQUEST_SECONDS = METRICS.histogram(
+    "movie_ranker_http_request_duration_seconds", "API request latency by route", ("route", "method"))
+HTTP_REQUESTS = METRICS.counter(
+    "movie_ranker_http_requests_total", "API requests by route, method and status", ("route", "method", "status"))
+TMDB_REQUEST_SECONDS = METRICS.histogram(
+    "movie_ranker_tmdb_request_duration_seconds", "TMDb call latency by endpoint type", ("endpoint",))
+TMDB_REQUESTS = METRICS.counter(
+    "movie_ranker_tmdb_requests_total", "TMDb calls by endpoint type and HTTP status", ("endpoint", "status"))
+COMPARISONS = METRICS.counter("movie_ranker_comparisons_total", "Ranking choices recorded")
+COMPARISON_WINDOW = metrics.RateWindow(60)
+# Cache name -> callable returning {"hits", "misses", "size"}; read at scrape time
+CACHE_STATS: Dict[str, Callable[[], Dict[str, int]]] = {"movie_blob": serialization.blob_cache_stats}
+
+
+# Per-request instrumentation
+# Admin token gating opt-in profiling (X-Admin-Token header); profiling is disabled when unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_TOP_N = 25
+PROFILE_HISTORY = 50
+_profiles: "OrderedDict[str, Dict]" = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+class RequestStats:
+    """Upstream calls, cache hits and phase timings for one request (Server-Timing) or background
+    job. Threads working for the request record into it too, so updates take a lock."""
+    __slots__ = ("upstream_calls", "upstream_seconds", "cache_hits", "cache_misses", "timings", "_lock")
+
+    def __init__(self):
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record_upstream(self, seconds: float):
+        with self._lock:
+            self.upstream_calls += 1
+            self.upstream_seconds += seconds
+
+    def record_cache(self, hit: bool, count: int = 1):
+        with self._lock:
+            if hit:
+                self.cache_hits += count
+            else:
+                self.cache_misses += count
+
+    def add_timing(self, name: str, seconds: float):
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def server_timing(self, total_seconds: float) -> str:
+        with self._lock:
+            parts = [
+                f'tmdb;dur={self.upstream_seconds * 1000:.1f};desc="{self.upstream_calls} calls"',
+                f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            ]
+            parts.extend(f"{name};dur={secs * 1000:.1f}" for name, secs in self.timings.items())
+        parts.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {"tmdb_calls": self.upstream_calls, "tmdb_ms": round(self.upstream_seconds * 1000, 1),
+                    "cache_hits": self.cache_hits, "cache_misses": self.cache_misses}
+
+
+# Stats of the request (or job) the current code works for. A ContextVar rather than flask.g, so
+# threads doing part of a request's work can be handed its stats on purpose (_carry_request_stats)
+_REQUEST_STATS: "contextvars.ContextVar[Optional[RequestStats]]" = contextvars.ContextVar("request_stats",
+                                                                                           default=None)
+
+
+def _request_stats() -> Optional[RequestStats]:
+    """Stats for the active request or job, or None (e.g. startup work)."""
+    return _REQUEST_STATS.get()
+
+
+def _carry_request_stats(fn: Callable) -> Callable:
+    """Wrap fn so that, run on another thread (e.g. a fetch pool), it records into the calling
+    request's stats."""
+    stats = _REQUEST_STATS.get()
+
+    def run(*args, **kwargs):
+        token = _REQUEST_STATS.set(stats)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _REQUEST_STATS.reset(token)
+    return run
+
+
+def _note_cache(hit: bool, count: int = 1):
+    stats = _request_stats()
+    if stats is not None:
+        stats.record_cache(hit, count)
+
+
+def _add_request_timing(name: str, seconds: float):
+    stats = _request_stats()
+    if stats is not None:
+        stats.add_timing(name, seconds)
+
+
+def _is_admin_request() -> bool:
+    supplied = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode())
+
+
+def _profile_requested() -> bool:
+    flag = request.headers.get("X-Profile") or request.args.get("profile")
+    return flag in ("1", "true") and _is_admin_request()
+
+
+def _store_profile(profiler) -> str:
+    """Keep the top functions (by self time) of a finished request profile; returns its id."""
+    import pstats
+
+    entries = []
+    for (filename, lineno, funcname), (_cc, ncalls, tottime, cumtime, _callers) in pstats.Stats(profiler).stats.items():
+        entries.append({
+            "function": f"{funcname} ({os.path.basename(filename)}:{lineno})",
+            "calls": ncalls,
+            "self_ms": round(tottime * 1000, 3),
+            "cumulative_ms": round(cumtime * 1000, 3)
+        })
+    entries.sort(key=lambda e: e["self_ms"], reverse=True)
+    profile_id = uuid.uuid4().hex[:12]
+    record = {
+        "id": profile_id,
+        "method": request.method,
+        "path": request.path,
+        "created_at": datetime.now().isoformat(),
+        "top_functions": entries[:PROFILE_TOP_N]
+    }
+    with _profiles_lock:
+        _profiles[profile_id] = record
+        while len(_profiles) > PROFILE_HISTORY:
+            _profiles.popitem(last=False)
+    return profile_id
+
+
+@app.before_request
+def start_request_instrumentation():
+    g.request_started = time.perf_counter()
+    g.request_stats = RequestStats()
+    _REQUEST_STATS.set(g.request_stats)
+    if _profile_requested():
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            g.profiler = profiler
+        except ValueError:
+            # Another profiler is already active on this thread
+            pass
+
+# Registered before the other after_request hooks so it runs last and includes their cost
+@app.after_request
+def finish_request_instrumentation(response):
+    started = g.get("request_started")
+    if started is None:
+        return response
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        response.headers["X-Profile-Id"] = _store_profile(profiler)
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    HTTP_REQUEST_SECONDS.observe(elapsed, route, request.method)
+    HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+    stats = g.get("request_stats")
+    if stats is not None:
+        response.headers["Server-Timing"] = stats.server_timing(elapsed)
+        response.headers.setdefault("Timing-Allow-Origin", "*")
+    return response
+
+@app.teardown_request
+def clear_request_stats(_exc):
+    # Server threads are reused: later work on this thread must not count towards this request
+    _REQUEST_STATS.set(None)
+
 @app.after_request
 def add_cors_headers(response):
     # Ensure CORS headers also exist on error responses (e.g., 4xx/5xx) so browsers don't mask them as CORS failures
     response.headers.setdefault("Access-Control-Allow-Origin", "*")
-    response.headers.setdefault("Access-Control-Allow-Headers", "Content-Type, Authorization")
+    response.headers.setdefault("Access-Control-Allow-Headers", "Content-Type, Authorization, If-None-Match, X-Admin-Token, X-Profile, Last-Event-ID")
     response.headers.setdefault("Access-Control-Allow-Methods", "GET, POST, PUT, PATCH, DELETE, OPTIONS")
+    # Let browser clients read the ETag (to send back as If-None-Match) and timing headers
+    response.headers.setdefault("Access-Control-Expose-Headers", "ETag, Server-Timing, X-Profile-Id")
     return response
 
 @app.route('/<path:dummy>', methods=['OPTIONS'])
@@ -28,8 +251,108 @@ def cors_preflight(dummy):
     resp.status_code = 200
     return resp
 
+def json_response(payload):
+    """Drop-in for jsonify on movie-heavy routes: same bytes, but movie records are
+    spliced in from the serialization layer's pre-encoded blob cache."""
+    provider = app.json
+    if provider.compact is False or (provider.compact is None and app.debug):
+        # Pretty-printed debug output: defer to Flask
+        return jsonify(payload)
+    started = time.perf_counter()
+    blob_stats = {"hits": 0, "misses": 0}
+    body = serialization.dumps(payload, default=provider.default, stats=blob_stats) + b"\n"
+    _add_request_timing("serialize", time.perf_counter() - started)
+    _note_cache(True, blob_stats["hits"])
+    _note_cache(False, blob_stats["misses"])
+    return app.response_class(body, mimetype=provider.mimetype)
+
+# Response caching: content-hash ETags + negotiated compression
+# Responses smaller than this are sent uncompressed (not worth the CPU or header overhead)
+COMPRESS_MIN_BYTES = 1024
+# Bodies eligible for ETags and compression (JSON API responses, cached Letterboxd pages)
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/html")
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Compressed bodies of immutable responses (categories, finished results), keyed by (etag, encoding)
+COMPRESSED_CACHE_MAX_ENTRIES = 256
+_compressed_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_compressed_cache_lock = threading.Lock()
+_compressed_cache_stats = {"hits": 0, "misses": 0}
+CACHE_STATS["compressed_body"] = lambda: {**_compressed_cache_stats, "size": len(_compressed_cache)}
+
+
+def _compress_body(body: bytes, encoding: str) -> bytes:
+    """Compress a response body with the negotiated encoding ('br' or 'gzip')."""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0 keeps gzip output deterministic for identical bodies
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _get_compressed(body: bytes, etag: str, encoding: str, immutable: bool) -> bytes:
+    """Compress a body, reusing the cached result for immutable responses."""
+    if not immutable:
+        return _compress_body(body, encoding)
+    key = (etag, encoding)
+    with _compressed_cache_lock:
+        cached = _compressed_cache.get(key)
+        if cached is not None:
+            _compressed_cache.move_to_end(key)
+            _compressed_cache_stats["hits"] += 1
+            _note_cache(True)
+            return cached
+    _note_cache(False)
+    compressed = _compress_body(body, encoding)
+    with _compressed_cache_lock:
+        _compressed_cache_stats["misses"] += 1
+        _compressed_cache[key] = compressed
+        while len(_compressed_cache) > COMPRESSED_CACHE_MAX_ENTRIES:
+            _compressed_cache.popitem(last=False)
+    return compressed
+
+
+@app.after_request
+def apply_etag_and_compression(response):
+    """Add a content-hash ETag to JSON responses, answer matching If-None-Match with 304,
+    and compress the body with the best encoding the client accepts (br, then gzip)."""
+    if (request.method == "OPTIONS" or response.status_code != 200
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers):
+        return response
+
+    body = response.get_data()
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    # Weak ETag: the same JSON is served identity, gzip or br encoded
+    response.set_etag(etag, weak=True)
+    response.vary.add("Accept-Encoding")
+
+    # GET/HEAD polls revalidate with If-None-Match; /movies/load also honours it so clients
+    # re-posting the same load can skip downloading an unchanged movie list.
+    conditional = request.method in ("GET", "HEAD") or g.get("conditional_post", False)
+    if conditional and request.if_none_match.contains_weak(etag):
+        response.status_code = 304
+        response.set_data(b"")
+        response.headers.pop("Content-Type", None)
+        response.headers.pop("Content-Length", None)
+        return response
+
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    offered = ("br", "gzip") if brotli is not None else ("gzip",)
+    encoding = request.accept_encodings.best_match(offered)
+    if not encoding:
+        return response
+
+    started = time.perf_counter()
+    response.set_data(_get_compressed(body, etag, encoding, g.get("immutable_response", False)))
+    _add_request_timing("compress", time.perf_counter() - started)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
 # Configuration
-API_BASE = "https://api.themoviedb.org/3"
+# TMDB_API_BASE lets benchmarks and offline runs point at a local stand-in (benchmarks/tmdb_stub_server.py)
+API_BASE = os.getenv("TMDB_API_BASE", "https://api.themoviedb.org/3").rstrip("/")
 IMAGE_BASE = "https://image.tmdb.org/t/p/w500"
 
 # Curated Movie Categories
@@ -135,26 +458,297 @@ def load_api_key():
 
 API_KEY = load_api_key()
 
-# In-memory session storage (use Redis/database in production)
-sessions = {}
+
+# TMDb response cache (tmdb_cache.py), two tiers. Discover, collection, movie and search
+# responses back every category load, id load and enrich lookup.
+# Memory tier: restored at startup from a snapshot written periodically and at shutdown;
+# set CACHE_SNAPSHOT_PATH="" to disable the snapshot
+TMDB_CACHE = tmdb_cache.ResponseCache(int(os.getenv("TMDB_CACHE_MAX_MB", "64")) * 1024 * 1024)
+CACHE_STATS["tmdb_response"] = TMDB_CACHE.stats
+CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", "tmdb_cache.snapshot.gz")
+CACHE_SNAPSHOT_INTERVAL = int(os.getenv("CACHE_SNAPSHOT_INTERVAL", "600"))
+# Disk tier: SQLite file shared by all workers and kept across restarts and deploys; expired
+# entries are revalidated with If-None-Match/If-Modified-Since. TMDB_DISK_CACHE_PATH="" disables it
+TMDB_DISK_CACHE = tmdb_cache.open_disk_cache(
+    os.getenv("TMDB_DISK_CACHE_PATH", "tmdb_cache.db"),
+    int(os.getenv("TMDB_DISK_CACHE_MAX_MB", "512")) * 1024 * 1024)
+if TMDB_DISK_CACHE is not None:
+    CACHE_STATS["tmdb_disk"] = TMDB_DISK_CACHE.stats
+
+
+def _tmdb_get(endpoint: str, url: str, params: Dict, timeout: int = 10):
+    """GET a TMDb URL, recording call count, HTTP status and latency under the
+    endpoint type ('discover', 'collection', 'movie' or 'search'). Successful
+    responses are cached per endpoint type in memory and on disk; a fresh cache
+    hit makes no upstream call, and a stale disk entry is revalidated (a 304 is
+    answered from the cache)."""
+    key = tmdb_cache.cache_key(url, params)
+    cached = TMDB_CACHE.get(endpoint, key)
+    if cached is not None:
+        _note_cache(True)
+        return cached
+    stored = None
+    if TMDB_DISK_CACHE is not None:
+        try:
+            stored = TMDB_DISK_CACHE.get(endpoint, key)
+        except sqlite3.Error as e:
+            print(f"TMDb disk cache read failed: {e}")
+        if stored is not None and stored.fresh:
+            TMDB_CACHE.put(endpoint, key, stored.body, stored.expires_at)
+            _note_cache(True)
+            return tmdb_cache.CachedResponse(stored.body)
+
+    headers = {}
+    if stored is not None:
+        if stored.etag:
+            headers["If-None-Match"] = stored.etag
+        if stored.last_modified:
+            headers["If-Modified-Since"] = stored.last_modified
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = requests.get(url, params=params, headers=headers or None, timeout=timeout)
+        status = str(response.status_code)
+        if response.status_code == 304 and stored is not None:
+            _note_cache(True)
+            expires_at = _tmdb_disk_write(TMDB_DISK_CACHE.revalidated, endpoint, key,
+                                          response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            TMDB_CACHE.put(endpoint, key, stored.body, expires_at)
+            return tmdb_cache.CachedResponse(stored.body)
+        _note_cache(False)
+        if response.status_code == 200:
+            body = response.content
+            if TMDB_DISK_CACHE is not None:
+                body = _tmdb_disk_write(TMDB_DISK_CACHE.put, endpoint, key, body, response.headers.get("ETag"),
+                                        response.headers.get("Last-Modified")) or body
+            TMDB_CACHE.put(endpoint, key, body)
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        TMDB_REQUEST_SECONDS.observe(elapsed, endpoint)
+        TMDB_REQUESTS.inc(endpoint, status)
+        stats = _request_stats()
+        if stats is not None:
+            stats.record_upstream(elapsed)
+
+
+def _tmdb_disk_write(write: Callable, *args):
+    """Run a disk cache write; a failure (locked or full disk, bad body) only costs the caching."""
+    try:
+        return write(*args)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"TMDb disk cache write failed: {e}")
+        return None
+
+
+# TMDb Discover pages fetched per load (20 results each)
+DISCOVER_MAX_PAGES = 5
+
+# Optional local TMDb mirror (tmdb_catalog.py); None when no catalog file is present
+CATALOG = tmdb_catalog.open_catalog()
+_catalog_stats = {"hits": 0, "misses": 0}
+if CATALOG is not None:
+    CACHE_STATS["catalog"] = lambda: {**_catalog_stats, "size": 0}
+
+
+def _catalog_lookup(query: Callable):
+    """Run query(CATALOG) and count the hit/miss; returns None without a catalog or on a miss."""
+    if CATALOG is None:
+        return None
+    try:
+        result = query(CATALOG)
+    except Exception as e:
+        print(f"Catalog lookup failed: {e}")
+        result = None
+    hit = bool(result)
+    _catalog_stats["hits" if hit else "misses"] += 1
+    _note_cache(hit)
+    return result
+
+
+# Optional memory-mapped movie table (movie_table.py, built from the catalog mirror): every worker
+# maps the same read-only file, so its rows and title postings are held once per machine
+MOVIE_TABLE = movie_table.open_table()
+_movie_table_stats = {"hits": 0, "misses": 0}
+if MOVIE_TABLE is not None:
+    CACHE_STATS["movie_table"] = lambda: {**_movie_table_stats, "size": len(MOVIE_TABLE)}
+
+
+def _movie_table_row(movie_id: int) -> Optional[movie_table.MovieRow]:
+    """The table row for a movie id (counted as a hit/miss), or None without a table or on a miss."""
+    if MOVIE_TABLE is None:
+        return None
+    row = MOVIE_TABLE.get(movie_id)
+    _movie_table_stats["hits" if row is not None else "misses"] += 1
+    _note_cache(row is not None)
+    return row
+
+
+# In-process title index for enrich lookups: served from the movie table when there is one,
+# otherwise built from the catalog mirror in the background; extended with every TMDb search
+# result seen. With neither local store, a hit is shown from the indexed search result itself
+TITLE_INDEX = title_index.TitleIndex(MOVIE_TABLE, keep_display=CATALOG is None and MOVIE_TABLE is None)
+_title_index_stats = {"hits": 0, "misses": 0}
+CACHE_STATS["title_index"] = lambda: {**_title_index_stats, "size": len(TITLE_INDEX)}
+
+
+def _build_title_index():
+    started = time.perf_counter()
+    try:
+        count = TITLE_INDEX.add_many(CATALOG.iter_movies())
+    except Exception as e:
+        print(f"Title index build failed: {e}")
+        return
+    TITLE_INDEX.ready = True
+    print(f"Title index: {count} movies in {time.perf_counter() - started:.1f}s")
+
+
+_title_index_thread: Optional[threading.Thread] = None
+if CATALOG is not None and MOVIE_TABLE is None:
+    _title_index_thread = threading.Thread(target=_build_title_index, name="title-index", daemon=True)
+    _title_index_thread.start()
+
+
+def _title_index_lookup(title: str) -> Optional[Dict]:
+    """Best indexed match for a title, or None. Until the catalog-backed index is ready, only
+    exact normalized title matches are trusted (a partial index lacks the competing candidates)."""
+    started = time.perf_counter()
+    match = TITLE_INDEX.best_match(title) if len(TITLE_INDEX) else None
+    if match is not None and not TITLE_INDEX.ready:
+        if title_index.normalize_for_match(match[1]["title"]) != title_index.normalize_for_match(title):
+            match = None
+    _add_request_timing("match", time.perf_counter() - started)
+    _title_index_stats["hits" if match else "misses"] += 1
+    _note_cache(match is not None)
+    return match[1] if match else None
+
+class SessionRegistry:
+    """In-memory session storage (use Redis/database in production). Safe to share across threads.
+
+    Lookups return the session or None, so routes never check and then fetch in two steps.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, "MovieRankingSession"] = {}
+
+    def get(self, session_id: str) -> Optional["MovieRankingSession"]:
+        return self._sessions.get(session_id)
+
+    def add(self, session: "MovieRankingSession"):
+        with self._lock:
+            self._sessions[session.session_id] = session
+
+    def pop(self, session_id: str) -> Optional["MovieRankingSession"]:
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def values(self) -> List["MovieRankingSession"]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+sessions = SessionRegistry()
+
+
+def _cache_request_samples():
+    for name, stats in CACHE_STATS.items():
+        s = stats()
+        yield {"cache": name, "result": "hit"}, s["hits"]
+        yield {"cache": name, "result": "miss"}, s["misses"]
+
+
+def _cache_hit_ratio_samples():
+    for name, stats in CACHE_STATS.items():
+        s = stats()
+        lookups = s["hits"] + s["misses"]
+        yield {"cache": name}, (s["hits"] / lookups) if lookups else 0.0
+
+
+METRICS.gauge("movie_ranker_cache_requests_total", "Cache lookups by cache and result",
+              _cache_request_samples, kind="counter")
+METRICS.gauge("movie_ranker_cache_hit_ratio", "Cache hits / lookups since start", _cache_hit_ratio_samples)
+METRICS.gauge("movie_ranker_cache_entries", "Entries currently held per cache",
+              lambda: (({"cache": name}, stats()["size"]) for name, stats in CACHE_STATS.items()))
+METRICS.gauge("movie_ranker_sessions_live", "Sessions held in memory", lambda: [({}, len(sessions))])
+METRICS.gauge("movie_ranker_sessions_ranking", "Sessions with a ranking in progress",
+              lambda: [({}, sum(1 for s in sessions.values() if s.is_ranking))])
+METRICS.gauge("movie_ranker_comparisons_per_minute", "Ranking choices recorded over the last 60 seconds",
+              lambda: [({}, COMPARISON_WINDOW.total())])
+
+def _movie_key(movie: Dict):
+    return movie.get("id") or id(movie)
+
+
+class StaleComparisonError(Exception):
+    """A choice answered a comparison that is no longer the current one (e.g. a double click)."""
+
+
+# Server-Sent Events kept per session for Last-Event-ID replay
+SSE_HISTORY = 64
+
+# Concurrent TMDb fetches per id-list load (movies/set, set_bulk, quickstart)
+LOAD_FETCH_WORKERS = int(os.getenv("LOAD_FETCH_WORKERS", "8"))
+
+
+def _fetch_in_order(fetch: Callable, keys: List, job: Optional[jobs.Job] = None):
+    """Yield fetch(key) for each key in order, running up to LOAD_FETCH_WORKERS fetches at once.
+    A fetch that raises yields its exception instead. The fetches count towards the caller's
+    request stats. With a job, cancellation is checked before each result and stops the fetches
+    not yet started."""
+    @_carry_request_stats
+    def attempt(key):
+        try:
+            return fetch(key)
+        except Exception as e:
+            return e
+
+    if len(keys) <= 1:
+        for key in keys:
+            if job is not None:
+                job.check()
+            yield attempt(key)
+        return
+    pool = ThreadPoolExecutor(max_workers=min(LOAD_FETCH_WORKERS, len(keys)), thread_name_prefix="fetch")
+    try:
+        for result in pool.map(attempt, keys):
+            if job is not None:
+                job.check()
+            yield result
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
 
 class MovieRankingSession:
-    """Manages a single user's movie ranking session"""
+    """Manages a single user's movie ranking session
+
+    Routes hold `lock` while they read or change the session, so concurrent requests for one
+    session (threaded or gevent workers) apply one at a time. `version` increases every time a
+    new comparison is shown; choices may carry it so a repeated answer is rejected, not applied
+    to the next pair.
+    """
     
     def __init__(self, session_id: str):
         self.session_id = session_id
+        self.lock = threading.RLock()
+        self.version = 0
         self.movies: List[Dict] = []
         self.selected_movies: List[Dict] = []  # Movies selected by user (ones they've seen)
         self.ranked_movies: List[Dict] = []
         self.unseen_movies: List[Dict] = []
         self.is_ranking = False
-        self.merge_sort_state = {
-            "sorted_sublists": [],
-            "current_merge": None,
-            "merge_stack": []
-        }
+        self.ranking_movies: List[Dict] = []  # movies being ranked; the engine refers to them by position
+        self.engine: Optional[ranking_engine.MergeRanker] = None
         self.current_comparison: Optional[Dict] = None
         self.created_at = datetime.now()
+        # Created by the first event stream; until then nothing is listening, so nothing is recorded
+        self.events: Optional[event_stream.EventLog] = None
     
     # Letterboxd integration removed; keeping backend focused on TMDb categories/years only.
     
@@ -169,6 +763,14 @@ class MovieRankingSession:
             # Load from category
             all_movies = self._load_movies_from_category(category, max_movies)
         elif year:
+            # Local catalog mirror first; TMDb only when it has nothing for this year
+            local = _catalog_lookup(lambda c: c.discover_year(int(year), min(max_movies, DISCOVER_MAX_PAGES * 20)))
+            if local:
+                all_movies = [self._format_movie(m) for m in local]
+                self.movies = all_movies[:max_movies]
+                self.selected_movies = []
+                return len(self.movies)
+
             # Load from year (original functionality)
             url = f"{API_BASE}/discover/movie"
             params = {
@@ -179,9 +781,9 @@ class MovieRankingSession:
             }
             
             page = 1
-            while len(all_movies) < max_movies and page <= 5:
+            while len(all_movies) < max_movies and page <= DISCOVER_MAX_PAGES:
                 params["page"] = page
-                response = requests.get(url, params=params, timeout=10)
+                response = _tmdb_get("discover", url, params)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -289,10 +891,31 @@ class MovieRankingSession:
         out.sort(key=lambda m: m.get("release_date", "") or "9999-12-31")
         return out
     
+    def _discover_pages(self, params: Dict):
+        """Yield TMDb Discover result lists page by page (up to DISCOVER_MAX_PAGES).
+        Callers stop iterating once they have enough movies, so no extra pages are fetched."""
+        url = f"{API_BASE}/discover/movie"
+        page = 1
+        while page <= DISCOVER_MAX_PAGES:
+            params["page"] = page
+            response = _tmdb_get("discover", url, params)
+            response.raise_for_status()
+            data = response.json()
+            
+            results = data.get("results", [])
+            if not results:
+                return
+            yield results
+            
+            # Check if there are more pages
+            total_pages = data.get("total_pages", 1)
+            if page >= total_pages:
+                return
+            page += 1
+    
     def _load_from_keyword(self, keyword_id: int, max_movies: int = 100, company_id: int = None):
         """Load movies from TMDb using keyword with proper filters for theatrical releases only"""
         try:
-            url = f"{API_BASE}/discover/movie"
             params = {
                 "api_key": API_KEY,
                 "with_keywords": keyword_id,
@@ -312,19 +935,11 @@ class MovieRankingSession:
                 params["with_companies"] = company_id
             
             all_movies = []
-            page = 1
+            # The local catalog mirror answers in a single "page"; otherwise page through TMDb Discover
+            local = _catalog_lookup(lambda c: c.discover_keyword(keyword_id, company_id))
+            pages = [local] if local else self._discover_pages(params)
             
-            # TMDb Discover can return multiple pages
-            while len(all_movies) < max_movies and page <= 5:
-                params["page"] = page
-                response = requests.get(url, params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
-                results = data.get("results", [])
-                if not results:
-                    break
-                
+            for results in pages:
                 for movie in results:
                     # Basic validation - API filters should handle most filtering
                     if not movie.get("title") or not movie.get("release_date"):
@@ -359,11 +974,8 @@ class MovieRankingSession:
                         if len(all_movies) >= max_movies:
                             break
                 
-                # Check if there are more pages
-                total_pages = data.get("total_pages", 1)
-                if page >= total_pages:
+                if len(all_movies) >= max_movies:
                     break
-                page += 1
             
             # Sort movies by release date (earliest first) - API already sorts, but ensure consistency
             all_movies.sort(key=lambda m: m.get("release_date", "") or "9999-12-31")
@@ -377,7 +989,6 @@ class MovieRankingSession:
     def _load_from_company(self, company_id: int, max_movies: int = 100):
         """Load movies from TMDb using company filter (e.g., Pixar Animation Studios)"""
         try:
-            url = f"{API_BASE}/discover/movie"
             params = {
                 "api_key": API_KEY,
                 "with_companies": company_id,
@@ -391,19 +1002,11 @@ class MovieRankingSession:
             }
             
             all_movies = []
-            page = 1
+            # The local catalog mirror answers in a single "page"; otherwise page through TMDb Discover
+            local = _catalog_lookup(lambda c: c.discover_company(company_id))
+            pages = [local] if local else self._discover_pages(params)
             
-            # TMDb Discover can return multiple pages
-            while len(all_movies) < max_movies and page <= 5:
-                params["page"] = page
-                response = requests.get(url, params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
-                results = data.get("results", [])
-                if not results:
-                    break
-                
+            for results in pages:
                 for movie in results:
                     # Basic validation
                     if not movie.get("title") or not movie.get("release_date"):
@@ -426,11 +1029,8 @@ class MovieRankingSession:
                         if len(all_movies) >= max_movies:
                             break
                 
-                # Check if there are more pages
-                total_pages = data.get("total_pages", 1)
-                if page >= total_pages:
+                if len(all_movies) >= max_movies:
                     break
-                page += 1
             
             # Sort movies by release date (earliest first)
             all_movies.sort(key=lambda m: m.get("release_date", "") or "9999-12-31")
@@ -444,15 +1044,17 @@ class MovieRankingSession:
     def _load_from_collection(self, collection_id: int, max_movies: int = 100):
         """Load movies from a TMDb collection"""
         try:
-            url = f"{API_BASE}/collection/{collection_id}"
-            params = {"api_key": API_KEY}
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            parts = _catalog_lookup(lambda c: c.collection_parts(collection_id))
+            if parts is None:
+                url = f"{API_BASE}/collection/{collection_id}"
+                params = {"api_key": API_KEY}
+                response = _tmdb_get("collection", url, params)
+                response.raise_for_status()
+                data = response.json()
+                # Get all parts from the collection (TMDb collections can have many movies)
+                parts = data.get("parts", [])
             
             movies = []
-            # Get all parts from the collection (TMDb collections can have many movies)
-            parts = data.get("parts", [])
             print(f"Collection {collection_id} has {len(parts)} total parts")
             
             # Filter and load movies (still prefer movies with posters, but include all if needed)
@@ -498,22 +1100,21 @@ class MovieRankingSession:
             print(f"Error loading from collection {collection_id}: {e}")
             return []
     
-    def _load_movies_by_ids(self, movie_ids: List[int]):
-        """Load movies by their TMDb IDs"""
+    def _load_movies_by_ids(self, movie_ids: List[int], job: Optional[jobs.Job] = None):
+        """Load movies by their TMDb IDs (fetched concurrently); a background job gets progress
+        and partial results"""
         movies = []
-        for movie_id in movie_ids:
-            try:
-                url = f"{API_BASE}/movie/{movie_id}"
-                params = {"api_key": API_KEY}
-                response = requests.get(url, params=params, timeout=10)
-                response.raise_for_status()
-                movie = response.json()
-                
-                if movie.get("poster_path") and movie.get("title"):
-                    movies.append(self._format_movie(movie))
-            except Exception as e:
-                print(f"Error loading movie {movie_id}: {e}")
-                continue
+        fetched = _fetch_in_order(self._fetch_movie, movie_ids, job)
+        for done, (movie_id, movie) in enumerate(zip(movie_ids, fetched), 1):
+            if isinstance(movie, Exception):
+                print(f"Error loading movie {movie_id}: {movie}")
+            elif movie.get("poster_path") and movie.get("title"):
+                movies.append(self._format_movie(movie))
+                if job is not None:
+                    job.progress(done, len(movie_ids), movies[-1:])
+                    continue
+            if job is not None:
+                job.progress(done, len(movie_ids))
         
         # Sort movies by release date (earliest first)
         movies.sort(key=lambda m: m.get("release_date", "") or "9999-12-31")
@@ -549,7 +1150,7 @@ class MovieRankingSession:
                 }
                 if year_param:
                     params["year"] = year_param
-                resp = requests.get(url, params=params, timeout=10)
+                resp = _tmdb_get("search", url, params)
                 resp.raise_for_status()
                 data_local = resp.json()
                 res = data_local.get("results", [])
@@ -599,15 +1200,31 @@ class MovieRankingSession:
             print(f"Error searching for movie '{title}' ({year}): {e}")
             return None
     
+    def _fetch_movie(self, movie_id: int) -> Dict:
+        """Raw TMDb movie record: mapped movie table, then the local catalog mirror, then TMDb
+        (written back to the mirror). Raises on upstream errors."""
+        row = _movie_table_row(movie_id)
+        if row is not None:
+            return row.to_tmdb()
+        movie = _catalog_lookup(lambda c: c.get_movie(movie_id))
+        if movie:
+            return movie
+        url = f"{API_BASE}/movie/{movie_id}"
+        params = {"api_key": API_KEY}
+        response = _tmdb_get("movie", url, params)
+        response.raise_for_status()
+        movie = response.json()
+        if CATALOG is not None:
+            try:
+                CATALOG.upsert_details(movie)
+            except Exception as e:
+                print(f"Could not store movie {movie_id} in catalog: {e}")
+        return movie
+    
     def _get_movie_details(self, movie_id: int) -> Optional[Dict]:
         """Get full movie details from TMDb"""
         try:
-            url = f"{API_BASE}/movie/{movie_id}"
-            params = {"api_key": API_KEY}
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            movie = response.json()
-            return self._format_movie(movie)
+            return self._format_movie(self._fetch_movie(movie_id))
         except Exception as e:
             print(f"Error getting movie details for ID {movie_id}: {e}")
             return None
@@ -616,106 +1233,79 @@ class MovieRankingSession:
 
     def _normalize_for_match(self, s: str) -> str:
         """Normalize titles for fuzzy match: lowercase, strip punctuation, normalize symbols."""
-        if not s:
-            return ""
-        s = s.lower()
-        # Common symbol normalizations
-        s = s.replace("²", " 2").replace("*", "").replace("–", "-").replace("—", "-")
-        # Remove non-alnum except spaces and hyphens
-        s = re.sub(r"[^a-z0-9\s\-]", " ", s)
-        # Collapse whitespace
-        s = re.sub(r"\s+", " ", s).strip()
-        return s
+        return title_index.normalize_for_match(s)
 
     def _word_overlap_score(self, a: str, b: str) -> float:
         """Simple word-overlap score between normalized strings (0..1)."""
-        wa = set(a.split())
-        wb = set(b.split())
-        if not wa or not wb:
-            return 0.0
-        inter = len(wa & wb)
-        union = len(wa | wb)
-        return inter / union if union else 0.0
+        return title_index.word_overlap_score(a, b)
 
-    def _search_best_match_simple(self, title: str) -> Optional[Dict]:
-        """Search TMDb by title and select best match by fuzzy similarity + quality signals."""
-        try:
-            norm_q = self._normalize_for_match(title)
-            short_query = len(norm_q) <= 3
-
-            def do_page(page: int) -> list:
-                url = f"{API_BASE}/search/movie"
-                params = {
-                    "api_key": API_KEY,
-                    "query": title,
-                    "include_adult": False,
-                    "language": "en-US",
-                    "page": page
-                }
-                resp = requests.get(url, params=params, timeout=10)
-                resp.raise_for_status()
-                data_local = resp.json()
-                return data_local.get("results", []) or []
+    def _search_candidates(self, title: str) -> List[Dict]:
+        """TMDb search results (pages 1-2) for a raw title; also fed to the local title index."""
+        def do_page(page: int) -> list:
+            url = f"{API_BASE}/search/movie"
+            params = {
+                "api_key": API_KEY,
+                "query": title,
+                "include_adult": False,
+                "language": "en-US",
+                "page": page
+            }
+            resp = _tmdb_get("search", url, params)
+            resp.raise_for_status()
+            data_local = resp.json()
+            return data_local.get("results", []) or []
 
-            all_results = []
-            for p in (1, 2):
-                try:
-                    all_results.extend(do_page(p))
-                except Exception:
-                    continue
+        all_results = []
+        for p in (1, 2):
+            try:
+                all_results.extend(do_page(p))
+            except Exception:
+                continue
+        TITLE_INDEX.add_many(all_results)
+        return all_results
+
+    def _search_best_matches(self, titles: List[str]) -> List[Optional[Dict]]:
+        """Best match per title: local title index first, then TMDb search results scored in one batch
+        by fuzzy similarity + quality signals."""
+        matches: List[Optional[Dict]] = [None] * len(titles)
+        pending = []
+        for i, title in enumerate(titles):
+            local = _title_index_lookup(title)
+            if local is None:
+                movie = None
+            elif TITLE_INDEX.keep_display:
+                # No catalog or movie table to read details from: fetching them would leave the process
+                movie = self._format_movie(local)
+            else:
+                movie = self._get_movie_details(local["id"])
+            if movie:
+                matches[i] = movie
+            else:
+                pending.append(i)
+        if not pending:
+            return matches
 
-            if not all_results:
-                return None
-
-            best = None
-            best_score = -1.0
-            for r in all_results:
-                cand_title = r.get("title") or r.get("original_title") or ""
-                norm_c = self._normalize_for_match(cand_title)
-
-                # Exact normalized match gets very high score
-                score = 0.0
-                if norm_c == norm_q and norm_c:
-                    score += 1.0
-                else:
-                    # Word overlap
-                    score += 0.6 * self._word_overlap_score(norm_q, norm_c)
-                    # Startswith bonus for short queries like "F1"
-                    if short_query and norm_c.startswith(norm_q):
-                        score += 0.3
-                    # Substring bonus
-                    if not short_query and norm_q and norm_q in norm_c:
-                        score += 0.15
-
-                # Quality signals
-                vote_count = r.get("vote_count") or 0
-                vote_avg = r.get("vote_average") or 0.0
-                popularity = r.get("popularity") or 0.0
-                score += min(vote_count / 5000.0, 0.2)  # up to +0.2
-                score += min(vote_avg / 50.0, 0.1)      # up to +0.1
-                score += min(popularity / 500.0, 0.1)   # up to +0.1
-
-                # Year recency slight bias (avoid random 1960s matches unless exact)
-                rd = r.get("release_date") or ""
-                try:
-                    y = int(rd[:4]) if len(rd) >= 4 else None
-                except ValueError:
-                    y = None
-                if y is not None and y < 1980 and norm_c != norm_q:
-                    score -= 0.15
-
-                if score > best_score:
-                    best_score = score
-                    best = r
-
-            # Thresholds: for ultra-short queries require stronger evidence
-            min_required = 0.55 if short_query else 0.35
-            if best is None or best_score < min_required:
-                return None
-            return self._format_movie(best)
+        try:
+            # Searched sequentially (rate-limit friendly) once per distinct title, matched together
+            searched: Dict[str, List[Dict]] = {}
+            for i in pending:
+                if titles[i] not in searched:
+                    searched[titles[i]] = self._search_candidates(titles[i])
+            results = [searched[titles[i]] for i in pending]
+            match_started = time.perf_counter()
+            best = batch_matcher.BatchMatcher().match([titles[i] for i in pending], results)
+            _add_request_timing("match", time.perf_counter() - match_started)
         except Exception as e:
-            print(f"Simple search error for '{title}': {e}")
-            return None
+            print(f"Batch search error for {len(pending)} titles: {e}")
+            return matches
+        for i, movie in zip(pending, best):
+            if movie:
+                matches[i] = self._format_movie(movie)
+        return matches
+
+    def _search_best_match_simple(self, title: str) -> Optional[Dict]:
+        """Search TMDb by title and select best match by fuzzy similarity + quality signals."""
+        return self._search_best_matches([title])[0]
     
     def import_letterboxd_url(self, letterboxd_url: str) -> int:
         """Deprecated. Letterboxd import removed from backend; use client-side parser."""
@@ -749,175 +1339,100 @@ class MovieRankingSession:
         self.is_ranking = True
         self.ranked_movies = []
         self.unseen_movies = []
-        
-        # Filter out unseen movies (for skip functionality during ranking)
-        movies_to_rank = [m for m in movies_to_rank if m not in self.unseen_movies]
-        
-        # Initialize merge sort state
-        self.merge_sort_state = {
-            "sorted_sublists": [[m] for m in movies_to_rank],
-            "current_merge": None,
-            "merge_stack": []
-        }
-        
-        # Build initial merge stack
-        self._prepare_merge_round()
+        self.current_comparison = None
+        self.ranking_movies = list(movies_to_rank)
+        self.engine = ranking_engine.MergeRanker(len(self.ranking_movies))
         
         # Start first comparison
         self.next_comparison()
     
-    def _prepare_merge_round(self):
-        """Prepare the next round of merges"""
-        sublists = self.merge_sort_state["sorted_sublists"]
-        
-        if len(sublists) <= 1:
-            if sublists:
-                self.ranked_movies = sublists[0]
-            return
-        
-        new_sublists = []
-        i = 0
-        while i < len(sublists):
-            if i + 1 < len(sublists):
-                # Pair up two sublists
-                self.merge_sort_state["merge_stack"].append({
-                    "left": sublists[i],
-                    "right": sublists[i + 1],
-                    "left_idx": 0,
-                    "right_idx": 0,
-                    "result": []
-                })
-                i += 2
-            else:
-                # Odd one out, add to next round
-                new_sublists.append(sublists[i])
-                i += 1
-        
-        self.merge_sort_state["sorted_sublists"] = new_sublists
-    
     def next_comparison(self):
         """Get the next comparison to make"""
         if not self.is_ranking:
             return None
-        
-        # Check if we have an active merge
-        if self.merge_sort_state["current_merge"]:
-            merge = self.merge_sort_state["current_merge"]
-            left_list = merge["left"]
-            right_list = merge["right"]
-            left_idx = merge["left_idx"]
-            right_idx = merge["right_idx"]
-            
-            # Check if merge is complete
-            if left_idx >= len(left_list) and right_idx >= len(right_list):
-                self.merge_sort_state["current_merge"] = None
-                return self.next_comparison()
-            elif left_idx >= len(left_list):
-                # Left exhausted, add remaining right (filter unseen)
-                remaining = [m for m in right_list[right_idx:] if m not in self.unseen_movies]
-                merge["result"].extend(remaining)
-                self._complete_current_merge()
-                return self.next_comparison()
-            elif right_idx >= len(right_list):
-                # Right exhausted, add remaining left (filter unseen)
-                remaining = [m for m in left_list[left_idx:] if m not in self.unseen_movies]
-                merge["result"].extend(remaining)
-                self._complete_current_merge()
-                return self.next_comparison()
-            else:
-                # Need to compare - skip if movies are already unseen
-                left_movie = left_list[left_idx]
-                right_movie = right_list[right_idx]
-                
-                # Skip if either movie is already marked as unseen
-                if left_movie in self.unseen_movies:
-                    merge["left_idx"] += 1
-                    return self.next_comparison()
-                if right_movie in self.unseen_movies:
-                    merge["right_idx"] += 1
-                    return self.next_comparison()
-                
-                self.current_comparison = {
-                    "left_movie": left_movie,
-                    "right_movie": right_movie,
-                    "merge": merge
-                }
-                return {
-                    "left_movie": left_movie,
-                    "right_movie": right_movie
-                }
-        
-        # No active merge, get next from stack
-        if self.merge_sort_state["merge_stack"]:
-            merge = self.merge_sort_state["merge_stack"].pop(0)
-            self.merge_sort_state["current_merge"] = merge
-            return self.next_comparison()
-        else:
-            # Current round done, prepare next round
-            if len(self.merge_sort_state["sorted_sublists"]) > 1:
-                self._prepare_merge_round()
-                return self.next_comparison()
-            else:
-                # All done!
-                if self.merge_sort_state["sorted_sublists"]:
-                    self.ranked_movies = self.merge_sort_state["sorted_sublists"][0]
-                self.finish_ranking()
-                return None
+        return self._show_pair(self.engine.next_pair())
     
-    def _complete_current_merge(self):
-        """Complete the current merge and add result to sorted_sublists"""
-        merge = self.merge_sort_state["current_merge"]
-        self.merge_sort_state["sorted_sublists"].append(merge["result"])
-        self.merge_sort_state["current_merge"] = None
+    def _show_pair(self, pair):
+        """Make an engine pair the current comparison, or finish when there is none"""
+        if pair is None:
+            self.finish_ranking()
+            return None
+        left_movie = self.ranking_movies[pair[0]]
+        right_movie = self.ranking_movies[pair[1]]
+        changed = not self.current_comparison or self.current_comparison["pair"] != pair
+        if changed:
+            self.version += 1
+        self.current_comparison = {
+            "left_movie": left_movie,
+            "right_movie": right_movie,
+            "pair": pair
+        }
+        if changed:
+            self.publish_state()
+        return self.comparison_payload()
+    
+    def event_log(self) -> event_stream.EventLog:
+        """The session's event log, created on first use (by an event stream)"""
+        with self.lock:
+            if self.events is None:
+                self.events = event_stream.EventLog(SSE_HISTORY)
+            return self.events
+
+    def publish(self, event: str, data: Dict):
+        """Record an event for the session's streams, if any were ever opened"""
+        if self.events is not None:
+            self.events.publish(event, data)
+
+    def publish_state(self):
+        """Push the status, and the comparison if there is one, to the session's event streams"""
+        if self.events is None:
+            return
+        self.events.publish("status", self.get_status())
+        if self.current_comparison:
+            self.events.publish("comparison", self.comparison_payload())
+
+    def comparison_payload(self) -> Dict:
+        """The current comparison as returned to clients"""
+        return {
+            "left_movie": self.current_comparison["left_movie"],
+            "right_movie": self.current_comparison["right_movie"],
+            "version": self.version
+        }
     
-    def make_choice(self, choice: str):
-        """Handle user's choice: 'left', 'right', or 'skip'"""
+    def make_choice(self, choice: str, version: Optional[int] = None):
+        """Handle user's choice: 'left', 'right', or 'skip'
+        
+        When version is given it must match the current comparison's version.
+        """
         if not self.current_comparison:
             raise ValueError("No active comparison")
+        if version is not None and version != self.version:
+            raise StaleComparisonError(f"Stale comparison: version {version} was answered already (current is {self.version})")
         
-        left_movie = self.current_comparison["left_movie"]
-        right_movie = self.current_comparison["right_movie"]
-        merge = self.current_comparison["merge"]
-        
+        pair = self.engine.answer(choice)
         if choice == "skip":
             # User hasn't seen one or both movies
-            if left_movie not in self.unseen_movies:
-                self.unseen_movies.append(left_movie)
-            if right_movie not in self.unseen_movies:
-                self.unseen_movies.append(right_movie)
-            
-            merge["left_idx"] += 1
-            merge["right_idx"] += 1
-            
-        elif choice == "left":
-            # Prefer left movie
-            if left_movie not in self.unseen_movies:
-                merge["result"].append(left_movie)
-            merge["left_idx"] += 1
-            
-        elif choice == "right":
-            # Prefer right movie
-            if right_movie not in self.unseen_movies:
-                merge["result"].append(right_movie)
-            merge["right_idx"] += 1
-        else:
-            raise ValueError(f"Invalid choice: {choice}. Must be 'left', 'right', or 'skip'")
+            self.unseen_movies.append(self.current_comparison["left_movie"])
+            self.unseen_movies.append(self.current_comparison["right_movie"])
+        COMPARISONS.inc()
+        COMPARISON_WINDOW.add()
         
         # Get next comparison
-        return self.next_comparison()
+        return self._show_pair(pair)
     
     def finish_ranking(self):
         """Finish the ranking process"""
         self.is_ranking = False
         self.current_comparison = None
         
-        # Filter out unseen movies from final ranking
-        self.ranked_movies = [m for m in self.ranked_movies if m not in self.unseen_movies]
+        # The engine's order already excludes unseen movies
+        self.ranked_movies = [self.ranking_movies[i] for i in self.engine.ranked]
         
         # Ensure all seen movies are in ranked list
-        for movie in self.movies:
-            if movie not in self.ranked_movies and movie not in self.unseen_movies:
-                self.ranked_movies.append(movie)
+        placed = {_movie_key(m) for m in self.ranked_movies}
+        placed.update(_movie_key(m) for m in self.unseen_movies)
+        self.ranked_movies.extend(m for m in self.movies if _movie_key(m) not in placed)
+        self.publish_state()
     
     def get_status(self):
         """Get current ranking status"""
@@ -952,8 +1467,10 @@ def root():
         "description": "REST API for ranking movies using merge sort algorithm",
             "endpoints": {
                 "health": "/api/health",
+                "metrics": "/metrics",
                 "categories": "/api/categories",
                 "create_session": "/api/session/create",
+                "quickstart": "/api/session/quickstart",
                 "load_movies": "/api/session/<session_id>/movies/load",
                 "select_movies": "/api/session/<session_id>/movies/select",
                 "start_ranking": "/api/session/<session_id>/ranking/start",
@@ -961,6 +1478,7 @@ def root():
                 "make_choice": "/api/session/<session_id>/ranking/choice",
                 "get_status": "/api/session/<session_id>/ranking/status",
                 "get_results": "/api/session/<session_id>/ranking/results",
+                "events": "/api/session/<session_id>/events",
                 "delete_session": "/api/session/<session_id>"
             },
         "documentation": "See README_API.md for detailed API documentation",
@@ -976,11 +1494,136 @@ def health_check():
     }), 200
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint (text exposition format)"""
+    return app.response_class(METRICS.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """List stored request profiles (admin only)"""
+    if not _is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    with _profiles_lock:
+        summaries = [
+            {k: p[k] for k in ("id", "method", "path", "created_at")} for p in reversed(_profiles.values())
+        ]
+    return jsonify({"profiles": summaries}), 200
+
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id: str):
+    """Get the top hot functions of a stored request profile (admin only)"""
+    if not _is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    profile = _profiles.get(profile_id)
+    if not profile:
+        return jsonify({"error": "Profile not found"}), 404
+    return jsonify(profile), 200
+
+
+def _with_session(view):
+    """Look up the route's session (404 if missing) and run the view holding its lock."""
+    @functools.wraps(view)
+    def wrapper(session_id: str, **kwargs):
+        session = sessions.get(session_id)
+        if session is None:
+            return jsonify({"error": "Session not found"}), 404
+        with session.lock:
+            return view(session, **kwargs)
+    return wrapper
+
+
+# Background jobs (jobs.py): loads and imports posted with {"async": true} (or ?async=1) return 202
+# and a job id at once and run on a bounded pool, instead of holding a worker past its timeout
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "16"))
+# Background jobs may take longer lists than the 200 items a synchronous request is capped at
+JOB_MAX_ITEMS = int(os.getenv("JOB_MAX_ITEMS", "1000"))
+JOB_RETRY_AFTER_SECONDS = 5
+JOBS = jobs.JobRunner(JOB_WORKERS, JOB_QUEUE_MAX)
+METRICS.gauge("movie_ranker_jobs", "Background jobs by outcome since start, plus those queued or running",
+              lambda: (({"state": state}, count) for state, count in JOBS.counts().items()))
+
+
+def _wants_job(data: Dict) -> bool:
+    return bool(data.get("async")) or request.args.get("async") in ("1", "true")
+
+
+def _item_limit(data: Dict) -> int:
+    return JOB_MAX_ITEMS if _wants_job(data) else 200
+
+
+def _attach_movies(job: jobs.Job):
+    """Put a finished load's movies on its session, as the synchronous route would have."""
+    session = sessions.get(job.session_id)
+    if session is None:
+        return
+    with session.lock:
+        session.movies = job.result["movies"]
+        session.selected_movies = []
+        session.publish("status", session.get_status())
+
+
+def _measured(work: Callable[[jobs.Job], Dict]) -> Callable[[jobs.Job], Dict]:
+    """Run a job's work with its own RequestStats (a job outlives the request that queued it);
+    the totals end up in the job's `metrics`."""
+    def run(job: jobs.Job) -> Dict:
+        stats = RequestStats()
+        token = _REQUEST_STATS.set(stats)
+        try:
+            return work(job)
+        finally:
+            _REQUEST_STATS.reset(token)
+            job.metrics = stats.summary()
+    return run
+
+
+def _submit_job(kind: str, work: Callable[[jobs.Job], Dict], session: Optional["MovieRankingSession"] = None,
+                attach: bool = True):
+    """Queue work(job) -> result. With a session, progress is pushed to its event stream and (if
+    attach) result["movies"] replaces its movies when done. 503 with Retry-After when the job queue
+    is full."""
+    listener = None
+    if session is not None:
+        listener = lambda job: session.publish("job", job.to_dict(include_result=False))
+    work = _measured(work)
+    try:
+        job = JOBS.submit(kind, work, session.session_id if session is not None else None,
+                          on_done=_attach_movies if session is not None and attach else None, listener=listener)
+    except jobs.QueueFull as e:
+        response = jsonify({"error": f"Too many background jobs, retry later ({e})"})
+        response.headers["Retry-After"] = str(JOB_RETRY_AFTER_SECONDS)
+        return response, 503
+    return jsonify({**job.to_dict(), "status_url": f"/api/jobs/{job.id}"}), 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    """Job state and progress; ?partial_since=N adds the partial results from offset N on."""
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    since = request.args.get("partial_since", type=int)
+    return json_response(job.to_dict(partial_since=since)), 200
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id: str):
+    """Cancel a job: a queued one never runs, a running one stops after its current item.
+    A cancelled load leaves the session's movies unchanged."""
+    job = JOBS.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+
 @app.route('/api/session/create', methods=['POST'])
 def create_session():
     """Create a new ranking session"""
     session_id = str(uuid.uuid4())
-    sessions[session_id] = MovieRankingSession(session_id)
+    sessions.add(MovieRankingSession(session_id))
     
     return jsonify({
         "session_id": session_id,
@@ -988,6 +1631,119 @@ def create_session():
     }), 201
 
 
+@app.route('/api/session/quickstart', methods=['POST'])
+def quickstart_session():
+    """Create a session, load its movies (year/category like movies/load, tmdb_ids like movies/set
+    or items like movies/set_bulk), apply an optional selection and start ranking, all in one
+    request. Returns the new session id with the first comparison; the session is only kept if
+    ranking started."""
+    data = request.get_json() or {}
+    year = data.get('year')
+    category = data.get('category')
+    tmdb_ids = data.get('tmdb_ids')
+    items = data.get('items')
+    selected_ids = data.get('selected_ids')
+
+    if tmdb_ids is not None and (not isinstance(tmdb_ids, list) or not all(isinstance(i, int) for i in tmdb_ids)):
+        return jsonify({"error": "tmdb_ids must be a list of integers"}), 400
+    if items is not None and not isinstance(items, list):
+        return jsonify({"error": "items must be a list"}), 400
+    if tmdb_ids is None and items is None and not year and not category:
+        return jsonify({"error": "Must provide 'year', 'category', 'tmdb_ids' or 'items'"}), 400
+    if selected_ids is not None and not isinstance(selected_ids, list):
+        return jsonify({"error": "selected_ids must be a list"}), 400
+
+    session = MovieRankingSession(str(uuid.uuid4()))
+    try:
+        if tmdb_ids is not None:
+            session.movies = session._load_movies_by_ids(tmdb_ids[:200])
+        elif items is not None:
+            session.movies = _load_bulk_items(items[:200])
+        else:
+            session.load_movies(year=year, max_movies=data.get('max_movies', 100 if category else 50),
+                                category=category)
+        if selected_ids:
+            session.select_movies(selected_ids)
+        session.start_ranking()
+        comparison = session.next_comparison()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to start session: {str(e)}"}), 500
+    sessions.add(session)
+
+    payload = {
+        "session_id": session.session_id,
+        "loaded_count": len(session.movies),
+        "selected_count": len(session.selected_movies)
+    }
+    if comparison:
+        payload.update({"message": "Ranking started", "comparison": comparison, "status": session.get_status()})
+    else:
+        payload.update({"message": "Ranking complete (no comparisons needed)", "results": session.get_results()})
+    return json_response(payload), 201
+
+
+# Poster thumbnails: TMDb posters resized to the widths the comparison cards actually show
+POSTER_CACHE_DIR = os.getenv("POSTER_CACHE_DIR", "poster_cache")
+POSTER_CACHE_MAX_BYTES = int(os.getenv("POSTER_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+POSTER_MAX_AGE = 365 * 24 * 3600
+_POSTER_PATH_RE = re.compile(r"^/?[A-Za-z0-9_\-]+\.(jpg|jpeg|png)$")
+_posters = None
+_posters_lock = threading.Lock()
+_image_http = requests.Session()
+_image_http.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=16))
+
+
+def _poster_store() -> Optional[poster_cache.PosterCache]:
+    """Lazily created poster cache; None when Pillow is not installed."""
+    global _posters
+    if _posters is None and poster_cache.PIL_AVAILABLE:
+        with _posters_lock:
+            if _posters is None:
+                _posters = poster_cache.PosterCache(POSTER_CACHE_DIR, POSTER_CACHE_MAX_BYTES)
+                CACHE_STATS["poster"] = _posters.stats
+    return _posters
+
+
+def _fetch_poster_source(poster_path: str) -> bytes:
+    resp = _image_http.get(f"{IMAGE_BASE}/{poster_path.lstrip('/')}", timeout=20)
+    resp.raise_for_status()
+    return resp.content
+
+
+@app.route('/api/poster/<size>/<path:poster_path>', methods=['GET'])
+def get_poster(size: str, poster_path: str):
+    """Resized TMDb poster (w154/w342) as JPEG, or WebP when accepted or ?format=webp.
+    Variants are immutable and served from the disk cache with year-long cache headers."""
+    if size not in poster_cache.POSTER_WIDTHS:
+        return jsonify({"error": f"Unknown size; use one of {', '.join(poster_cache.POSTER_WIDTHS)}"}), 400
+    if not _POSTER_PATH_RE.match(poster_path):
+        return jsonify({"error": "Invalid poster path"}), 400
+    store = _poster_store()
+    if store is None:
+        # No Pillow: TMDb serves the same widths itself
+        return redirect(f"{IMAGE_BASE.rsplit('/', 1)[0]}/{size}/{poster_path.lstrip('/')}", code=302)
+
+    fmt = request.args.get("format")
+    if fmt not in poster_cache.FORMATS:
+        fmt = "webp" if request.accept_mimetypes["image/webp"] else "jpeg"
+    started = time.perf_counter()
+    try:
+        # Opened by the store under the poster's lock, so a concurrent eviction cannot remove it
+        # between lookup and send
+        f, mimetype, etag = store.open(poster_path.lstrip("/"), size, fmt, _fetch_poster_source)
+        _add_request_timing("poster", time.perf_counter() - started)
+        # send_file hands the open file to the server's wsgi.file_wrapper (sendfile where supported)
+        response = send_file(f, mimetype=mimetype, etag=etag, max_age=POSTER_MAX_AGE, conditional=True)
+    except requests.RequestException as e:
+        return jsonify({"error": f"Poster fetch failed: {str(e)}"}), 502
+    except Exception as e:
+        return jsonify({"error": f"Poster unavailable: {str(e)}"}), 500
+    response.headers["Cache-Control"] = f"public, max-age={POSTER_MAX_AGE}, immutable"
+    response.vary.add("Accept")
+    return response
+
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
     """Get list of available movie categories"""
@@ -998,17 +1754,17 @@ def get_categories():
             "description": cat_info["description"]
         }
     
+    # Categories never change at runtime, so their compressed body can be reused
+    g.immutable_response = True
     return jsonify({
         "categories": categories
     }), 200
 
 
 @app.route('/api/session/<session_id>/movies/load', methods=['POST'])
-def load_movies(session_id: str):
+@_with_session
+def load_movies(session: MovieRankingSession):
     """Load movies for a session by year or category"""
-    if session_id not in sessions:
-        return jsonify({"error": "Session not found"}), 404
-    
     data = request.get_json() or {}
     year = data.get('year')
     category = data.get('category')
@@ -1017,12 +1773,23 @@ def load_movies(session_id: str):
     
     if not year and not category:
         return jsonify({"error": "Must provide either 'year' or 'category'"}), 400
-    
+
+    if _wants_job(data):
+        def work(job: jobs.Job) -> Dict:
+            # Loaded into a scratch session; the result replaces the session's movies once done
+            scratch = MovieRankingSession(session.session_id)
+            count = scratch.load_movies(year=year, max_movies=max_movies, category=category)
+            job.progress(count, count, scratch.movies)
+            return {"message": f"Loaded {count} movies", "movie_count": count, "loaded_count": count,
+                    "movies": scratch.movies}
+        return _submit_job("load", work, session)
+
     try:
-        session = sessions[session_id]
         count = session.load_movies(year=year, max_movies=max_movies, category=category)
+        # Clients re-posting the same load may send If-None-Match to skip an unchanged payload
+        g.conditional_post = True
         
-        return jsonify({
+        return json_response({
             "message": f"Loaded {count} movies",
             "movie_count": count,
             "loaded_count": count,
@@ -1035,11 +1802,9 @@ def load_movies(session_id: str):
 
 
 @app.route('/api/session/<session_id>/movies/set', methods=['POST'])
-def set_movies(session_id: str):
+@_with_session
+def set_movies(session: MovieRankingSession):
     """Set the session's movies directly from a list of TMDb IDs (client-side imports)."""
-    if session_id not in sessions:
-        return jsonify({"error": "Session not found"}), 404
-
     data = request.get_json() or {}
     tmdb_ids = data.get('tmdb_ids', [])
     if not isinstance(tmdb_ids, list) or not all(isinstance(i, int) for i in tmdb_ids):
@@ -1048,15 +1813,20 @@ def set_movies(session_id: str):
     if len(tmdb_ids) == 0:
         return jsonify({"error": "tmdb_ids is empty"}), 400
 
-    if len(tmdb_ids) > 200:
-        tmdb_ids = tmdb_ids[:200]  # hard cap to avoid overload
+    tmdb_ids = tmdb_ids[:_item_limit(data)]  # hard cap to avoid overload
+
+    if _wants_job(data):
+        def work(job: jobs.Job) -> Dict:
+            movies = MovieRankingSession(session.session_id)._load_movies_by_ids(tmdb_ids, job)
+            return {"message": f"Loaded {len(movies)} movies from TMDb IDs", "loaded_count": len(movies),
+                    "movies": movies}
+        return _submit_job("set", work, session)
 
     try:
-        session = sessions[session_id]
         movies = session._load_movies_by_ids(tmdb_ids)
         session.movies = movies
         session.selected_movies = []  # reset any prior selection
-        return jsonify({
+        return json_response({
             "message": f"Loaded {len(movies)} movies from TMDb IDs",
             "loaded_count": len(movies),
             "movies": movies
@@ -1066,11 +1836,9 @@ def set_movies(session_id: str):
 
 
 @app.route('/api/session/<session_id>/movies/set_mixed', methods=['POST'])
-def set_movies_mixed(session_id: str):
+@_with_session
+def set_movies_mixed(session: MovieRankingSession):
     """Set session movies using TMDb IDs plus optional fallback items with custom poster/years when TMDb lacks entries."""
-    if session_id not in sessions:
-        return jsonify({"error": "Session not found"}), 404
-
     data = request.get_json() or {}
     tmdb_ids = data.get('tmdb_ids', [])
     fallbacks = data.get('fallbacks', [])
@@ -1084,7 +1852,6 @@ def set_movies_mixed(session_id: str):
     fallbacks = fallbacks[:200 - len(tmdb_ids)]
 
     try:
-        session = sessions[session_id]
         movies = session._load_movies_by_ids(tmdb_ids) if tmdb_ids else []
 
         # Create placeholder entries for fallbacks (negative IDs), keep order after tmdb movies
@@ -1111,7 +1878,7 @@ def set_movies_mixed(session_id: str):
 
         session.movies = movies
         session.selected_movies = []
-        return jsonify({
+        return json_response({
             "message": f"Loaded {len(movies)} movies (tmdb: {len(tmdb_ids)}, fallbacks: {len(movies) - len(session._load_movies_by_ids(tmdb_ids))})",
             "loaded_count": len(movies),
             "movies": movies
@@ -1121,61 +1888,78 @@ def set_movies_mixed(session_id: str):
 
 
 @app.route('/api/session/<session_id>/movies/set_bulk', methods=['POST'])
-def set_movies_bulk(session_id: str):
+@_with_session
+def set_movies_bulk(session: MovieRankingSession):
     """
     Set the session's movies in the exact parsed order.
     Body: { "items": [ { "id": <int optional>, "title": <str optional>, "year": <str|int|null>, "poster_url": <str|null> } ] }
     If 'id' is present and valid, fetch TMDb details; otherwise create a placeholder using provided title/year/poster_url.
     """
-    if session_id not in sessions:
-        return jsonify({"error": "Session not found"}), 404
-
     data = request.get_json() or {}
     items = data.get('items', [])
     if not isinstance(items, list):
         return jsonify({"error": "items must be a list"}), 400
 
-    if len(items) > 200:
-        items = items[:200]
+    items = items[:_item_limit(data)]
 
-    result = []
+    if _wants_job(data):
+        return _submit_job("set_bulk", lambda job: _bulk_result(_load_bulk_items(items, job)), session)
     try:
-        for it in items:
-            if not isinstance(it, dict):
-                continue
-            tmdb_id = it.get('id', None)
-            if isinstance(tmdb_id, int):
-                movie = sessions[session_id]._get_movie_details(tmdb_id)
-                if movie:
-                    result.append(movie)
-                    continue
-            title = str(it.get('fTitle') or it.get('title') or '').strip()
-            year = it.get('year')
-            poster_url = str(it.get('poster_url') or '').strip()
-            if not title:
-                continue
-            placeholder_id = -int(zlib.crc32(title.encode('utf-8')))
-            result.append({
-                "id": placeholder_id,
-                "title": title,
-                "poster_path": "",
-                "poster_url": poster_url,
-                "release_date": f"{year}-01-01" if year and str(year).isdigit() and len(str(year)) == 4 else "",
-                "vote_average": 0,
-                "overview": ""
-            })
-
-        session = sessions[session_id]
+        result = _load_bulk_items(items)
         session.movies = result
         session.selected_movies = []
-        return jsonify({
-            "message": f"Loaded {len(result)} movies in parsed order",
-            "loaded_count": len(result),
-            "movies": result
-        }), 200
+        return json_response(_bulk_result(result)), 200
     except Exception as e:
         return jsonify({"error": f"Failed to set movies (bulk): {str(e)}"}), 500
 
+
+def _load_bulk_items(items: List, job: Optional[jobs.Job] = None) -> List[Dict]:
+    """set_bulk items as movies, in order: TMDb details for valid ids (fetched concurrently),
+    placeholders otherwise."""
+    helper = MovieRankingSession("bulk")
+    result = []
+    fetched = _fetch_in_order(lambda it: _bulk_item_movie(helper, it) if isinstance(it, dict) else None, items, job)
+    for done, movie in enumerate(fetched, 1):
+        if isinstance(movie, Exception):
+            print(f"Error loading bulk item {done}: {movie}")
+            movie = None
+        if movie is not None:
+            result.append(movie)
+        if job is not None:
+            job.progress(done, len(items), [movie] if movie is not None else None)
+    return result
+
+
+def _bulk_item_movie(helper: "MovieRankingSession", it: Dict) -> Optional[Dict]:
+    tmdb_id = it.get('id', None)
+    if isinstance(tmdb_id, int):
+        movie = helper._get_movie_details(tmdb_id)
+        if movie:
+            return movie
+    title = str(it.get('fTitle') or it.get('title') or '').strip()
+    year = it.get('year')
+    poster_url = str(it.get('poster_url') or '').strip()
+    if not title:
+        return None
+    placeholder_id = -int(zlib.crc32(title.encode('utf-8')))
+    return {
+        "id": placeholder_id,
+        "title": title,
+        "poster_path": "",
+        "poster_url": poster_url,
+        "release_date": f"{year}-01-01" if year and str(year).isdigit() and len(str(year)) == 4 else "",
+        "vote_average": 0,
+        "overview": ""
+    }
+
+
+def _bulk_result(result: List[Dict]) -> Dict:
+    return {
+        "message": f"Loaded {len(result)} movies in parsed order",
+        "loaded_count": len(result),
+        "movies": result
+    }
+
 @app.route('/api/tmdb/enrich', methods=['POST'])
 def tmdb_enrich_titles():
     """Enrich titles via TMDb using the server's API key.
@@ -1194,81 +1978,347 @@ def tmdb_enrich_titles():
     else:
         return jsonify({"error": "Provide either {items:[{title,year}]} or {titles:[string]}" }), 400
 
-    # Cap to 200
-    items_in = items_in[:200]
-
-    # Enrich sequentially (rate-limit friendly)
-    out = []
-    for rec in items_in:
-        title = rec["title"]
-        year = rec["year"]
-        if not title:
-            out.append({"id": None, "title": "", "poster_url": None, "release_date": None, "matched": False, "requested_year": year, "year_match": False})
-            continue
-
-        # Prefer year-aware match, fall back to fuzzy without year
-        movie = None
-        if year:
-            movie = sessions[next(iter(sessions))]._search_movie_tmdb(title, int(year)) if sessions else MovieRankingSession("tmp")._search_movie_tmdb(title, int(year))
-        if not movie:
-            movie = sessions[next(iter(sessions))]._search_best_match_simple(title) if sessions else MovieRankingSession("tmp")._search_best_match_simple(title)
+    items_in = items_in[:_item_limit(data)]
+
+    if _wants_job(data):
+        # An optional session_id only routes progress events to that session's stream
+        session = sessions.get(str(data.get("session_id") or ""))
+        return _submit_job("enrich", lambda job: _enrich_result(_enrich_items(items_in, job)), session, attach=False)
+    return jsonify(_enrich_result(_enrich_items(items_in))), 200
+
+
+def _enrich_result(out: List[Dict]) -> Dict:
+    return {"items": out, "count": len(out)}
+
+
+def _enrich_items(items_in: List[Dict], job: Optional[jobs.Job] = None) -> List[Dict]:
+    """Ordered enrich entries for [{title, year}]. A background job gets progress and, as partial
+    results, each entry (with its "index") once its match is final."""
+    # Matching only uses the shared TMDb helpers, not session state
+    matcher = MovieRankingSession("tmp")
+
+    # Prefer year-aware match (sequential, rate-limit friendly)
+    movies: List[Optional[Dict]] = [None] * len(items_in)
+    resolved = 0
+    for i, rec in enumerate(items_in):
+        if job is not None:
+            job.check()
+        if rec["title"] and rec["year"]:
+            movies[i] = matcher._search_movie_tmdb(rec["title"], int(rec["year"]))
+        if job is not None and (movies[i] or not rec["title"]):
+            resolved += 1
+            job.progress(resolved, len(items_in), [{"index": i, **_enrich_entry(rec, movies[i])}])
+
+    # Fall back to fuzzy matching without year, for all remaining titles in one batch
+    fuzzy = [i for i, rec in enumerate(items_in) if rec["title"] and not movies[i]]
+    if job is not None:
+        job.check()
+    for i, movie in zip(fuzzy, matcher._search_best_matches([items_in[i]["title"] for i in fuzzy])):
+        movies[i] = movie
+
+    out = [_enrich_entry(rec, movie) for rec, movie in zip(items_in, movies)]
+    if job is not None:
+        job.progress(len(items_in), len(items_in), [{"index": i, **out[i]} for i in fuzzy])
+    return out
+
+
+def _enrich_entry(rec: Dict, movie: Optional[Dict]) -> Dict:
+    title = rec["title"]
+    year = rec["year"]
+    if not title:
+        return {"id": None, "title": "", "poster_url": None, "release_date": None, "matched": False, "requested_year": year, "year_match": False}
+
+    if movie:
+        rd = movie.get("release_date") or ""
+        y = rd[:4] if len(rd) >= 4 else None
+        return {
+            "id": movie.get("id"),
+            "title": movie.get("title"),
+            "poster_url": movie.get("poster_url") or (f"{IMAGE_BASE}{movie.get('poster_path', '')}" if movie.get('poster_path') else ""),
+            "release_date": movie.get("release_date") or None,
+            "matched": True,
+            "requested_year": year,
+            "year_match": (year is not None and y == year)
+        }
+    return {
+        "id": None,
+        "title": title,
+        "poster_url": None,
+        "release_date": None,
+        "matched": False,
+        "requested_year": year,
+        "year_match": False
+    }
+
+# Letterboxd proxy: pooled connections, URL-keyed HTML cache with conditional revalidation,
+# and a hard cap on page size
+LETTERBOXD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://letterboxd.com/'
+}
+LETTERBOXD_TIMEOUT = 20
+LETTERBOXD_MAX_BYTES = int(os.getenv("LETTERBOXD_MAX_BYTES", str(5 * 1024 * 1024)))
+# Cached pages are served without revalidation for this long, then revalidated with ETag/Last-Modified
+LETTERBOXD_CACHE_TTL = int(os.getenv("LETTERBOXD_CACHE_TTL", "300"))
+LETTERBOXD_CACHE_MAX_BYTES = 64 * 1024 * 1024
+LETTERBOXD_CHUNK_SIZE = 64 * 1024
+
+_letterboxd_http = requests.Session()
+_letterboxd_http.headers.update(LETTERBOXD_HEADERS)
+_letterboxd_http.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+class LetterboxdPage:
+    """A fetched Letterboxd page plus its validators; the JSON-wrapped form is encoded once, on demand."""
+    __slots__ = ("html", "encoding", "etag", "last_modified", "fetched_at", "_json_body")
+
+    def __init__(self, html: bytes, encoding: str, etag: Optional[str], last_modified: Optional[str]):
+        self.html = html
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.time()
+        self._json_body = None
+
+    def json_body(self) -> bytes:
+        if self._json_body is None:
+            text = self.html.decode(self.encoding, errors="replace")
+            self._json_body = app.json.dumps({"html": text}).encode("utf-8") + b"\n"
+        return self._json_body
+
+
+_letterboxd_cache: "OrderedDict[str, LetterboxdPage]" = OrderedDict()
+_letterboxd_cache_bytes = 0
+_letterboxd_cache_lock = threading.Lock()
+_letterboxd_stats = {"hits": 0, "misses": 0}
+CACHE_STATS["letterboxd_html"] = lambda: {**_letterboxd_stats, "size": len(_letterboxd_cache)}
+
+
+def _store_letterboxd_page(url: str, page: LetterboxdPage):
+    global _letterboxd_cache_bytes
+    with _letterboxd_cache_lock:
+        old = _letterboxd_cache.pop(url, None)
+        if old is not None:
+            _letterboxd_cache_bytes -= len(old.html)
+        _letterboxd_cache[url] = page
+        _letterboxd_cache_bytes += len(page.html)
+        while _letterboxd_cache_bytes > LETTERBOXD_CACHE_MAX_BYTES and len(_letterboxd_cache) > 1:
+            _, evicted = _letterboxd_cache.popitem(last=False)
+            _letterboxd_cache_bytes -= len(evicted.html)
+
+
+def _open_letterboxd(url: str):
+    """Return (cached page, None) when the cache can answer, fresh or revalidated with a 304,
+    else (None, streaming 200 response). Raises ValueError for upstream errors and oversized pages."""
+    with _letterboxd_cache_lock:
+        cached = _letterboxd_cache.get(url)
+        if cached is not None:
+            _letterboxd_cache.move_to_end(url)
+    if cached is not None and time.time() - cached.fetched_at < LETTERBOXD_CACHE_TTL:
+        _letterboxd_stats["hits"] += 1
+        _note_cache(True)
+        return cached, None
+
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    resp = _letterboxd_http.get(url, headers=headers, timeout=LETTERBOXD_TIMEOUT, allow_redirects=True, stream=True)
+    if resp.status_code == 304 and cached is not None:
+        resp.close()
+        cached.fetched_at = time.time()
+        _letterboxd_stats["hits"] += 1
+        _note_cache(True)
+        return cached, None
+
+    _letterboxd_stats["misses"] += 1
+    _note_cache(False)
+    if resp.status_code != 200:
+        resp.close()
+        raise ValueError(f"Upstream status {resp.status_code}")
+    declared = resp.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > LETTERBOXD_MAX_BYTES:
+        resp.close()
+        raise ValueError(f"Upstream page exceeds {LETTERBOXD_MAX_BYTES} bytes")
+    return None, resp
+
+
+def _read_letterboxd(url: str, resp, on_chunk: Optional[Callable[[bytes], None]] = None) -> LetterboxdPage:
+    """Read a streaming upstream response into the cache, enforcing the size cap.
+    on_chunk sees each chunk as it arrives (e.g. to feed an incremental parser)."""
+    chunks = []
+    size = 0
+    try:
+        for chunk in resp.iter_content(LETTERBOXD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > LETTERBOXD_MAX_BYTES:
+                raise ValueError(f"Upstream page exceeds {LETTERBOXD_MAX_BYTES} bytes")
+            chunks.append(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+    finally:
+        resp.close()
+    page = LetterboxdPage(b"".join(chunks), resp.encoding or "utf-8",
+                          resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+    _store_letterboxd_page(url, page)
+    return page
+
+
+def _stream_letterboxd(url: str, resp):
+    """Pass upstream chunks straight through, caching the page once it completed within the size cap.
+    A page that turns out oversized mid-stream is cut off and not cached."""
+    chunks = []
+    size = 0
+    try:
+        for chunk in resp.iter_content(LETTERBOXD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > LETTERBOXD_MAX_BYTES:
+                print(f"Letterboxd page {url} exceeded {LETTERBOXD_MAX_BYTES} bytes; truncated")
+                return
+            chunks.append(chunk)
+            yield chunk
+    finally:
+        resp.close()
+    page = LetterboxdPage(b"".join(chunks), resp.encoding or "utf-8",
+                          resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+    _store_letterboxd_page(url, page)
 
-        if movie:
-            rd = movie.get("release_date") or ""
-            y = rd[:4] if len(rd) >= 4 else None
-            out.append({
-                "id": movie.get("id"),
-                "title": movie.get("title"),
-                "poster_url": movie.get("poster_url") or (f"{IMAGE_BASE}{movie.get('poster_path', '')}" if movie.get('poster_path') else ""),
-                "release_date": movie.get("release_date") or None,
-                "matched": True,
-                "requested_year": year,
-                "year_match": (year is not None and y == year)
-            })
-        else:
-            out.append({
-                "id": None,
-                "title": title,
-                "poster_url": None,
-                "release_date": None,
-                "matched": False,
-                "requested_year": year,
-                "year_match": False
-            })
 
-    return jsonify({"items": out, "count": len(out)}), 200
+def _is_letterboxd_url(url: str) -> bool:
+    host = (urlparse(url).netloc or '').lower()
+    return host.endswith('letterboxd.com') or host.endswith('boxd.it')
+
 
 @app.route('/api/letterboxd/fetch', methods=['POST'])
 def proxy_fetch_letterboxd():
-    """Server-side fetch of a Letterboxd URL to bypass browser CORS. Returns raw HTML string."""
+    """Server-side fetch of a Letterboxd URL to bypass browser CORS. Returns {"html": ...}, or the page
+    itself as text/html when called with {"raw": true} (or ?raw=1)."""
     data = request.get_json() or {}
     url = (data.get('url') or '').strip()
     if not url:
         return jsonify({"error": "Missing 'url'"}), 400
+    raw = bool(data.get('raw')) or request.args.get('raw') == '1'
     try:
-        parsed = urlparse(url)
-        host = (parsed.netloc or '').lower()
-        if not (host.endswith('letterboxd.com') or host.endswith('boxd.it')):
+        if not _is_letterboxd_url(url):
             return jsonify({"error": "Only letterboxd.com or boxd.it URLs are allowed"}), 400
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://letterboxd.com/'
-        }
-        resp = requests.get(url, headers=headers, timeout=20, allow_redirects=True)
-        if resp.status_code != 200:
-            return jsonify({"error": f"Upstream status {resp.status_code}"}), 502
-        return jsonify({"html": resp.text}), 200
+        page, resp = _open_letterboxd(url)
+        if not raw:
+            if page is None:
+                page = _read_letterboxd(url, resp)
+            return app.response_class(page.json_body(), mimetype="application/json"), 200
+        if page is not None:
+            return app.response_class(page.html, content_type=f"text/html; charset={page.encoding}"), 200
+        return app.response_class(stream_with_context(_stream_letterboxd(url, resp)),
+                                  content_type=f"text/html; charset={resp.encoding or 'utf-8'}"), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 502
     except Exception as e:
         return jsonify({"error": f"Proxy fetch failed: {str(e)}"}), 500
 
+# Server-side list parsing: list pages fetched concurrently (through the page cache above)
+LETTERBOXD_PAGE_WORKERS = 4
+LETTERBOXD_MAX_PAGES = 50
+LETTERBOXD_MAX_ITEMS = 1000
+
+
+def _parse_letterboxd_page(url: str) -> letterboxd_parser.LetterboxdListParser:
+    """Fetch one list page and parse it; cache misses are parsed chunk by chunk as they download."""
+    parser = letterboxd_parser.LetterboxdListParser()
+    page, resp = _open_letterboxd(url)
+    if page is None:
+        decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+        _read_letterboxd(url, resp, on_chunk=lambda chunk: parser.feed(decoder.decode(chunk)))
+        parser.feed(decoder.decode(b"", final=True))
+    else:
+        parser.feed(page.html.decode(page.encoding, errors="replace"))
+    parser.close()
+    return parser
+
+
+def _ndjson(obj) -> str:
+    return json.dumps(obj, separators=(",", ":")) + "\n"
+
+
+@app.route('/api/letterboxd/list', methods=['POST'])
+def parse_letterboxd_list():
+    """Parse a public Letterboxd list server-side. Streams NDJSON: one {"page", "items"} line per page,
+    in list order, then {"done": true, ...}. Items are {rank, title, year, slug, tmdb_id?}; ranks are
+    contiguous from 1 across pages."""
+    data = request.get_json() or {}
+    url = (data.get('url') or '').strip()
+    if not url:
+        return jsonify({"error": "Missing 'url'"}), 400
+    if not _is_letterboxd_url(url):
+        return jsonify({"error": "Only letterboxd.com or boxd.it URLs are allowed"}), 400
+    try:
+        max_items = max(1, min(int(data.get('max_items', 200)), LETTERBOXD_MAX_ITEMS))
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_items must be an integer"}), 400
+
+    # Page 1 is fetched up front so upstream errors still get a proper status code
+    try:
+        first = _parse_letterboxd_page(url)
+        if not first.items and "/share/" in url:
+            url = letterboxd_parser.page_url(url, 1)
+            first = _parse_letterboxd_page(url)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 502
+    except Exception as e:
+        return jsonify({"error": f"Letterboxd fetch failed: {str(e)}"}), 500
+
+    last_page = max(1, min(first.last_page, LETTERBOXD_MAX_PAGES))
+
+    def generate():
+        # Pages drop different numbers of items (shorts, TV, duplicates), so a page's ranks are only
+        # known once every earlier page is parsed: pages are fetched concurrently but sent in order
+        ranked = 0
+        truncated = first.last_page > last_page
+
+        def page_line(page_no: int, items: List[Dict]) -> str:
+            nonlocal ranked, truncated
+            kept = items[:max_items - ranked]
+            truncated = truncated or len(kept) < len(items)
+            line = _ndjson({"page": page_no, "items": [dict(item, rank=ranked + i + 1) for i, item in enumerate(kept)]})
+            ranked += len(kept)
+            return line
+
+        yield page_line(1, first.items)
+        next_page = 2
+        if last_page > 1 and ranked < max_items:
+            pool = ThreadPoolExecutor(max_workers=LETTERBOXD_PAGE_WORKERS)
+            try:
+                futures = {pool.submit(_parse_letterboxd_page, letterboxd_parser.page_url(url, n)): n
+                           for n in range(2, last_page + 1)}
+                finished = {}
+                for future in as_completed(futures):
+                    finished[futures[future]] = future
+                    while next_page in finished and ranked < max_items:
+                        page_no = next_page
+                        next_page += 1
+                        try:
+                            items = finished.pop(page_no).result().items
+                        except Exception as e:
+                            yield _ndjson({"page": page_no, "error": str(e)})
+                            continue
+                        yield page_line(page_no, items)
+                    if ranked >= max_items:
+                        truncated = truncated or next_page <= last_page
+                        break
+            finally:
+                # Client gone or done: don't fetch pages nobody will read
+                pool.shutdown(wait=False, cancel_futures=True)
+        yield _ndjson({"done": True, "pages": next_page - 1, "count": ranked, "truncated": truncated})
+
+    return app.response_class(stream_with_context(generate()), mimetype="application/x-ndjson"), 200
+
 @app.route('/api/session/<session_id>/movies/select', methods=['POST'])
-def select_movies(session_id: str):
+@_with_session
+def select_movies(session: MovieRankingSession):
     """Select movies that the user has seen"""
-    if session_id not in sessions:
-        return jsonify({"error": "Session not found"}), 404
-    
     data = request.get_json() or {}
     movie_ids = data.get('movie_ids', [])
     
@@ -1276,10 +2326,9 @@ def select_movies(session_id: str):
         return jsonify({"error": "movie_ids must be a list"}), 400
     
     try:
-        session = sessions[session_id]
         count = session.select_movies(movie_ids)
         
-        return jsonify({
+        return json_response({
             "message": f"Selected {count} movies",
             "selected_count": count,
             "selected_movies": session.selected_movies
@@ -1294,26 +2343,23 @@ def select_movies(session_id: str):
 
 
 @app.route('/api/session/<session_id>/ranking/start', methods=['POST'])
-def start_ranking(session_id: str):
+@_with_session
+def start_ranking(session: MovieRankingSession):
     """Start the ranking process"""
-    if session_id not in sessions:
-        return jsonify({"error": "Session not found"}), 404
-    
     try:
-        session = sessions[session_id]
         session.start_ranking()
         
         # Get first comparison
         comparison = session.next_comparison()
         
         if comparison:
-            return jsonify({
+            return json_response({
                 "message": "Ranking started",
                 "comparison": comparison,
                 "status": session.get_status()
             }), 200
         else:
-            return jsonify({
+            return json_response({
                 "message": "Ranking complete (no comparisons needed)",
                 "results": session.get_results()
             }), 200
@@ -1324,48 +2370,39 @@ def start_ranking(session_id: str):
 
 
 @app.route('/api/session/<session_id>/ranking/current', methods=['GET'])
-def get_current_comparison(session_id: str):
+@_with_session
+def get_current_comparison(session: MovieRankingSession):
     """Get the current comparison"""
-    if session_id not in sessions:
-        return jsonify({"error": "Session not found"}), 404
-    
-    session = sessions[session_id]
-    
     if not session.is_ranking:
-        return jsonify({
+        return json_response({
             "error": "Ranking not in progress",
             "status": session.get_status()
         }), 400
     
     if session.current_comparison:
-        return jsonify({
-            "comparison": {
-                "left_movie": session.current_comparison["left_movie"],
-                "right_movie": session.current_comparison["right_movie"]
-            },
+        return json_response({
+            "comparison": session.comparison_payload(),
             "status": session.get_status()
         }), 200
     else:
         # Try to get next comparison
         comparison = session.next_comparison()
         if comparison:
-            return jsonify({
+            return json_response({
                 "comparison": comparison,
                 "status": session.get_status()
             }), 200
         else:
-            return jsonify({
+            return json_response({
                 "message": "No more comparisons",
                 "results": session.get_results()
             }), 200
 
 
 @app.route('/api/session/<session_id>/ranking/choice', methods=['POST'])
-def make_choice(session_id: str):
+@_with_session
+def make_choice(session: MovieRankingSession):
     """Make a choice in the ranking"""
-    if session_id not in sessions:
-        return jsonify({"error": "Session not found"}), 404
-    
     data = request.get_json()
     if not data or 'choice' not in data:
         return jsonify({"error": "Missing 'choice' field"}), 400
@@ -1373,24 +2410,32 @@ def make_choice(session_id: str):
     choice = data['choice'].lower()
     if choice not in ['left', 'right', 'skip']:
         return jsonify({"error": "Choice must be 'left', 'right', or 'skip'"}), 400
+    version = data.get('version')
+    if version is not None and not isinstance(version, int):
+        return jsonify({"error": "'version' must be an integer"}), 400
     
     try:
-        session = sessions[session_id]
-        comparison = session.make_choice(choice)
+        comparison = session.make_choice(choice, version)
         
         if comparison:
-            return jsonify({
+            return json_response({
                 "message": "Choice recorded",
                 "comparison": comparison,
                 "status": session.get_status()
             }), 200
         else:
             # Ranking complete
-            return jsonify({
+            return json_response({
                 "message": "Ranking complete",
                 "results": session.get_results(),
                 "status": session.get_status()
             }), 200
+    except StaleComparisonError as e:
+        # Already answered: tell the client what is on screen now instead of applying it twice
+        payload = {"error": str(e), "status": session.get_status()}
+        if session.current_comparison:
+            payload["comparison"] = session.comparison_payload()
+        return json_response(payload), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
@@ -1398,12 +2443,9 @@ def make_choice(session_id: str):
 
 
 @app.route('/api/session/<session_id>/ranking/status', methods=['GET'])
-def get_status(session_id: str):
+@_with_session
+def get_status(session: MovieRankingSession):
     """Get ranking status"""
-    if session_id not in sessions:
-        return jsonify({"error": "Session not found"}), 404
-    
-    session = sessions[session_id]
     return jsonify({
         "status": session.get_status(),
         "has_results": len(session.ranked_movies) > 0
@@ -1411,25 +2453,347 @@ def get_status(session_id: str):
 
 
 @app.route('/api/session/<session_id>/ranking/results', methods=['GET'])
-def get_results(session_id: str):
+@_with_session
+def get_results(session: MovieRankingSession):
     """Get final ranking results"""
-    if session_id not in sessions:
-        return jsonify({"error": "Session not found"}), 404
-    
-    session = sessions[session_id]
-    return jsonify(session.get_results()), 200
+    # Once ranking has finished the results are fixed; cache their compressed body
+    g.immutable_response = not session.is_ranking and bool(session.ranked_movies)
+    return json_response(session.get_results()), 200
 
 
 @app.route('/api/session/<session_id>', methods=['DELETE'])
 def delete_session(session_id: str):
     """Delete a session"""
-    if session_id not in sessions:
+    session = sessions.pop(session_id)
+    if session is None:
         return jsonify({"error": "Session not found"}), 404
+    if session.events is not None:
+        session.events.close()
     
-    del sessions[session_id]
     return jsonify({"message": "Session deleted"}), 200
 
 
+
+# Server-Sent Events (event_stream.py). A stream ends after SSE_MAX_SECONDS with a retry hint and the
+# client's EventSource reconnects with Last-Event-ID, so no stream outlives a worker timeout; with the
+# threaded workers in gunicorn.conf.py an idle stream holds one thread, not a whole worker process.
+# By default streams may take all but two of a worker's threads, so ordinary requests still get served
+SSE_HEARTBEAT_SECONDS = 10
+SSE_MAX_SECONDS = int(os.getenv("SSE_MAX_SECONDS", "25"))
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS") or max(1, int(os.getenv("GUNICORN_THREADS", "8")) - 2))
+SSE_RETRY_MS = 1000
+# Reconnect delay (randomized up to twice this) sent to streams turned away at the cap
+SSE_BUSY_RETRY_MS = SSE_MAX_SECONDS * 1000
+_sse_streams = 0
+_sse_lock = threading.Lock()
+METRICS.gauge("movie_ranker_sse_streams", "Open Server-Sent Event streams", lambda: [({}, _sse_streams)])
+
+
+def _session_snapshot(session: MovieRankingSession):
+    """Current status and comparison as SSE messages, tagged with the log's latest id so a
+    reconnect resumes after them; returns (messages, that id)."""
+    with session.lock:
+        last_id = session.event_log().last_id
+        messages = [("status", json.dumps(session.get_status(), separators=(",", ":")))]
+        if session.current_comparison:
+            messages.append(("comparison", json.dumps(session.comparison_payload(), separators=(",", ":"), default=str)))
+    chunk = "".join(event_stream.format_event(last_id if i == len(messages) - 1 else None, event, payload)
+                    for i, (event, payload) in enumerate(messages))
+    return chunk, last_id
+
+
+@app.route('/api/session/<session_id>/events', methods=['GET'])
+def session_events(session_id: str):
+    """Server-Sent Events for a session: `status`, `comparison` and background `job` events.
+    Without Last-Event-ID (header, or ?last_event_id= for the first connect) the stream starts with
+    the current status and comparison; with it, missed events are replayed (or the current state is
+    resent if they are no longer buffered). Comment heartbeats keep idle connections open. Beyond
+    SSE_MAX_STREAMS the stream closes at once with a retry hint."""
+    global _sse_streams
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Session not found"}), 404
+    # Check and take a slot in one step, so concurrent connects cannot overshoot the cap
+    with _sse_lock:
+        admitted = _sse_streams < SSE_MAX_STREAMS
+        if admitted:
+            _sse_streams += 1
+    if not admitted:
+        # A non-200 reply would fail an EventSource for good; an empty 200 stream whose retry hint
+        # spreads the reconnects out makes the browser try again by itself
+        retry_ms = random.randint(SSE_BUSY_RETRY_MS, 2 * SSE_BUSY_RETRY_MS)
+        response = app.response_class(f"retry: {retry_ms}\n: too many open event streams, retry later\n\n",
+                                      mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["Retry-After"] = str(-(-retry_ms // 1000))
+        return response
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    log = session.event_log()
+
+    def catch_up(after_id: int):
+        events, complete = log.replay(after_id)
+        if not complete:
+            return _session_snapshot(session)
+        chunk = "".join(event_stream.format_event(*e) for e in events)
+        return chunk, events[-1][0] if events else after_id
+
+    def stream():
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        if last_event_id is None:
+            chunk, sent = _session_snapshot(session)
+        else:
+            chunk, sent = catch_up(last_event_id)
+        yield chunk
+        deadline = time.monotonic() + SSE_MAX_SECONDS
+        while not log.closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if log.wait(sent, min(SSE_HEARTBEAT_SECONDS, remaining)):
+                chunk, sent = catch_up(sent)
+                yield chunk
+            else:
+                yield ": heartbeat\n\n"
+        yield event_stream.format_event(None, "end", '{"reason":"session deleted"}')
+
+    def release():
+        global _sse_streams
+        with _sse_lock:
+            _sse_streams -= 1
+
+    response = app.response_class(stream(), mimetype="text/event-stream")
+    # Runs when the server closes the response, even if the stream never started
+    response.call_on_close(release)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # don't let proxies buffer the stream
+    return response
+
+
+# Stateless ranking: the full state travels with the client as a signed token (state_token.py),
+# so any node can serve any request without sticky sessions or a shared store.
+# Disabled unless STATE_TOKEN_SECRET is set (all nodes must share it).
+STATE_TOKEN_SECRET = os.getenv("STATE_TOKEN_SECRET", "").encode()
+STATELESS_MAX_MOVIES = 200
+STATELESS_MOVIE_CACHE_MAX = 5000
+STATELESS_FETCH_WORKERS = 8
+# Formatted movies by TMDb id, so a node hydrates each comparison's movies once
+_stateless_movies: "OrderedDict[int, Dict]" = OrderedDict()
+_stateless_movies_lock = threading.Lock()
+_stateless_movie_stats = {"hits": 0, "misses": 0}
+CACHE_STATS["stateless_movies"] = lambda: {**_stateless_movie_stats, "size": len(_stateless_movies)}
+
+
+def _remember_stateless_movie(movie: Dict):
+    with _stateless_movies_lock:
+        _stateless_movies[movie["id"]] = movie
+        _stateless_movies.move_to_end(movie["id"])
+        while len(_stateless_movies) > STATELESS_MOVIE_CACHE_MAX:
+            _stateless_movies.popitem(last=False)
+
+
+def _stateless_movies_by_id(movie_ids: List[int]) -> List[Dict]:
+    """Formatted movies for ids, in order: rows of the mapped movie table formatted on the spot
+    (they are not copied into this process's cache), cached ones directly, the rest fetched
+    concurrently."""
+    helper = MovieRankingSession("stateless")
+    found: Dict[int, Dict] = {}
+    if MOVIE_TABLE is not None:
+        for movie_id in dict.fromkeys(movie_ids):
+            row = _movie_table_row(movie_id)
+            movie = helper._format_movie(row.to_tmdb()) if row is not None else None
+            if movie is not None:
+                found[movie_id] = movie
+    mapped = len(found)
+    with _stateless_movies_lock:
+        for movie_id in movie_ids:
+            if movie_id in found:
+                continue
+            movie = _stateless_movies.get(movie_id)
+            if movie is not None:
+                _stateless_movies.move_to_end(movie_id)
+                found[movie_id] = movie
+    missing = [i for i in dict.fromkeys(movie_ids) if i not in found]
+    _stateless_movie_stats["hits"] += len(found) - mapped
+    _stateless_movie_stats["misses"] += len(missing)
+    _note_cache(not missing, len(found) - mapped + len(missing))
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(STATELESS_FETCH_WORKERS, len(missing))) as pool:
+            for movie_id, movie in zip(missing, pool.map(_carry_request_stats(helper._get_movie_details), missing)):
+                if movie is None:
+                    raise ValueError(f"Movie {movie_id} could not be loaded")
+                _remember_stateless_movie(movie)
+                found[movie_id] = movie
+    return [found[i] for i in movie_ids]
+
+
+def _stateless_reply(movie_ids: List[int], engine: ranking_engine.MergeRanker, pair, message: str,
+                     error: Optional[str] = None):
+    """Next comparison plus the new state token, or the final results once ranking is done.
+    With error (a stale choice), the body carries it in place of the message."""
+    status = {
+        "is_ranking": pair is not None,
+        "total_movies": len(movie_ids),
+        "ranked_count": 0,
+        "unseen_count": len(engine.unseen),
+        "has_comparison": pair is not None,
+        "comparisons": engine.comparisons
+    }
+    if pair is not None:
+        left_movie, right_movie = _stateless_movies_by_id([movie_ids[pair[0]], movie_ids[pair[1]]])
+        return json_response({
+            **({"error": error} if error else {"message": message}),
+            "comparison": {"left_movie": left_movie, "right_movie": right_movie, "version": engine.comparisons},
+            "status": status,
+            "state": state_token.encode(movie_ids, engine.snapshot(), STATE_TOKEN_SECRET)
+        }), 200
+
+    # Same fill-in as MovieRankingSession.finish_ranking (the engine order already excludes unseen)
+    movies = _stateless_movies_by_id(movie_ids)
+    ranked = [movies[i] for i in engine.ranked]
+    unseen = [movies[i] for i in engine.unseen]
+    placed = set(engine.ranked) | set(engine.unseen)
+    ranked.extend(m for i, m in enumerate(movies) if i not in placed)
+    status["ranked_count"] = len(ranked)
+    return json_response({
+        "message": "Ranking complete",
+        "results": {"ranked_movies": ranked, "unseen_movies": unseen, "total_ranked": len(ranked)},
+        "status": status
+    }), 200
+
+
+@app.route('/api/stateless/ranking/start', methods=['POST'])
+def stateless_start_ranking():
+    """Start a ranking over TMDb ids without a server session; returns the first comparison and a state token"""
+    if not STATE_TOKEN_SECRET:
+        return jsonify({"error": "Stateless mode is disabled (set STATE_TOKEN_SECRET)"}), 503
+    data = request.get_json() or {}
+    tmdb_ids = data.get('tmdb_ids', [])
+    if not isinstance(tmdb_ids, list) or not all(isinstance(i, int) and i > 0 for i in tmdb_ids):
+        return jsonify({"error": "tmdb_ids must be a list of positive integers"}), 400
+    tmdb_ids = list(dict.fromkeys(tmdb_ids))[:STATELESS_MAX_MOVIES]
+
+    try:
+        # Same filtering and order as /movies/set
+        movies = MovieRankingSession("stateless")._load_movies_by_ids(tmdb_ids)
+        if len(movies) < 2:
+            return jsonify({"error": "Need at least 2 movies to rank"}), 400
+        for movie in movies:
+            _remember_stateless_movie(movie)
+        movie_ids = [m["id"] for m in movies]
+        engine = ranking_engine.MergeRanker(len(movie_ids))
+        return _stateless_reply(movie_ids, engine, engine.next_pair(), "Ranking started")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to start ranking: {str(e)}"}), 500
+
+
+@app.route('/api/stateless/ranking/choice', methods=['POST'])
+def stateless_make_choice():
+    """Apply a choice to the ranking carried in 'state'; returns the next comparison and the new token"""
+    if not STATE_TOKEN_SECRET:
+        return jsonify({"error": "Stateless mode is disabled (set STATE_TOKEN_SECRET)"}), 503
+    data = request.get_json() or {}
+    choice = str(data.get('choice', '')).lower()
+    if choice not in ['left', 'right', 'skip']:
+        return jsonify({"error": "Choice must be 'left', 'right', or 'skip'"}), 400
+    version = data.get('version')
+    if version is not None and not isinstance(version, int):
+        return jsonify({"error": "'version' must be an integer"}), 400
+
+    try:
+        movie_ids, snapshot = state_token.decode(data.get('state'), STATE_TOKEN_SECRET)
+        engine = ranking_engine.MergeRanker.restore(snapshot)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid state: {str(e)}"}), 400
+
+    try:
+        if version is not None and version != engine.comparisons and not engine.done:
+            # The choice answered another comparison than this token's: send the token's own
+            # comparison back, as the session route does, instead of applying it to the wrong pair
+            response, _ = _stateless_reply(
+                movie_ids, engine, engine.next_pair(), "",
+                error=f"Stale comparison: version {version} does not match the state (current is {engine.comparisons})")
+            return response, 409
+        pair = engine.answer(choice)
+        COMPARISONS.inc()
+        COMPARISON_WINDOW.add()
+        return _stateless_reply(movie_ids, engine, pair, "Choice recorded")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to process choice: {str(e)}"}), 500
+
+# Cold start: the TMDb response cache is restored from its snapshot at import, so a woken
+# instance serves cached categories, ids and searches without refetching them. Under gunicorn
+# (gunicorn.conf.py) the app is preloaded once in the master and forked, and each worker saves
+# the snapshot periodically and when it exits.
+_snapshot_saver: Optional[threading.Thread] = None
+
+
+def _restore_cache_snapshot():
+    if not CACHE_SNAPSHOT_PATH:
+        return
+    started = time.perf_counter()
+    count = TMDB_CACHE.load(CACHE_SNAPSHOT_PATH)
+    if count:
+        print(f"TMDb cache: restored {count} responses in {time.perf_counter() - started:.2f}s")
+
+
+def save_cache_snapshot():
+    """Write the TMDb response cache to CACHE_SNAPSHOT_PATH (merged with what is already there)."""
+    if not CACHE_SNAPSHOT_PATH:
+        return
+    try:
+        TMDB_CACHE.save(CACHE_SNAPSHOT_PATH)
+    except OSError as e:
+        print(f"TMDb cache snapshot failed: {e}")
+
+
+def _snapshot_loop():
+    while True:
+        time.sleep(CACHE_SNAPSHOT_INTERVAL)
+        save_cache_snapshot()
+
+
+def start_snapshot_saver():
+    """Start the periodic snapshot thread for this process (threads don't survive a fork)."""
+    global _snapshot_saver
+    if not CACHE_SNAPSHOT_PATH or CACHE_SNAPSHOT_INTERVAL <= 0:
+        return
+    if _snapshot_saver is None or not _snapshot_saver.is_alive():
+        _snapshot_saver = threading.Thread(target=_snapshot_loop, name="cache-snapshot", daemon=True)
+        _snapshot_saver.start()
+
+
+def prepare_for_fork():
+    """Run in the gunicorn master once the app is preloaded. Finishes the title index build
+    (the thread would not exist in the workers), closes the master's SQLite connections (disk
+    cache and catalog; SQLite connections must not cross a fork) and freezes everything
+    allocated so far, so the workers' garbage collector never writes to, and un-shares, those
+    pages."""
+    if _title_index_thread is not None:
+        _title_index_thread.join()
+    if TMDB_DISK_CACHE is not None:
+        TMDB_DISK_CACHE.close()
+    if CATALOG is not None:
+        CATALOG.close()
+    gc.collect()
+    gc.freeze()
+
+
+def after_fork():
+    """Run in each gunicorn worker after it is forked."""
+    METRICS.const_labels["worker"] = str(os.getpid())
+    start_snapshot_saver()
+
+
+_restore_cache_snapshot()
+
 if __name__ == '__main__':
     # Clean up old sessions on startup (older than 24 hours)
     print("Starting Movie Ranking API...")
@@ -1441,5 +2805,7 @@ if __name__ == '__main__':
     # Get port from environment variable (for deployment) or use 5000
     port = int(os.getenv("PORT", 8000))
     debug = os.getenv("FLASK_ENV") == "development"
+    start_snapshot_saver()
+    atexit.register(save_cache_snapshot)
     app.run(debug=debug, host='0.0.0.0', port=port)
 
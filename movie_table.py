@@ -0,0 +1,315 @@
+"""
+Read-only, memory-mapped movie table shared by every worker process.
+
+Built offline from the catalog mirror (tmdb_catalog.py). The file holds a
+sorted id column, one fixed-width record per movie whose text fields point
+into a UTF-8 string pool, and the title index's token, trigram and token-set
+postings. Every gunicorn worker maps the same file, so the pages live once in
+the OS page cache instead of once per process. Rows are looked up by id with a
+binary search and decoded field by field on access (MovieRow); nothing is
+unpacked up front.
+
+CLI:
+  python movie_table.py build                 # tmdb_catalog.db -> movie_table.bin
+  python movie_table.py build --db other.db --out /srv/movie_table.bin
+  python movie_table.py stats
+
+The table path defaults to movie_table.bin (override with --out or MOVIE_TABLE_PATH).
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Optional, Tuple
+
+import title_index
+
+DEFAULT_TABLE_PATH = "movie_table.bin"
+
+MAGIC = b"MVTB"
+FORMAT_VERSION = 1
+
+# Text fields, each stored in the record as (offset, length) into the string pool
+STRING_FIELDS = ("title", "original_title", "norm", "poster_path", "release_date", "overview", "genre_ids")
+# vote_count, year (0 = unknown), vote_average, popularity, runtime, flags, then the string refs
+_RECORD = struct.Struct("<IiddHB" + "II" * len(STRING_FIELDS))
+# Leading fields the title index scores with, plus the norm ref
+_SCORE_FIELDS = struct.Struct("<Iidd")
+_STRING_REF = struct.Struct("<II")
+_REFS_OFFSET = struct.calcsize("<IiddHB")
+_NORM_REF_OFFSET = _REFS_OFFSET + _STRING_REF.size * STRING_FIELDS.index("norm")
+
+_FLAG_ADULT = 1
+_FLAG_VIDEO = 2
+_FLAG_HAS_POSTER = 4  # distinguishes a NULL poster_path from an empty one
+
+# Postings sections, in file order
+SECTIONS = ("tokens", "trigrams", "token_sets")
+# Sorted key table entry: key offset/length in the pool, start/count in the postings array
+_KEY = struct.Struct("<IIII")
+# magic, version, rows, then byte offsets of the ids, records and pool plus the pool size,
+# then per section: key count, key table offset, postings offset
+_HEADER = struct.Struct("<4sII" + "QQQQ" + "IQQ" * len(SECTIONS))
+
+
+class _Pool:
+    """String pool writer: identical strings are stored once."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self._offsets: Dict[bytes, int] = {}
+
+    def add(self, s: Optional[str]) -> Tuple[int, int]:
+        raw = (s or "").encode("utf-8")
+        offset = self._offsets.get(raw)
+        if offset is None:
+            offset = len(self.data)
+            self.data += raw
+            self._offsets[raw] = offset
+        return offset, len(raw)
+
+
+def build(path: str, movies: Iterable[Dict]) -> int:
+    """Write a table for TMDb-shaped movie dicts (as tmdb_catalog yields them); returns the row count.
+
+    Rows are ordered by id, which is also the catalog's iteration order, so index documents and
+    their tie-breaking match a TitleIndex built from the catalog."""
+    by_id = {}
+    for movie in movies:
+        if movie.get("id"):
+            by_id[movie["id"]] = movie
+    ids = array("q", sorted(by_id))
+    pool = _Pool()
+    records = bytearray()
+    postings = {name: {} for name in SECTIONS}
+    for doc, movie_id in enumerate(ids):
+        movie = by_id[movie_id]
+        title = movie.get("title") or ""
+        norm = title_index.normalize_for_match(title or movie.get("original_title") or "")
+        flags = ((_FLAG_ADULT if movie.get("adult") else 0) | (_FLAG_VIDEO if movie.get("video") else 0)
+                 | (_FLAG_HAS_POSTER if movie.get("poster_path") is not None else 0))
+        texts = (title, movie.get("original_title") or "", norm, movie.get("poster_path"),
+                 movie.get("release_date") or "", movie.get("overview") or "",
+                 ",".join(str(g) for g in movie.get("genre_ids") or []))
+        refs = [n for text in texts for n in pool.add(text)]
+        records += _RECORD.pack(int(movie.get("vote_count") or 0),
+                                title_index.release_year(movie.get("release_date")) or 0,
+                                float(movie.get("vote_average") or 0), float(movie.get("popularity") or 0.0),
+                                int(movie.get("runtime") or 0), flags, *refs)
+        if not norm:
+            continue
+        # Same postings TitleIndex.add builds
+        tokens = set(norm.split())
+        for token in tokens:
+            postings["tokens"].setdefault(token, []).append(doc)
+        postings["token_sets"].setdefault(" ".join(sorted(tokens)), []).append(doc)
+        for gram in title_index.trigrams(norm):
+            postings["trigrams"].setdefault(gram, []).append(doc)
+
+    sections = []
+    for name in SECTIONS:
+        keys = bytearray()
+        docs = array("i")
+        entries = sorted((key.encode("utf-8"), docs_) for key, docs_ in postings[name].items())
+        for raw, posting in entries:
+            offset, length = pool.add(raw.decode("utf-8"))
+            keys += _KEY.pack(offset, length, len(docs), len(posting))
+            docs.extend(posting)
+        sections.append((len(entries), keys, docs))
+
+    # Layout: header, ids, records, each section's key table and postings, then the pool (8-byte aligned)
+    chunks = []
+    offset = _HEADER.size
+
+    def place(data: bytes) -> int:
+        nonlocal offset
+        offset += -offset % 8
+        start = offset
+        chunks.append((start, data))
+        offset += len(data)
+        return start
+
+    ids_off = place(ids.tobytes())
+    records_off = place(bytes(records))
+    section_fields = []
+    for count, keys, docs in sections:
+        section_fields.extend((count, place(bytes(keys)), place(docs.tobytes())))
+    pool_bytes = bytes(pool.data)
+    pool_off = place(pool_bytes)
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(ids), ids_off, records_off, pool_off, len(pool_bytes),
+                             *section_fields))
+        for start, data in chunks:
+            f.write(b"\0" * (start - f.tell()))
+            f.write(data)
+    os.replace(tmp, path)
+    return len(ids)
+
+
+class MovieRow:
+    """One table row; fields are unpacked from the mapped file when read."""
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "MovieTable", index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def id(self) -> int:
+        return self.table.ids[self.index]
+
+    def _fields(self) -> tuple:
+        return _RECORD.unpack_from(self.table.mm, self.table.records_off + self.index * _RECORD.size)
+
+    def text(self, name: str) -> str:
+        """One text field (see STRING_FIELDS), decoded from the pool."""
+        ref = self.table.records_off + self.index * _RECORD.size + _REFS_OFFSET \
+            + _STRING_REF.size * STRING_FIELDS.index(name)
+        return self.table.string(*_STRING_REF.unpack_from(self.table.mm, ref))
+
+    @property
+    def title(self) -> str:
+        return self.text("title")
+
+    @property
+    def release_date(self) -> str:
+        return self.text("release_date")
+
+    def to_tmdb(self) -> Dict:
+        """The row shaped like tmdb_catalog's TMDb-style movie dict."""
+        vote_count, year, vote_average, popularity, runtime, flags, *refs = self._fields()
+        text = {name: self.table.string(refs[2 * i], refs[2 * i + 1]) for i, name in enumerate(STRING_FIELDS)}
+        return {
+            "id": self.id,
+            "title": text["title"],
+            "original_title": text["original_title"],
+            "poster_path": text["poster_path"] if flags & _FLAG_HAS_POSTER else None,
+            "release_date": text["release_date"],
+            "vote_average": vote_average,
+            "vote_count": vote_count,
+            "popularity": popularity,
+            "overview": text["overview"],
+            "runtime": runtime,
+            "adult": bool(flags & _FLAG_ADULT),
+            "video": bool(flags & _FLAG_VIDEO),
+            "genre_ids": [int(g) for g in text["genre_ids"].split(",") if g]
+        }
+
+
+class MovieTable:
+    """Memory-mapped view of a table file. Read-only, so safe to share across threads and forks."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _HEADER.unpack_from(self.mm, 0)
+        magic, version, self.rows, ids_off, self.records_off, self.pool_off, pool_size = header[:7]
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} movie table")
+        view = memoryview(self.mm)
+        self.ids = view[ids_off:ids_off + 8 * self.rows].cast("q")
+        self._sections = {}
+        for i, name in enumerate(SECTIONS):
+            count, keys_off, docs_off = header[7 + 3 * i:10 + 3 * i]
+            total = 0
+            if count:
+                *_, start, length = _KEY.unpack_from(self.mm, keys_off + (count - 1) * _KEY.size)
+                total = start + length
+            self._sections[name] = (count, keys_off, view[docs_off:docs_off + 4 * total].cast("i"))
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def string(self, offset: int, length: int) -> str:
+        start = self.pool_off + offset
+        return self.mm[start:start + length].decode("utf-8")
+
+    def find(self, movie_id: int) -> Optional[int]:
+        """Row index of a movie id, or None."""
+        i = bisect_left(self.ids, movie_id)
+        return i if i < self.rows and self.ids[i] == movie_id else None
+
+    def get(self, movie_id: int) -> Optional[MovieRow]:
+        i = self.find(movie_id)
+        return MovieRow(self, i) if i is not None else None
+
+    def row(self, index: int) -> MovieRow:
+        return MovieRow(self, index)
+
+    def norm(self, index: int) -> str:
+        ref = self.records_off + index * _RECORD.size + _NORM_REF_OFFSET
+        return self.string(*_STRING_REF.unpack_from(self.mm, ref))
+
+    def score_fields(self, index: int) -> Tuple[str, int, float, float, int]:
+        """(norm, vote_count, vote_average, popularity, year) for title index scoring."""
+        vote_count, year, vote_average, popularity = _SCORE_FIELDS.unpack_from(
+            self.mm, self.records_off + index * _RECORD.size)
+        return self.norm(index), vote_count, vote_average, popularity, year
+
+    def postings(self, section: str, key: str) -> Optional[memoryview]:
+        """Row indexes (ascending) under a title index key, or None."""
+        count, keys_off, docs = self._sections[section]
+        raw = key.encode("utf-8")
+        mm = self.mm
+        pool_off = self.pool_off
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset, length, start, n = _KEY.unpack_from(mm, keys_off + mid * _KEY.size)
+            probe = mm[pool_off + offset:pool_off + offset + length]
+            if probe < raw:
+                lo = mid + 1
+            elif probe > raw:
+                hi = mid
+            else:
+                return docs[start:start + n]
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {"rows": self.rows, "bytes": len(self.mm),
+                **{name: self._sections[name][0] for name in SECTIONS}}
+
+
+def open_table(path: Optional[str] = None) -> Optional[MovieTable]:
+    """Map the table if its file exists (the API runs without one otherwise)."""
+    path = path or os.getenv("MOVIE_TABLE_PATH") or DEFAULT_TABLE_PATH
+    if not os.path.exists(path):
+        return None
+    try:
+        return MovieTable(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Could not open movie table at {path}: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped movie table")
+    parser.add_argument("--out", default=os.getenv("MOVIE_TABLE_PATH", DEFAULT_TABLE_PATH))
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="Build the table from the catalog mirror")
+    p_build.add_argument("--db", default=None, help="Catalog path (default tmdb_catalog.db / TMDB_CATALOG_PATH)")
+    sub.add_parser("stats", help="Show table counts")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        import tmdb_catalog
+        catalog = tmdb_catalog.open_catalog(args.db)
+        if catalog is None:
+            print("No catalog found; build one with tmdb_catalog.py first")
+            sys.exit(1)
+        print(f"Wrote {build(args.out, catalog.iter_movies())} movies to {args.out}")
+    table = open_table(args.out)
+    if table is None:
+        sys.exit(1)
+    print(json.dumps(table.stats()))
+
+
+if __name__ == "__main__":
+    main()
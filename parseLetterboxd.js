@@ -100,17 +100,14 @@ async function fetchHtml(url) {
   const res = await fetch(`${base}/api/letterboxd/fetch`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ url })
+    // raw: the proxy returns the page itself as text/html instead of wrapping it in JSON
+    body: JSON.stringify({ url, raw: true })
   });
   if (!res.ok) {
     const err = await res.json().catch(() => ({}));
     throw new Error(err.error || `Proxy fetch failed (${res.status})`);
   }
-  const data = await res.json();
-  if (!data || typeof data.html !== 'string') {
-    throw new Error('Invalid proxy response');
-  }
-  return data.html;
+  return res.text();
 }
 
 /**
@@ -271,6 +268,77 @@ function getNextPageUrl(html, baseUrl) {
   return null;
 }
 
+/**
+ * Parse a list on the server (/api/letterboxd/list): pages are fetched concurrently there and
+ * streamed back as NDJSON lines of compact items, one line per page.
+ * @param {string} url
+ * @param {number} maxItems
+ * @param {(status: string) => void} onStatus
+ * @returns {Promise<{items: ParsedItem[], truncated: boolean, pagesParsed: number}>}
+ */
+async function parseViaServer(url, maxItems, onStatus) {
+  const base = (window.API_BASE || '').replace(/\/$/, '');
+  if (!base) {
+    throw new Error('API base not configured for Letterboxd fetch');
+  }
+  const res = await fetch(`${base}/api/letterboxd/list`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ url, max_items: maxItems })
+  });
+  if (!res.ok || !res.body) {
+    const err = await res.json().catch(() => ({}));
+    throw new Error(err.error || `List parse failed (${res.status})`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  const items = [];
+  let buffered = '';
+  let summary = null;
+  let pages = 0;
+  const handleLine = (line) => {
+    if (!line.trim()) return;
+    const msg = JSON.parse(line);
+    if (msg.done) {
+      summary = msg;
+    } else if (Array.isArray(msg.items)) {
+      pages += 1;
+      items.push(...msg.items);
+      onStatus(`Parsed ${pages} page${pages === 1 ? '' : 's'} (${items.length} films)...`);
+    }
+  };
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const lines = buffered.split('\n');
+    buffered = lines.pop();
+    lines.forEach(handleLine);
+  }
+  handleLine(buffered);
+  if (!summary || items.length === 0) {
+    throw new Error('Incomplete list response');
+  }
+
+  // Pages arrive in list order and ranks are contiguous; sorting keeps that explicit
+  items.sort((a, b) => a.rank - b.rank);
+  return {
+    items: items.map((it, idx) => ({
+      rank: idx + 1,
+      title: it.title,
+      year: it.year ? String(it.year) : 'TBD',
+      slug: it.slug || null,
+      tmdb_id: it.tmdb_id || null,
+      lbPosterUrl: null,
+      poster_url: null,
+      originalIndex: idx
+    })),
+    truncated: !!summary.truncated,
+    pagesParsed: summary.pages
+  };
+}
+
 /**
  * Parse any public Letterboxd list share URL into ordered titles with pagination.
  * @param {string} inputUrl
@@ -286,6 +354,14 @@ async function parseLetterboxdList(inputUrl, maxItems = 200, onStatus = () => {}
     return cached;
   }
 
+  try {
+    const result = await parseViaServer(url, maxItems, onStatus);
+    setCache(url, result);
+    return result;
+  } catch (e) {
+    console.warn('Server-side list parse unavailable, parsing in the browser:', e);
+  }
+
   let currentUrl = url;
   let pageCount = 0;
   const allItems = [];
@@ -0,0 +1,296 @@
+"""
+On-disk poster thumbnail caches.
+
+PosterCache (API): posters are fetched from TMDb once, stored content-addressed
+(the blob name is the SHA-256 of the source image), and resized into width
+variants (w154, w342, ...) encoded as JPEG or WebP. A small ref file maps each
+TMDb poster path to its blob, so identical images share storage.
+
+ResizedPosterCache (desktop app): one ready-to-display JPEG per poster path at
+a fixed size, so a repeat run needs neither the network nor a full decode.
+
+Total size is bounded with least-recently-used eviction, for the directory as a
+whole when several processes share it (file mtimes are the shared access times).
+Pillow is imported lazily; without it the API cache reports itself unavailable
+and callers fall back to TMDb's own sizes.
+"""
+import hashlib
+import importlib.util
+import io
+import os
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, Tuple
+
+# Width variants served (TMDb naming); heights follow the poster's aspect ratio
+POSTER_WIDTHS = {"w154": 154, "w342": 342}
+FORMATS = {"jpeg": ("jpg", "image/jpeg"), "webp": ("webp", "image/webp")}
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+# Checked without importing: Pillow is only loaded when the first variant is encoded
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+
+def _encode_fixed(source: bytes, size: Tuple[int, int]) -> bytes:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(source)) as img:
+        # Draft mode lets the JPEG decoder skip straight to a reduced scale still >= size
+        img.draft("RGB", size)
+        img = img.convert("RGB").resize(size, Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        return out.getvalue()
+
+
+def _encode_variant(source: bytes, width: int, fmt: str) -> bytes:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(source)) as img:
+        # JPEG draft mode decodes at a reduced scale directly (much cheaper than a full decode)
+        img.draft("RGB", (width, width * 3))
+        img = img.convert("RGB")
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+        out = io.BytesIO()
+        if fmt == "webp":
+            img.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+        else:
+            img.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+class _DiskLRU:
+    """Size-bounded set of files under data_dir with LRU eviction. Safe to share across threads.
+
+    The directory itself is the index shared by every process using it (e.g. gunicorn
+    workers): file mtimes record last access, and the size totals are re-read from disk
+    before evicting and after each RESCAN_FRACTION of the cap written, so the cap holds for
+    the directory as a whole rather than per process."""
+
+    RESCAN_FRACTION = 0.05
+    # A hit refreshes the file's mtime (the shared access time) at most this often
+    TOUCH_INTERVAL = 60.0
+    # Temp files older than this were left by an interrupted write, not one in progress
+    STALE_TMP_SECONDS = 3600
+
+    def __init__(self, root: str, max_bytes: int, data_dir: str):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._data_dir = data_dir
+        self._lock = threading.Lock()
+        # Striped per-poster locks: concurrent requests for one poster fetch and encode it once
+        self._key_locks = [threading.Lock() for _ in range(64)]
+        # Data file path -> [size, last access]; rebuilt from disk (mtimes)
+        self._files: Dict[str, list] = {}
+        self._total = 0
+        self._written_since_scan = 0
+        os.makedirs(data_dir, exist_ok=True)
+        self._rescan()
+
+    def _scan(self) -> Dict[str, list]:
+        files = {}
+        now = time.time()
+        for dirpath, _dirs, names in os.walk(self._data_dir):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp"):
+                    if now - st.st_mtime > self.STALE_TMP_SECONDS:
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+                    continue
+                files[path] = [st.st_size, st.st_mtime]
+        return files
+
+    def _rescan(self):
+        """Re-read sizes and access times from disk (files other processes wrote or evicted)."""
+        started = time.time()
+        files = self._scan()
+        with self._lock:
+            for path, (size, used) in self._files.items():
+                if path in files:
+                    files[path][1] = max(files[path][1], used)
+                elif used >= started:
+                    files[path] = [size, used]  # written while the scan ran
+            self._files = files
+            self._total = sum(size for size, _used in files.values())
+            self._written_since_scan = 0
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            old = self._files.get(path)
+            if old is not None:
+                self._total -= old[0]
+            self._files[path] = [len(data), time.time()]
+            self._total += len(data)
+            self._written_since_scan += len(data)
+            rescan = self._written_since_scan > self.max_bytes * self.RESCAN_FRACTION
+        if rescan:
+            self._rescan()
+        self._evict()
+
+    def _touch(self, path: str) -> bool:
+        now = time.time()
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is None:
+                return False
+            stale = now - entry[1] > self.TOUCH_INTERVAL
+            entry[1] = now
+        if not stale:
+            return os.path.exists(path)
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    def _evict(self):
+        with self._lock:
+            if self._total <= self.max_bytes:
+                return
+        # Over the cap by this process's count: confirm against the directory before deleting
+        self._rescan()
+        with self._lock:
+            if self._total <= self.max_bytes:
+                return
+            victims = []
+            for path, (size, _used) in sorted(self._files.items(), key=lambda kv: kv[1][1]):
+                if self._total <= self.max_bytes * 0.9:
+                    break
+                victims.append(path)
+                self._total -= size
+                del self._files[path]
+        for path in victims:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._files), "bytes": self._total}
+
+
+class PosterCache(_DiskLRU):
+    """Content-addressed, size-bounded disk cache of poster variants. Safe to share across threads."""
+
+    def __init__(self, root: str, max_bytes: int):
+        os.makedirs(os.path.join(root, "refs"), exist_ok=True)
+        super().__init__(root, max_bytes, os.path.join(root, "blobs"))
+
+    def _ref_path(self, poster_path: str) -> str:
+        return os.path.join(self.root, "refs", hashlib.sha1(poster_path.encode("utf-8")).hexdigest())
+
+    def _blob_path(self, digest: str, suffix: str = "") -> str:
+        return os.path.join(self.root, "blobs", digest[:2], digest + suffix)
+
+    def _source_digest(self, poster_path: str, fetch: Callable[[str], bytes]) -> str:
+        """Content hash of the source poster, fetching and storing it on first use."""
+        ref = self._ref_path(poster_path)
+        try:
+            with open(ref, "r", encoding="ascii") as f:
+                digest = f.read().strip()
+            if self._touch(self._blob_path(digest)):
+                return digest
+        except OSError:
+            pass
+        source = fetch(poster_path)
+        digest = hashlib.sha256(source).hexdigest()
+        self._write(self._blob_path(digest), source)
+        os.makedirs(os.path.dirname(ref), exist_ok=True)
+        with open(ref, "w", encoding="ascii") as f:
+            f.write(digest)
+        return digest
+
+    def _forget(self, path: str):
+        """Drop the entry of a file that turned out to be gone (evicted by another worker)."""
+        with self._lock:
+            entry = self._files.pop(path, None)
+            if entry is not None:
+                self._total -= entry[0]
+
+    def _read_source(self, poster_path: str, fetch: Callable[[str], bytes]) -> Tuple[str, bytes]:
+        """Digest and bytes of the source poster, fetching it again if its blob was evicted."""
+        for _attempt in range(2):
+            digest = self._source_digest(poster_path, fetch)
+            try:
+                with open(self._blob_path(digest), "rb") as f:
+                    return digest, f.read()
+            except FileNotFoundError:
+                self._forget(self._blob_path(digest))
+        source = fetch(poster_path)
+        return hashlib.sha256(source).hexdigest(), source
+
+    def open(self, poster_path: str, size: str, fmt: str,
+             fetch: Callable[[str], bytes]) -> Tuple[BinaryIO, str, str]:
+        """Open file, mimetype and ETag of a poster variant, generating it if needed.
+        fetch(poster_path) returns the source image bytes (called at most once per poster).
+
+        The file is opened under the poster's lock, so once this returns an eviction can no
+        longer make it fail; a variant evicted before that is regenerated. A freshly
+        generated variant is returned from memory."""
+        suffix, mimetype = FORMATS[fmt]
+        lock = self._key_lock(poster_path)
+        with lock:
+            digest = self._source_digest(poster_path, fetch)
+            variant = self._blob_path(digest, f".{size}.{suffix}")
+            if self._touch(variant):
+                try:
+                    f = open(variant, "rb")
+                    self.hits += 1
+                    return f, mimetype, f"{digest[:32]}-{size}-{suffix}"
+                except FileNotFoundError:
+                    self._forget(variant)
+            self.misses += 1
+            digest, source = self._read_source(poster_path, fetch)
+            variant = self._blob_path(digest, f".{size}.{suffix}")
+            data = _encode_variant(source, POSTER_WIDTHS[size], fmt)
+            self._write(variant, data)
+        return io.BytesIO(data), mimetype, f"{digest[:32]}-{size}-{suffix}"
+
+
+class ResizedPosterCache(_DiskLRU):
+    """Fixed-size JPEG per poster path (the desktop app's 200x300 posters)."""
+
+    def __init__(self, root: str, max_bytes: int, size: Tuple[int, int]):
+        super().__init__(root, max_bytes, root)
+        self.size = size
+
+    def _entry_path(self, poster_path: str) -> str:
+        digest = hashlib.sha1(poster_path.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], f"{digest}.{self.size[0]}x{self.size[1]}.jpg")
+
+    def get(self, poster_path: str, fetch: Callable[[str], bytes]) -> bytes:
+        """JPEG bytes of the resized poster; fetch(poster_path) returns the source image on a miss."""
+        path = self._entry_path(poster_path)
+        with self._key_lock(poster_path):
+            if self._touch(path):
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    self.hits += 1
+                    return data
+                except OSError:
+                    pass
+            self.misses += 1
+            data = _encode_fixed(fetch(poster_path), self.size)
+            self._write(path, data)
+        return data
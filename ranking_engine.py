@@ -0,0 +1,156 @@
+"""
+Merge-sort ranking engine shared by the API sessions and the desktop app.
+
+Items are integer positions (0..n-1) in the caller's movie list, so the engine never
+compares or scans movie dicts. Callers pull the next pair with next_pair(), answer it
+with answer("left" | "right" | "skip"), and can persist progress with snapshot() and
+MergeRanker.restore(). Advancing is a loop rather than recursion through merges that
+complete on their own, pending merges sit in a deque, and unseen items in a set.
+
+The merge order is the one both front ends always used: each round pairs adjacent
+sublists in order, an odd sublist carries over to the front of the next round, and
+merged lists join the next round in completion order.
+"""
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+CHOICES = ("left", "right", "skip")
+
+SNAPSHOT_VERSION = 1
+
+
+class _Merge:
+    __slots__ = ("left", "right", "left_idx", "right_idx", "result")
+
+    def __init__(self, left: List[int], right: List[int], left_idx: int = 0, right_idx: int = 0,
+                 result: Optional[List[int]] = None):
+        self.left = left
+        self.right = right
+        self.left_idx = left_idx
+        self.right_idx = right_idx
+        self.result = result if result is not None else []
+
+    def encode(self) -> List:
+        return [self.left, self.right, self.left_idx, self.right_idx, self.result]
+
+
+class MergeRanker:
+    """Binary-choice merge sort over items 0..size-1."""
+    __slots__ = ("size", "ranked", "unseen", "comparisons", "done", "_sublists", "_stack", "_merge", "_unseen")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.ranked: List[int] = []      # final order, set once done
+        self.unseen: List[int] = []      # skipped items, in the order they were skipped
+        self.comparisons = 0
+        self.done = False
+        self._sublists: List[List[int]] = [[i] for i in range(size)]
+        self._stack: deque = deque()
+        self._merge: Optional[_Merge] = None
+        self._unseen = set()
+        self._prepare_round()
+
+    def _prepare_round(self):
+        """Pair up the current sublists into pending merges."""
+        sublists = self._sublists
+        if len(sublists) <= 1:
+            return
+        for i in range(0, len(sublists) - 1, 2):
+            self._stack.append(_Merge(sublists[i], sublists[i + 1]))
+        # Odd one out, add to next round
+        self._sublists = [sublists[-1]] if len(sublists) % 2 else []
+
+    def next_pair(self) -> Optional[Tuple[int, int]]:
+        """The pair awaiting an answer, advancing past finished merges; None once ranking is done."""
+        while not self.done:
+            merge = self._merge
+            if merge is not None:
+                left, right = merge.left, merge.right
+                li, ri = merge.left_idx, merge.right_idx
+                if li < len(left) and ri < len(right):
+                    return left[li], right[ri]
+                # One side exhausted: the rest of the other side is already in order. Skipped
+                # items were consumed when skipped, so nothing left here is unseen.
+                merge.result.extend(left[li:])
+                merge.result.extend(right[ri:])
+                self._sublists.append(merge.result)
+                self._merge = None
+            elif self._stack:
+                self._merge = self._stack.popleft()
+            elif len(self._sublists) > 1:
+                self._prepare_round()
+            else:
+                self.ranked = self._sublists[0] if self._sublists else []
+                self.done = True
+        return None
+
+    def answer(self, choice: str) -> Optional[Tuple[int, int]]:
+        """Apply a choice to the current pair and return the next pair (None once done)."""
+        if choice not in CHOICES:
+            raise ValueError(f"Invalid choice: {choice}. Must be 'left', 'right', or 'skip'")
+        pair = self.next_pair()
+        if pair is None:
+            raise ValueError("No active comparison")
+        merge = self._merge
+        left, right = pair
+        if choice == "left":
+            merge.result.append(left)
+            merge.left_idx += 1
+        elif choice == "right":
+            merge.result.append(right)
+            merge.right_idx += 1
+        else:
+            # Haven't seen one or both: drop both from the ranking
+            for item in pair:
+                if item not in self._unseen:
+                    self._unseen.add(item)
+                    self.unseen.append(item)
+            merge.left_idx += 1
+            merge.right_idx += 1
+        self.comparisons += 1
+        return self.next_pair()
+
+    def upcoming(self, pairs: int = 3) -> List[int]:
+        """Items likely to appear in the next few comparisons (for prefetching)."""
+        items = []
+        merge = self._merge
+        if merge is not None:
+            # After the current pair one of the two heads advances
+            items.extend(merge.left[merge.left_idx + 1:merge.left_idx + 2])
+            items.extend(merge.right[merge.right_idx + 1:merge.right_idx + 2])
+        for i, queued in enumerate(self._stack):
+            if i >= pairs:
+                break
+            items.append(queued.left[0])
+            items.append(queued.right[0])
+        return items
+
+    def snapshot(self) -> Dict:
+        """JSON-serializable state; MergeRanker.restore(snapshot) continues exactly where this is."""
+        return {
+            "version": SNAPSHOT_VERSION,
+            "size": self.size,
+            "sublists": self._sublists,
+            "stack": [m.encode() for m in self._stack],
+            "merge": self._merge.encode() if self._merge is not None else None,
+            "unseen": self.unseen,
+            "ranked": self.ranked,
+            "comparisons": self.comparisons,
+            "done": self.done
+        }
+
+    @classmethod
+    def restore(cls, snapshot: Dict) -> "MergeRanker":
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported ranking snapshot version {snapshot.get('version')}")
+        ranker = cls.__new__(cls)
+        ranker.size = snapshot["size"]
+        ranker._sublists = [list(sub) for sub in snapshot["sublists"]]
+        ranker._stack = deque(_Merge(*m) for m in snapshot["stack"])
+        ranker._merge = _Merge(*snapshot["merge"]) if snapshot["merge"] is not None else None
+        ranker.unseen = list(snapshot["unseen"])
+        ranker._unseen = set(ranker.unseen)
+        ranker.ranked = list(snapshot["ranked"])
+        ranker.comparisons = snapshot["comparisons"]
+        ranker.done = snapshot["done"]
+        return ranker
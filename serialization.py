@@ -0,0 +1,169 @@
+"""
+Fast JSON serialization for Movie Ranking API responses.
+
+Output is byte-for-byte what Flask's ``jsonify`` produces outside debug mode
+(sorted keys, compact separators, ASCII escapes, trailing newline), but movie
+records are encoded once and cached as bytes, so large movie lists are
+assembled by concatenation instead of re-encoding every dict on every response.
+orjson is used to encode movie records when it is installed.
+"""
+import json
+import threading
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson  # Optional: faster encoding of movie records
+except ImportError:
+    orjson = None
+
+# Keys of a formatted movie record (see MovieRankingSession._format_movie)
+MOVIE_KEYS = frozenset({"id", "title", "poster_path", "poster_url", "release_date", "vote_average", "overview"})
+
+# Cached encoded movie records: TMDb id -> (copy of the record as encoded, encoded bytes)
+MOVIE_BLOB_CACHE_MAX = 50000
+_movie_blobs: Dict[Any, Tuple[Dict, bytes]] = {}
+
+_stats = {"hits": 0, "misses": 0}
+# Guards writes to _movie_blobs and all _stats updates (responses are encoded on several threads);
+# lookups are single dict reads and need no lock
+_lock = threading.Lock()
+
+
+def _stdlib_dumps(obj: Any, default: Optional[Callable] = None) -> bytes:
+    """Encode with the exact settings Flask's default JSON provider uses."""
+    return json.dumps(obj, default=default, ensure_ascii=True, sort_keys=True,
+                      separators=(",", ":")).encode("ascii")
+
+
+def _orjson_safe_float(x: float) -> bool:
+    """orjson and json agree on float text except for exponent forms (|x| < 1e-4 or >= 1e16)."""
+    ax = abs(x)
+    return ax == 0.0 or 1e-4 <= ax < 1e16
+
+
+def _encode_movie(movie: Dict) -> bytes:
+    """Encode one movie record, preferring orjson when its output is identical to json's."""
+    if orjson is not None:
+        for value in movie.values():
+            if type(value) is float and not _orjson_safe_float(value):
+                break
+        else:
+            try:
+                out = orjson.dumps(movie, option=orjson.OPT_SORT_KEYS)
+            except TypeError:
+                out = None
+            # orjson emits raw UTF-8; json escapes non-ASCII, so only take ASCII-only output
+            if out is not None and out.isascii():
+                return out
+    return _stdlib_dumps(movie)
+
+
+def movie_blob(movie: Dict, stats: Optional[Dict[str, int]] = None) -> bytes:
+    """Return the cached encoded bytes for a movie record, encoding it on first use.
+
+    If stats is given, its "hits"/"misses" counters are incremented as well (per-request accounting).
+    """
+    counts = {"hits": 0, "misses": 0}
+    blob = _movie_blob(movie, counts)
+    _add_stats(counts, stats)
+    return blob
+
+
+def _same_record(cached: Dict, movie: Dict) -> bool:
+    """Whether movie encodes exactly like cached: equal values of the same types
+    (plain == treats 8 and 8.0, or 1 and True, as equal, but they encode differently)."""
+    if len(cached) != len(movie):
+        return False
+    for key, value in movie.items():
+        if key not in cached:
+            return False
+        old = cached[key]
+        if type(old) is not type(value) or old != value:
+            return False
+    return True
+
+
+def _movie_blob(movie: Dict, counts: Dict[str, int]) -> bytes:
+    """movie_blob, counting into counts (the caller folds them into _stats)."""
+    key = movie.get("id")
+    entry = _movie_blobs.get(key)
+    # Same id is not enough: placeholder ids can collide, and records may be refreshed or
+    # changed in place, so compare with the copy taken when the bytes were encoded
+    if entry is not None and _same_record(entry[0], movie):
+        counts["hits"] += 1
+        return entry[1]
+    counts["misses"] += 1
+    snapshot = dict(movie)
+    blob = _encode_movie(snapshot)
+    with _lock:
+        if len(_movie_blobs) >= MOVIE_BLOB_CACHE_MAX:
+            # Drop the oldest half (dicts preserve insertion order)
+            for old_key in list(_movie_blobs)[:MOVIE_BLOB_CACHE_MAX // 2]:
+                _movie_blobs.pop(old_key, None)
+        _movie_blobs[key] = (snapshot, blob)
+    return blob
+
+
+def _add_stats(counts: Dict[str, int], stats: Optional[Dict[str, int]]):
+    with _lock:
+        _stats["hits"] += counts["hits"]
+        _stats["misses"] += counts["misses"]
+    if stats is not None:
+        stats["hits"] += counts["hits"]
+        stats["misses"] += counts["misses"]
+
+
+def _encode(obj: Any, parts: List[bytes], default: Optional[Callable], counts: Dict[str, int]) -> None:
+    """Append the JSON encoding of obj to parts, counting movie blob hits/misses into counts."""
+    t = type(obj)
+    if t is str:
+        parts.append(encode_basestring_ascii(obj).encode("ascii"))
+    elif t is dict:
+        if obj.keys() == MOVIE_KEYS and type(obj.get("id")) is int:
+            parts.append(_movie_blob(obj, counts))
+            return
+        if not all(type(k) is str for k in obj):
+            # json sorts non-string keys before converting them; keep its exact behaviour
+            parts.append(_stdlib_dumps(obj, default))
+            return
+        parts.append(b"{")
+        first = True
+        for key in sorted(obj):
+            if not first:
+                parts.append(b",")
+            first = False
+            parts.append(encode_basestring_ascii(key).encode("ascii"))
+            parts.append(b":")
+            _encode(obj[key], parts, default, counts)
+        parts.append(b"}")
+    elif t is list or t is tuple:
+        parts.append(b"[")
+        first = True
+        for item in obj:
+            if not first:
+                parts.append(b",")
+            first = False
+            _encode(item, parts, default, counts)
+        parts.append(b"]")
+    else:
+        # Numbers, booleans, None and anything needing the default hook
+        parts.append(_stdlib_dumps(obj, default))
+
+
+def dumps(obj: Any, default: Optional[Callable] = None, stats: Optional[Dict[str, int]] = None) -> bytes:
+    """Serialize obj to compact JSON bytes (no trailing newline).
+
+    stats, if given, collects movie blob cache hits/misses for this call.
+    """
+    parts: List[bytes] = []
+    counts = {"hits": 0, "misses": 0}
+    _encode(obj, parts, default, counts)
+    _add_stats(counts, stats)
+    return b"".join(parts)
+
+
+def blob_cache_stats() -> Dict[str, int]:
+    """Hit/miss counters and current size of the movie blob cache."""
+    with _lock:
+        return {"hits": _stats["hits"], "misses": _stats["misses"], "size": len(_movie_blobs)}
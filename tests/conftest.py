@@ -0,0 +1,95 @@
+"""
+Shared fixtures: the API module imported with its on-disk state (response snapshot,
+disk cache, catalog, movie table) switched off, and a fake TMDb behind requests.get.
+"""
+import json
+import os
+import re
+import sys
+import threading
+from urllib.parse import urlparse
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.update({
+    "TMDB_API_KEY": "test",
+    "CACHE_SNAPSHOT_PATH": "",
+    "TMDB_DISK_CACHE_PATH": "",
+    "TMDB_CATALOG_PATH": os.path.join(ROOT, "tests", "no_catalog.db"),
+    "MOVIE_TABLE_PATH": os.path.join(ROOT, "tests", "no_movie_table.bin"),
+})
+
+import movie_ranker_api as api  # noqa: E402
+import tmdb_cache  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode("utf-8")
+        self.headers = {}
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise api.requests.HTTPError(f"{self.status_code} error")
+
+
+class FakeTMDb:
+    """Deterministic TMDb stand-in: movie N was released in 2000 + N % 20; every year has 30
+    discover results; searching "Movie N" finds movie N. Counts calls per endpoint path."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def movie(movie_id):
+        return {"id": movie_id, "title": f"Movie {movie_id}", "original_title": f"Movie {movie_id}",
+                "poster_path": f"/p{movie_id}.jpg", "release_date": f"{2000 + movie_id % 20}-05-01",
+                "vote_average": 7.0, "vote_count": 100, "popularity": 10.0, "overview": "", "genre_ids": [18]}
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        path = urlparse(url).path
+        with self._lock:
+            self.calls.append(path)
+        params = params or {}
+        if "/movie/" in path and not path.endswith("/discover/movie"):
+            return FakeResponse(self.movie(int(path.rsplit("/", 1)[1])))
+        if path.endswith("/discover/movie"):
+            year = int(params.get("primary_release_year") or 2000)
+            ids = [year % 100 + 20 * i for i in range(1, 31)]
+            return FakeResponse({"page": 1, "total_pages": 1, "total_results": len(ids),
+                                 "results": [self.movie(i) for i in ids]})
+        if path.endswith("/search/movie"):
+            found = re.fullmatch(r"movie (\d+)", str(params.get("query", "")).strip().lower())
+            results = [self.movie(int(found.group(1)))] if found and int(params.get("page", 1)) == 1 else []
+            return FakeResponse({"page": 1, "total_pages": 1, "total_results": len(results), "results": results})
+        return FakeResponse({"status_message": "not found"}, 404)
+
+    def count(self, fragment):
+        return sum(1 for path in self.calls if fragment in path)
+
+
+@pytest.fixture
+def tmdb(monkeypatch):
+    """Fake TMDb with cold caches."""
+    fake = FakeTMDb()
+    monkeypatch.setattr(api.requests, "get", fake.get)
+    monkeypatch.setattr(api, "TMDB_CACHE", tmdb_cache.ResponseCache(64 * 1024 * 1024))
+    monkeypatch.setattr(api, "TMDB_DISK_CACHE", None)
+    return fake
+
+
+@pytest.fixture
+def client():
+    return api.app.test_client()
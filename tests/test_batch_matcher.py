@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+import batch_matcher
+import title_index
+
+WORDS = ["the", "dark", "knight", "rises", "alien", "aliens", "f1", "up", "heat", "love", "it", "star", "wars",
+         "2", "man", "iron", "e", "her"]
+DATES = ["", None, "1975-06-20", "1979-05-25", "1980-01-01", "1999", "2008-07-16", "20", "abcd-01-01"]
+
+
+def _title(rng):
+    words = rng.sample(WORDS, rng.randint(1, 3))
+    title = " ".join(words)
+    return rng.choice([title, title.title(), title.upper() + "!", f"{title}: Part {rng.randint(1, 3)}", "", "--"])
+
+
+def _movie(rng, movie_id):
+    movie = {"id": movie_id, "title": _title(rng), "release_date": rng.choice(DATES)}
+    # Coarse values so candidates tie on score; some fields missing or None
+    for key, values in (("vote_count", [0, 100, 1000, 5000, 9000, None]), ("vote_average", [0.0, 5.0, 7.5, 9.0, None]),
+                        ("popularity", [0.0, 10.0, 50.0, 600.0, None])):
+        value = rng.choice(values)
+        if value is not None or rng.random() < 0.5:
+            movie[key] = value
+    if not movie["title"] and rng.random() < 0.5:
+        movie["original_title"] = _title(rng)
+    return movie
+
+
+def _per_title(title, results):
+    """What the API did one title at a time: first strictly-best score_result, then the threshold."""
+    norm_q = title_index.normalize_for_match(title)
+    best, best_score = None, -1.0
+    for movie in results:
+        score = title_index.score_result(norm_q, movie)
+        if score > best_score:
+            best, best_score = movie, score
+    return best if best is not None and best_score >= title_index.min_score(norm_q) else None
+
+
+def _numpy_modes():
+    modes = [False]
+    if batch_matcher.NUMPY_AVAILABLE:
+        modes.append(True)
+    return modes
+
+
+@pytest.mark.parametrize("use_numpy", _numpy_modes())
+def test_batch_picks_the_same_match_as_the_per_title_scorer(use_numpy, monkeypatch):
+    monkeypatch.setattr(batch_matcher, "NUMPY_AVAILABLE", use_numpy)
+    rng = random.Random(34)
+    for _ in range(300):
+        pool = [_movie(rng, 1000 + i) for i in range(rng.randint(1, 25))]
+        titles = [_title(rng) for _ in range(rng.randint(1, 8))]
+        # Result lists share candidates, as searches for similar titles do; some are empty
+        results = [rng.sample(pool, rng.randint(0, len(pool))) for _ in titles]
+        matched = batch_matcher.BatchMatcher().match(titles, results)
+        for title, res, got in zip(titles, results, matched):
+            assert got is _per_title(title, res), (title, res)
+
+
+@pytest.mark.parametrize("use_numpy", _numpy_modes())
+def test_ties_go_to_the_first_result(use_numpy, monkeypatch):
+    monkeypatch.setattr(batch_matcher, "NUMPY_AVAILABLE", use_numpy)
+    first = {"id": 1, "title": "Heat", "release_date": "1995-12-15", "vote_count": 100}
+    second = dict(first, id=2)
+    third = dict(first, id=3, vote_count=50)
+    assert batch_matcher.BatchMatcher().match(["Heat", "heat"], [[third, first, second], [second, first]]) == [first, second]
+
+
+def test_numpy_scores_equal_the_per_pair_scores():
+    if not batch_matcher.NUMPY_AVAILABLE:
+        pytest.skip("numpy not installed")
+    rng = random.Random(7)
+    matcher = batch_matcher.BatchMatcher()
+    movies = [_movie(rng, i + 1) for i in range(60)]
+    queries = [matcher.normalize(_title(rng)) for _ in range(20)]
+    cand_norms = [matcher.normalize(m.get("title") or m.get("original_title") or "") for m in movies]
+    pair_query = [qi for qi in range(len(queries)) for _ in movies]
+    pair_cand = [ci for _ in queries for ci in range(len(movies))]
+    scores = matcher._score_numpy(queries, cand_norms, movies, pair_query, pair_cand)
+    assert scores == matcher._score_python(queries, cand_norms, movies, pair_query, pair_cand)
+    assert scores == [title_index.score_result(queries[qi], movies[ci]) for qi, ci in zip(pair_query, pair_cand)]
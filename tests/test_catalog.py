@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+import tmdb_catalog
+
+from conftest import api
+
+
+def test_year_load_is_not_limited_to_written_back_movies(tmdb, monkeypatch, tmp_path):
+    catalog = tmdb_catalog.TMDbCatalog(str(tmp_path / "catalog.db"))
+    monkeypatch.setattr(api, "CATALOG", catalog)
+    session = api.MovieRankingSession("catalog")
+
+    # Movie 105 (2005) comes from TMDb and is written back to the mirror
+    assert session._fetch_movie(105)["release_date"].startswith("2005")
+    assert catalog.get_movie(105) is not None
+
+    count = session.load_movies(year=2005, max_movies=20)
+    assert count == 20
+    assert {m["id"] for m in session.movies} - {105}
+    assert tmdb.count("/discover/movie") == 1
+
+
+def test_partial_import_still_loads_the_year_from_tmdb(tmdb, monkeypatch, tmp_path):
+    catalog = tmdb_catalog.TMDbCatalog(str(tmp_path / "catalog.db"))
+    monkeypatch.setattr(api, "CATALOG", catalog)
+    year_ids = [7 + 20 * i for i in range(1, 31)]  # TMDb's 30 movies of 2007
+    catalog.set_totals({(tmdb_catalog.YEAR, 2007): 30})
+
+    # A popularity-filtered import: 10 of the 30
+    catalog.upsert_details_many([tmdb.movie(i) for i in year_ids[:10]])
+    session = api.MovieRankingSession("catalog")
+    assert session.load_movies(year=2007, max_movies=20) == 20
+    assert tmdb.count("/discover/movie") == 1
+
+    # Once the mirror holds the whole year, it answers without TMDb
+    catalog.upsert_details_many([tmdb.movie(i) for i in year_ids[10:]])
+    assert session.load_movies(year=2007, max_movies=20) == 20
+    assert tmdb.count("/discover/movie") == 1
+    # No total fetched for 2008: TMDb is asked
+    session.load_movies(year=2008, max_movies=5)
+    assert tmdb.count("/discover/movie") == 2
+
+
+def test_collection_is_served_locally_only_when_complete(tmp_path):
+    catalog = tmdb_catalog.TMDbCatalog(str(tmp_path / "catalog.db"))
+    part = {"title": "Part", "poster_path": "/p.jpg", "release_date": "1999-01-01", "belongs_to_collection": {"id": 9}}
+    catalog.upsert_details(dict(part, id=1))
+    assert catalog.collection_parts(9) is None
+    catalog.set_totals({(tmdb_catalog.COLLECTION, 9): 2})
+    assert catalog.collection_parts(9) is None
+    catalog.upsert_details(dict(part, id=2, release_date="2001-01-01"))
+    assert [m["id"] for m in catalog.collection_parts(9)] == [1, 2]
+
+
+def test_fetch_totals_stores_tmdb_counts(tmdb, monkeypatch, tmp_path):
+    catalog = tmdb_catalog.TMDbCatalog(str(tmp_path / "catalog.db"))
+    catalog.upsert_details_many([tmdb.movie(i) for i in (7, 27, 8)])
+    monkeypatch.setattr(api.requests, "Session", lambda: tmdb)
+    assert tmdb_catalog._fetch_totals(catalog, "test", "https://tmdb.test/3", [], [], workers=2) == 2
+    assert tmdb.count("/discover/movie") == 2
+    assert catalog.covers(tmdb_catalog.YEAR, 2007) is False
+    assert catalog.stats()["totals"] == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_worker_opens_its_own_connection(tmp_path):
+    catalog = tmdb_catalog.TMDbCatalog(str(tmp_path / "catalog.db"))
+    parent_conn = catalog._conn()
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        ok = catalog._conn() is not parent_conn and catalog.get_movie(1) is None
+        os.write(write, b"1" if ok else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b"1"
+    assert catalog._conn() is parent_conn
+
+    catalog.close()
+    assert catalog._conn() is not parent_conn
@@ -0,0 +1,137 @@
+import json
+import random
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+import movie_ranker
+
+
+class _Entry:
+    def __init__(self, text):
+        self.text = text
+
+    def get(self):
+        return self.text
+
+    def delete(self, first, last=None):
+        self.text = ""
+
+    def insert(self, index, text):
+        self.text += text
+
+
+class _Label:
+    def config(self, **kwargs):
+        pass
+
+
+class _Messagebox:
+    @staticmethod
+    def showinfo(*args, **kwargs):
+        pass
+
+    @staticmethod
+    def showerror(title, message):
+        raise AssertionError(message)
+
+
+class HeadlessMovieRanker(movie_ranker.MovieRanker):
+    """MovieRanker with the Tk UI stubbed out; records the pairs it would have shown."""
+
+    def __init__(self, movies=None):
+        self.root = None
+        self.movies = movies or []
+        self.ranked_movies = []
+        self.unseen_movies = []
+        self.current_comparison = None
+        self.is_ranking = False
+        self.checkpoint = None
+        self.engine = None
+        self.year_entry = _Entry("1999")
+        self.status_label = _Label()
+        self.shown = []
+
+    def display_comparison(self, movie1, movie2):
+        self.shown.append((movie1["id"], movie2["id"]))
+
+    def _update_progress(self):
+        pass
+
+    def display_results(self):
+        pass
+
+
+MOVIES = [{"id": 100 + i, "title": f"Movie {i}", "release_date": "1999-01-01"} for i in range(40)]
+
+
+def _choices(seed=41):
+    rng = random.Random(seed)
+    return lambda: rng.choices(("left", "right", "skip"), weights=(10, 10, 2))[0]
+
+
+@pytest.fixture
+def headless(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(movie_ranker, "messagebox", _Messagebox)
+    monkeypatch.setattr(movie_ranker, "CHECKPOINT_COMPACT_EVERY", 7)
+    return tmp_path
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resumed_session_continues_like_an_uninterrupted_one(headless, monkeypatch):
+    choose = _choices()
+    uninterrupted = HeadlessMovieRanker(list(MOVIES))
+    uninterrupted.start_ranking()
+    choices = []
+    while uninterrupted.is_ranking:
+        choices.append(choose())
+        uninterrupted.make_choice(choices[-1])
+    uninterrupted.checkpoint.close()
+    assert len(choices) > 40
+
+    # Rank partway: 30 choices compact after 7, 14, 21 and 28, leaving two appended
+    first = HeadlessMovieRanker(list(MOVIES))
+    first.start_ranking()
+    for choice in choices[:30]:
+        first.make_choice(choice)
+    first.checkpoint.close()
+    path = headless / first._checkpoint_path()
+    lines = _lines(path)
+    assert lines[0] == {"version": movie_ranker.CHECKPOINT_VERSION, "year": "1999", "movies": MOVIES}
+    assert lines[1]["snapshot"]["comparisons"] == 28
+    assert lines[2:] == [{"choice": choices[28]}, {"choice": choices[29]}]
+    # The app was killed while writing the next choice
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"choi')
+
+    resumed = HeadlessMovieRanker()
+    monkeypatch.setattr(movie_ranker.filedialog, "askopenfilename", lambda **kwargs: str(path))
+    resumed.load_results()
+    assert resumed.engine.comparisons == 30
+    assert resumed.shown == [uninterrupted.shown[30]]
+    assert [m["id"] for m in resumed.unseen_movies] == [MOVIES[i]["id"] for i in first.engine.unseen]
+    # Resuming compacts the log into a fresh snapshot
+    lines = _lines(path)
+    assert len(lines) == 2 and lines[1]["snapshot"] == resumed.engine.snapshot()
+
+    for choice in choices[30:]:
+        resumed.make_choice(choice)
+    resumed.checkpoint.close()
+    assert not resumed.is_ranking
+    assert resumed.shown[1:] == uninterrupted.shown[31:]
+    assert resumed.ranked_movies == uninterrupted.ranked_movies
+    assert resumed.engine.unseen == uninterrupted.engine.unseen
+
+
+def test_read_rejects_other_checkpoint_versions(headless):
+    path = headless / "old.session.jsonl"
+    path.write_text(json.dumps({"version": movie_ranker.CHECKPOINT_VERSION - 1, "movies": MOVIES}) + "\n"
+                    + json.dumps({"snapshot": {}}) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="unsupported checkpoint version"):
+        movie_ranker.RankingCheckpoint.read(str(path))
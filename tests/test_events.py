@@ -0,0 +1,64 @@
+import os
+import threading
+
+import pytest
+
+from conftest import api
+
+
+def _open_stream(client, session_id):
+    return client.get(f"/api/session/{session_id}/events", buffered=False)
+
+
+def test_stream_cap_rejects_the_stream_beyond_it(tmdb, client, monkeypatch):
+    monkeypatch.setattr(api, "SSE_MAX_STREAMS", 3)
+    session_id = client.post("/api/session/create").get_json()["session_id"]
+
+    streams = [_open_stream(client, session_id) for _ in range(3)]
+    assert [r.status_code for r in streams] == [200, 200, 200]
+    rejected = _open_stream(client, session_id)
+    # 200 with a retry hint, not an error: a non-200 response would stop EventSource reconnecting
+    assert rejected.status_code == 200 and rejected.mimetype == "text/event-stream"
+    body = rejected.get_data(as_text=True)
+    retry_ms = int(body.split("\n")[0].removeprefix("retry: "))
+    assert api.SSE_BUSY_RETRY_MS <= retry_ms <= 2 * api.SSE_BUSY_RETRY_MS
+    assert "event:" not in body and "data:" not in body
+    assert int(rejected.headers["Retry-After"]) * 1000 >= retry_ms
+
+    # Closing a stream frees its slot, even though it was never read
+    streams.pop().close()
+    again = _open_stream(client, session_id)
+    assert again.status_code == 200
+    for r in streams + [again]:
+        r.close()
+    assert api._sse_streams == 0
+
+
+def test_concurrent_connects_do_not_overshoot_the_cap(tmdb, client, monkeypatch):
+    monkeypatch.setattr(api, "SSE_MAX_STREAMS", 4)
+    session_id = client.post("/api/session/create").get_json()["session_id"]
+    start = threading.Barrier(12)
+    responses = []
+    lock = threading.Lock()
+
+    def connect():
+        start.wait()
+        r = _open_stream(api.app.test_client(), session_id)
+        with lock:
+            responses.append(r)
+
+    threads = [threading.Thread(target=connect) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [r.status_code for r in responses] == [200] * 12
+    assert sum("Retry-After" in r.headers for r in responses) == 8
+    for r in responses:
+        r.close()
+    assert api._sse_streams == 0
+
+
+@pytest.mark.skipif(bool(os.getenv("SSE_MAX_STREAMS")), reason="cap set explicitly")
+def test_default_cap_leaves_threads_for_other_requests():
+    assert api.SSE_MAX_STREAMS == int(os.getenv("GUNICORN_THREADS", "8")) - 2
@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+
+from conftest import api
+
+
+def _server_timing_calls(response) -> int:
+    header = response.headers["Server-Timing"]
+    return int(header.split('desc="', 1)[1].split(" calls", 1)[0])
+
+
+def test_request_stats_count_concurrent_records():
+    stats = api.RequestStats()
+
+    def record():
+        for _ in range(1000):
+            stats.record_upstream(0.001)
+            stats.record_cache(True)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stats.upstream_calls == 8000
+    assert stats.cache_hits == 8000
+
+
+def test_stats_are_cleared_after_the_request(tmdb, client):
+    session_id = client.post("/api/session/create").get_json()["session_id"]
+    response = client.post(f"/api/session/{session_id}/movies/load", json={"year": 2003, "max_movies": 10})
+    assert _server_timing_calls(response) == 1
+    assert api._request_stats() is None
+
+
+def test_background_job_reports_its_own_upstream_calls(tmdb, client):
+    session_id = client.post("/api/session/create").get_json()["session_id"]
+    job = client.post(f"/api/session/{session_id}/movies/load",
+                      json={"year": 2004, "max_movies": 10, "async": True}).get_json()
+    for _ in range(100):
+        info = client.get(job["status_url"]).get_json()
+        if info["state"] == "done":
+            break
+        time.sleep(0.02)
+    assert info["state"] == "done"
+    assert info["metrics"]["tmdb_calls"] == 1
+    assert info["metrics"]["cache_misses"] == 1
+
+
+def test_server_timing_counts_concurrent_fetches(tmdb, client):
+    session_id = client.post("/api/session/create").get_json()["session_id"]
+    ids = list(range(1, 26))
+    response = client.post(f"/api/session/{session_id}/movies/set", json={"tmdb_ids": ids})
+    assert response.status_code == 200
+    assert tmdb.count("/movie/") == len(ids)
+    assert _server_timing_calls(response) == len(ids)
+
+    response = client.post("/api/session/quickstart", json={"items": [{"id": i} for i in range(100, 110)]})
+    assert response.status_code == 201
+    assert _server_timing_calls(response) == 10
+
+
+def test_background_job_counts_concurrent_fetches(tmdb, client):
+    session_id = client.post("/api/session/create").get_json()["session_id"]
+    job = client.post(f"/api/session/{session_id}/movies/set",
+                      json={"tmdb_ids": list(range(1, 31)), "async": True}).get_json()
+    for _ in range(100):
+        info = client.get(job["status_url"]).get_json()
+        if info["state"] == "done":
+            break
+        time.sleep(0.02)
+    assert info["metrics"]["tmdb_calls"] == 30
+
+
+def test_metrics_carry_the_worker_pid(tmdb, client, monkeypatch):
+    client.get("/health")
+    body = client.get("/metrics").get_data(as_text=True)
+    samples = [line for line in body.splitlines() if line and not line.startswith("#")]
+    assert samples and all(f'worker="{os.getpid()}"' in line for line in samples)
+    assert 'movie_ranker_http_requests_total{worker="%d",route=' % os.getpid() in body
+
+    # A forked worker relabels its samples
+    monkeypatch.setitem(api.METRICS.const_labels, "worker", "12345")
+    assert 'movie_ranker_sse_streams{worker="12345"} 0' in client.get("/metrics").get_data(as_text=True)
@@ -0,0 +1,176 @@
+import threading
+import time
+
+import pytest
+
+import jobs
+import title_index
+
+from conftest import api
+
+
+def _blocked(started=None, release=None):
+    """Work that waits for release, checking for cancellation while it waits."""
+    def work(job):
+        if started is not None:
+            started.set()
+        while not release.wait(0.01):
+            job.check()
+        return {"ok": True}
+    return work
+
+
+def _wait(job, timeout=5):
+    job._future.result(timeout=timeout)
+    return job
+
+
+def test_queue_full_beyond_workers_plus_queued():
+    runner = jobs.JobRunner(workers=1, max_queued=1)
+    release = threading.Event()
+    try:
+        running = runner.submit("load", _blocked(release=release))
+        queued = runner.submit("load", _blocked(release=release))
+        with pytest.raises(jobs.QueueFull):
+            runner.submit("load", _blocked(release=release))
+        assert runner.counts() == {"submitted": 2, "rejected": 1, "done": 0, "failed": 0, "cancelled": 0,
+                                   "unfinished": 2}
+    finally:
+        release.set()
+    assert _wait(running).state == jobs.DONE and _wait(queued).state == jobs.DONE
+    # Finished jobs free their slots
+    assert _wait(runner.submit("load", lambda job: {})).state == jobs.DONE
+    assert runner.counts()["unfinished"] == 0
+
+
+def test_cancel_queued_and_running_jobs():
+    runner = jobs.JobRunner(workers=1, max_queued=1)
+    started, release = threading.Event(), threading.Event()
+    attached = []
+    running = runner.submit("load", _blocked(started, release), on_done=attached.append)
+    queued = runner.submit("load", lambda job: attached.append(job) or {})
+    assert started.wait(5)
+
+    # A queued job is finished at once and never runs
+    assert runner.cancel(queued.id).state == jobs.CANCELLED
+    assert queued.started_at is None and queued.finished_at is not None
+
+    # A running job stops at its next check; on_done is not called and there is no result
+    runner.cancel(running.id)
+    assert _wait(running).state == jobs.CANCELLED
+    assert running.result is None and "result" not in running.to_dict()
+    assert attached == []
+    assert runner.counts() == {"submitted": 2, "rejected": 0, "done": 0, "failed": 0, "cancelled": 2,
+                               "unfinished": 0}
+
+    # Cancelling a finished job leaves it as it was
+    done = _wait(runner.submit("load", lambda job: {"n": 1}))
+    assert runner.cancel(done.id).state == jobs.DONE
+    assert runner.cancel("no-such-job") is None
+    release.set()
+
+
+def test_progress_and_partial_results():
+    runner = jobs.JobRunner(workers=1, max_queued=0)
+    seen = []
+
+    def work(job):
+        job.progress(1, 3, ["a"])
+        job.progress(2)
+        job.progress(3, partial=["b", "c"])
+        return {"items": ["a", "b", "c"]}
+
+    job = _wait(runner.submit("enrich", work, listener=lambda j: seen.append((j.state, j.done))))
+    assert seen == [(jobs.RUNNING, 0), (jobs.RUNNING, 1), (jobs.RUNNING, 2), (jobs.RUNNING, 3), (jobs.DONE, 3)]
+    info = job.to_dict(partial_since=1)
+    assert (info["done"], info["total"], info["partial_count"]) == (3, 3, 3)
+    assert info["partial"] == ["b", "c"]
+    assert info["result"] == {"items": ["a", "b", "c"]}
+    assert "partial" not in job.to_dict()
+    assert job.to_dict(partial_since=-4)["partial"] == ["a", "b", "c"]
+    assert "result" not in job.to_dict(include_result=False)
+
+
+def test_failed_job_keeps_its_error_and_partial_results():
+    runner = jobs.JobRunner(workers=1, max_queued=0)
+
+    def work(job):
+        job.progress(1, 2, ["first"])
+        raise RuntimeError("upstream down")
+
+    job = _wait(runner.submit("enrich", work))
+    info = job.to_dict(partial_since=0)
+    assert (info["state"], info["error"], info["partial"]) == (jobs.FAILED, "upstream down", ["first"])
+    assert "result" not in info
+
+
+def test_finished_jobs_are_pruned_by_count_and_age():
+    runner = jobs.JobRunner(workers=1, max_queued=0, keep_finished=2)
+    finished = [_wait(runner.submit("load", lambda job: {})) for _ in range(3)]
+    # Pruning happens on the next submit: only the two newest finished jobs are kept
+    latest = _wait(runner.submit("load", lambda job: {}))
+    assert [runner.get(job.id) for job in finished] == [None, finished[1], finished[2]]
+    assert runner.get(latest.id) is latest
+
+    runner.finished_ttl = 0.05
+    time.sleep(0.1)
+    newest = runner.submit("load", lambda job: {})
+    assert [runner.get(job.id) for job in (*finished, latest)] == [None] * 4
+    assert runner.get(_wait(newest).id) is newest
+
+
+def test_unfinished_jobs_are_never_pruned():
+    runner = jobs.JobRunner(workers=1, max_queued=1, keep_finished=0, finished_ttl=0)
+    release = threading.Event()
+    try:
+        running = runner.submit("load", _blocked(release=release))
+        runner.submit("load", _blocked(release=release))
+        assert runner.get(running.id) is running
+    finally:
+        release.set()
+
+
+def _poll(client, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        info = client.get(f"/api/jobs/{job_id}?partial_since=0").get_json()
+        if info["state"] in jobs.FINISHED or time.monotonic() > deadline:
+            return info
+        time.sleep(0.01)
+
+
+def test_async_enrich_returns_a_job_with_the_synchronous_result(tmdb, client, monkeypatch):
+    monkeypatch.setattr(api, "JOBS", jobs.JobRunner(workers=1, max_queued=0))
+    monkeypatch.setattr(api, "TITLE_INDEX", title_index.TitleIndex(keep_display=True))
+    items = [{"title": "Movie 5", "year": 2005}, {"title": "Movie 7"}, {"title": ""}, {"title": "Unknown Film"}]
+    expected = client.post("/api/tmdb/enrich", json={"items": items}).get_json()
+    assert [entry["id"] for entry in expected["items"]] == [5, 7, None, None]
+
+    response = client.post("/api/tmdb/enrich", json={"items": items, "async": True})
+    assert response.status_code == 202
+    queued = response.get_json()
+    assert queued["type"] == "enrich" and queued["status_url"] == f"/api/jobs/{queued['job_id']}"
+
+    info = _poll(client, queued["job_id"])
+    assert info["state"] == jobs.DONE
+    assert info["result"] == expected
+    assert (info["done"], info["total"]) == (4, 4)
+    # Every entry shows up once as a partial result, tagged with its index
+    by_index = {entry.pop("index"): entry for entry in info["partial"]}
+    assert sorted(by_index) == [0, 1, 2, 3]
+    assert [by_index[i] for i in range(4)] == expected["items"]
+    # The synchronous run left every title indexed or its search cached
+    assert info["metrics"]["tmdb_calls"] == 0
+
+
+def test_async_enrich_gets_503_when_the_job_queue_is_full(tmdb, client, monkeypatch):
+    runner = jobs.JobRunner(workers=1, max_queued=0)
+    monkeypatch.setattr(api, "JOBS", runner)
+    release = threading.Event()
+    try:
+        runner.submit("load", _blocked(release=release))
+        response = client.post("/api/tmdb/enrich", json={"titles": ["Movie 5"], "async": True})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(api.JOB_RETRY_AFTER_SECONDS)
+    finally:
+        release.set()
@@ -0,0 +1,46 @@
+import json
+import re
+import time
+from types import SimpleNamespace
+
+from conftest import api
+
+LIST_URL = "https://letterboxd.com/someone/list/favourites/"
+
+
+def _fake_list(monkeypatch, page_sizes):
+    """Page N holds page_sizes[N-1] films (as left after the parser's filtering); later pages finish first."""
+    def parse(url):
+        m = re.search(r"/page/(\d+)/", url)
+        page_no = int(m.group(1)) if m else 1
+        time.sleep(0.01 * (len(page_sizes) - page_no))
+        items = [{"title": f"Film {page_no}-{i}", "year": "2000", "slug": f"film-{page_no}-{i}"}
+                 for i in range(page_sizes[page_no - 1])]
+        return SimpleNamespace(items=items, last_page=len(page_sizes))
+    monkeypatch.setattr(api, "_parse_letterboxd_page", parse)
+
+
+def _lines(client, max_items):
+    response = client.post("/api/letterboxd/list", json={"url": LIST_URL, "max_items": max_items})
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_ranks_are_contiguous_when_pages_filter_different_counts(client, monkeypatch):
+    _fake_list(monkeypatch, [98, 100, 97, 100])
+    lines = _lines(client, 1000)
+    assert [line["page"] for line in lines[:-1]] == [1, 2, 3, 4]
+    items = [item for line in lines[:-1] for item in line["items"]]
+    assert [item["rank"] for item in items] == list(range(1, 396))
+    assert items[98]["title"] == "Film 2-0"
+    assert lines[-1] == {"done": True, "pages": 4, "count": 395, "truncated": False}
+
+
+def test_max_items_cuts_off_at_the_exact_item(client, monkeypatch):
+    _fake_list(monkeypatch, [98, 100, 100, 100])
+    lines = _lines(client, 200)
+    items = [item for line in lines[:-1] for item in line["items"]]
+    assert [item["rank"] for item in items] == list(range(1, 201))
+    assert items[-1]["title"] == "Film 3-1"
+    assert lines[-1]["count"] == 200
+    assert lines[-1]["truncated"] is True
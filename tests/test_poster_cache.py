@@ -0,0 +1,112 @@
+import io
+import os
+
+import pytest
+
+import poster_cache
+
+from conftest import api
+
+if not poster_cache.PIL_AVAILABLE:
+    pytest.skip("Pillow not installed", allow_module_level=True)
+
+
+def _jpeg(width=500, height=750):
+    from PIL import Image
+
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(out, "JPEG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def posters(tmp_path, monkeypatch):
+    store = poster_cache.PosterCache(str(tmp_path), 64 * 1024 * 1024)
+    fetched = []
+    monkeypatch.setattr(api, "_posters", store)
+    monkeypatch.setattr(api, "_fetch_poster_source", lambda path: fetched.append(path) or _jpeg())
+    store.fetched = fetched
+    return store
+
+
+def _blobs(store):
+    return sorted(path for path in store._files)
+
+
+def test_open_file_survives_eviction(posters):
+    f, mimetype, etag = posters.open("p1.jpg", "w154", "jpeg", lambda path: _jpeg())
+    generated = f.read()
+    f, _, again = posters.open("p1.jpg", "w154", "jpeg", lambda path: _jpeg())
+    assert (posters.hits, posters.misses, again) == (1, 1, etag)
+    for path in _blobs(posters):
+        os.remove(path)  # another worker evicts everything after the file was opened
+    with f:
+        assert f.read() == generated
+
+
+def test_variant_evicted_by_another_worker_is_regenerated(posters, client):
+    first = client.get("/api/poster/w154/p1.jpg")
+    assert first.status_code == 200 and first.mimetype == "image/jpeg"
+    variant = next(path for path in _blobs(posters) if path.endswith(".w154.jpg"))
+
+    # Gone from disk while this worker's index still lists it
+    os.remove(variant)
+    second = client.get("/api/poster/w154/p1.jpg")
+    assert second.status_code == 200
+    assert second.data == first.data and second.headers["ETag"] == first.headers["ETag"]
+    assert os.path.exists(variant)
+    assert posters.fetched == ["p1.jpg"]
+
+    # Source and variant both gone: the source is fetched again
+    for path in _blobs(posters):
+        os.remove(path)
+    third = client.get("/api/poster/w154/p1.jpg")
+    assert third.status_code == 200 and third.data == first.data
+    assert posters.fetched == ["p1.jpg", "p1.jpg"]
+
+
+def test_variant_evicted_between_lookup_and_open_is_regenerated(posters, client, monkeypatch):
+    first = client.get("/api/poster/w342/p2.jpg?format=webp")
+    assert first.status_code == 200 and first.mimetype == "image/webp"
+    touch = posters._touch
+
+    def touch_then_evict(path):
+        found = touch(path)
+        if path.endswith(".w342.webp"):
+            os.remove(path)
+        return found
+
+    monkeypatch.setattr(posters, "_touch", touch_then_evict)
+    second = client.get("/api/poster/w342/p2.jpg?format=webp")
+    assert second.status_code == 200 and second.data == first.data
+    assert (posters.hits, posters.misses) == (0, 2)
+    assert posters.stats()["bytes"] == sum(os.path.getsize(path) for path in _blobs(posters))
+
+
+def _disk_bytes(root):
+    return sum(os.path.getsize(os.path.join(d, n)) for d, _dirs, names in os.walk(root) for n in names)
+
+
+def test_cap_holds_for_the_directory_shared_by_several_workers(tmp_path):
+    data = str(tmp_path / "data")
+    workers = [poster_cache._DiskLRU(str(tmp_path), 10_000, data) for _ in range(3)]
+    for i in range(60):
+        workers[i % 3]._write(os.path.join(data, f"{i:02d}", "blob"), b"x" * 1000)
+        assert _disk_bytes(data) <= 10_000
+    # The newest files survive, whichever worker wrote them
+    assert os.path.exists(os.path.join(data, "59", "blob")) and os.path.exists(os.path.join(data, "58", "blob"))
+
+
+def test_hits_in_one_worker_protect_files_from_eviction_by_another(tmp_path):
+    data = str(tmp_path / "data")
+    first, second = (poster_cache._DiskLRU(str(tmp_path), 5_000, data) for _ in range(2))
+    paths = [os.path.join(data, f"{i:02d}", "blob") for i in range(8)]
+    for i, path in enumerate(paths[:5]):
+        first._write(path, b"x" * 1000)
+        os.utime(path, (1000 + i, 1000 + i))  # written long ago, oldest first
+    second._rescan()
+    assert second._touch(paths[0])  # a hit in the other worker refreshes the shared access time
+    for path in paths[5:]:
+        first._write(path, b"x" * 1000)
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1])
@@ -0,0 +1,184 @@
+import json
+import random
+
+import pytest
+
+import ranking_engine
+
+
+class OldMergeSort:
+    """The merge-sort state machine MovieRankingSession and the desktop MovieRanker each carried
+    before ranking_engine, ported as-is (items are ints instead of movie dicts). With
+    keep_emptied_merges, a merge whose last pair was skipped keeps its result, which is the one
+    behaviour MergeRanker changes; the old engines dropped it."""
+
+    def __init__(self, size, keep_emptied_merges=False):
+        self.keep_emptied_merges = keep_emptied_merges
+        self.unseen = []
+        self.ranked = []
+        self.done = False
+        self.state = {"sorted_sublists": [[i] for i in range(size)], "current_merge": None, "merge_stack": []}
+        self.current = None
+        self._prepare_merge_round()
+        self.current = self.next_comparison()
+
+    def _prepare_merge_round(self):
+        sublists = self.state["sorted_sublists"]
+        if len(sublists) <= 1:
+            if sublists:
+                self.ranked = sublists[0]
+            return
+        new_sublists = []
+        i = 0
+        while i < len(sublists):
+            if i + 1 < len(sublists):
+                self.state["merge_stack"].append({"left": sublists[i], "right": sublists[i + 1],
+                                                  "left_idx": 0, "right_idx": 0, "result": []})
+                i += 2
+            else:
+                new_sublists.append(sublists[i])
+                i += 1
+        self.state["sorted_sublists"] = new_sublists
+
+    def next_comparison(self):
+        merge = self.state["current_merge"]
+        if merge:
+            left, right, li, ri = merge["left"], merge["right"], merge["left_idx"], merge["right_idx"]
+            if li >= len(left) and ri >= len(right):
+                if self.keep_emptied_merges:
+                    self.state["sorted_sublists"].append(merge["result"])
+                self.state["current_merge"] = None
+                return self.next_comparison()
+            if li >= len(left):
+                merge["result"].extend(m for m in right[ri:] if m not in self.unseen)
+                self._complete_current_merge()
+                return self.next_comparison()
+            if ri >= len(right):
+                merge["result"].extend(m for m in left[li:] if m not in self.unseen)
+                self._complete_current_merge()
+                return self.next_comparison()
+            if left[li] in self.unseen:
+                merge["left_idx"] += 1
+                return self.next_comparison()
+            if right[ri] in self.unseen:
+                merge["right_idx"] += 1
+                return self.next_comparison()
+            return left[li], right[ri]
+        if self.state["merge_stack"]:
+            self.state["current_merge"] = self.state["merge_stack"].pop(0)
+            return self.next_comparison()
+        if len(self.state["sorted_sublists"]) > 1:
+            self._prepare_merge_round()
+            return self.next_comparison()
+        if self.state["sorted_sublists"]:
+            self.ranked = self.state["sorted_sublists"][0]
+        self.ranked = [m for m in self.ranked if m not in self.unseen]
+        self.done = True
+        return None
+
+    def _complete_current_merge(self):
+        self.state["sorted_sublists"].append(self.state["current_merge"]["result"])
+        self.state["current_merge"] = None
+
+    def answer(self, choice):
+        left, right = self.current
+        merge = self.state["current_merge"]
+        if choice == "skip":
+            for item in (left, right):
+                if item not in self.unseen:
+                    self.unseen.append(item)
+            merge["left_idx"] += 1
+            merge["right_idx"] += 1
+        elif choice == "left":
+            merge["result"].append(left)
+            merge["left_idx"] += 1
+        else:
+            merge["result"].append(right)
+            merge["right_idx"] += 1
+        self.current = self.next_comparison()
+        return self.current
+
+
+def _script(seed, skip_rate):
+    rng = random.Random(seed)
+    return lambda pair: rng.choices(("left", "right", "skip"), weights=(1, 1, 2 * skip_rate))[0]
+
+
+def _run_new(size, choose):
+    engine = ranking_engine.MergeRanker(size)
+    pairs = []
+    pair = engine.next_pair()
+    while pair is not None:
+        pairs.append(pair)
+        pair = engine.answer(choose(pair))
+    return pairs, engine.ranked, engine.unseen
+
+
+def _run_old(size, choose, **kwargs):
+    old = OldMergeSort(size, **kwargs)
+    pairs = []
+    while old.current is not None:
+        pairs.append(old.current)
+        old.answer(choose(old.current))
+    return pairs, old.ranked, old.unseen
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 7, 16, 33, 100])
+def test_same_pairs_and_order_as_the_old_engines_without_skips(size):
+    for seed in range(20):
+        assert _run_new(size, _script(seed, 0.0)) == _run_old(size, _script(seed, 0.0))
+
+
+@pytest.mark.parametrize("size", [2, 3, 7, 16, 33, 100])
+def test_same_pairs_and_order_as_the_old_engines_with_skips(size):
+    for seed in range(50):
+        new = _run_new(size, _script(seed, 0.15))
+        assert new == _run_old(size, _script(seed, 0.15), keep_emptied_merges=True)
+
+
+def test_skip_that_empties_both_sides_keeps_the_merged_result():
+    # Round 1 ranks [1, 0] and [3, 2]; round 2 ranks 3, then 1, then skips (0, 2): both sides are empty
+    script = iter(["right", "right", "right", "left", "skip"])
+    pairs, ranked, unseen = _run_new(4, lambda pair: next(script))
+    assert pairs == [(0, 1), (2, 3), (1, 3), (1, 2), (0, 2)]
+    assert ranked == [3, 1]
+    assert unseen == [0, 2]
+
+    # The old engines dropped [3, 1]; the front ends then appended 1 and 3 in list order
+    script = iter(["right", "right", "right", "left", "skip"])
+    assert _run_old(4, lambda pair: next(script))[1] == []
+
+
+@pytest.mark.parametrize("skip_rate", [0.0, 0.2])
+def test_snapshot_restore_mid_merge_continues_identically(skip_rate):
+    size = 37
+    expected = _run_new(size, _script(3, skip_rate))
+    choices = []
+    engine = ranking_engine.MergeRanker(size)
+    choose = _script(3, skip_rate)
+    pair = engine.next_pair()
+    while pair is not None:
+        choices.append(choose(pair))
+        pair = engine.answer(choices[-1])
+
+    for stop in range(0, len(choices), 5):
+        engine = ranking_engine.MergeRanker(size)
+        for choice in choices[:stop]:
+            engine.answer(choice)
+        restored = ranking_engine.MergeRanker.restore(json.loads(json.dumps(engine.snapshot())))
+        assert restored.next_pair() == engine.next_pair()
+        assert restored.comparisons == stop
+        pairs = list(expected[0][:stop])
+        pair = restored.next_pair()
+        for choice in choices[stop:]:
+            pairs.append(pair)
+            pair = restored.answer(choice)
+        assert pair is None
+        assert (pairs, restored.ranked, restored.unseen) == expected
+
+
+def test_restore_rejects_other_snapshot_versions():
+    snapshot = ranking_engine.MergeRanker(4).snapshot()
+    snapshot["version"] = ranking_engine.SNAPSHOT_VERSION + 1
+    with pytest.raises(ValueError):
+        ranking_engine.MergeRanker.restore(snapshot)
@@ -0,0 +1,59 @@
+import json
+import threading
+
+import serialization
+
+
+def _movie(movie_id, **changes):
+    movie = {"id": movie_id, "title": "Heat", "poster_path": "/heat.jpg", "poster_url": "", "release_date": "1995-12-15",
+             "vote_average": 7.9, "overview": ""}
+    movie.update(changes)
+    return movie
+
+
+def test_movie_changed_in_place_is_re_encoded():
+    movie = _movie(949001)
+    assert json.loads(serialization.dumps({"movies": [movie]}))["movies"][0]["poster_url"] == ""
+    movie["poster_url"] = "https://image.tmdb.org/t/p/w500/heat.jpg"
+    movie["vote_average"] = 8.1
+    encoded = json.loads(serialization.dumps({"movies": [movie]}))["movies"][0]
+    assert encoded["poster_url"] == "https://image.tmdb.org/t/p/w500/heat.jpg"
+    assert encoded["vote_average"] == 8.1
+
+
+def test_output_matches_json_dumps():
+    payload = {"movies": [_movie(949002), _movie(949003, title="Ronin é")], "count": 2}
+    expected = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    assert serialization.dumps(payload) == expected
+    assert serialization.dumps(payload) == expected  # from the cache
+
+
+def test_counters_are_exact_under_concurrency():
+    movies = [_movie(949100 + i) for i in range(50)]
+    for movie in movies:
+        serialization.movie_blob(movie)
+    before = serialization.blob_cache_stats()
+
+    def encode():
+        for _ in range(20):
+            for movie in movies:
+                serialization.movie_blob(movie)
+
+    threads = [threading.Thread(target=encode) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    after = serialization.blob_cache_stats()
+    assert after["hits"] - before["hits"] == 8 * 20 * 50
+    assert after["misses"] == before["misses"]
+
+
+def test_equal_values_of_another_type_are_re_encoded():
+    # movie_table rows carry 0.0 where _format_movie and placeholders carry int 0
+    for first, second in ((8.0, 8), (0, 0.0), (1, True)):
+        as_first = _movie(949200, vote_average=first)
+        as_second = _movie(949200, vote_average=second)
+        serialization.dumps({"movies": [as_first]})
+        expected = json.dumps({"movies": [as_second]}, sort_keys=True, separators=(",", ":")).encode()
+        assert serialization.dumps({"movies": [as_second]}) == expected
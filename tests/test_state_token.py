@@ -0,0 +1,91 @@
+import base64
+import random
+import zlib
+
+import pytest
+
+import ranking_engine
+import state_token
+
+from conftest import api
+
+SECRET = b"test-secret"
+
+
+def _ranked_partway(size, answers, seed=5):
+    engine = ranking_engine.MergeRanker(size)
+    rng = random.Random(seed)
+    for _ in range(answers):
+        if engine.next_pair() is None:
+            break
+        engine.answer(rng.choices(("left", "right", "skip"), weights=(10, 10, 1))[0])
+    return engine
+
+
+def _raw(token):
+    return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+
+
+def _token(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+@pytest.mark.parametrize("size, answers", [(2, 0), (api.STATELESS_MAX_MOVIES, 0),
+                                           (api.STATELESS_MAX_MOVIES, 700)])
+def test_round_trip(size, answers):
+    engine = _ranked_partway(size, answers)
+    ids = random.Random(size).sample(range(1, 1_500_000), size)
+    token = state_token.encode(ids, engine.snapshot(), SECRET)
+    assert len(token) <= state_token.MAX_TOKEN_CHARS
+    decoded_ids, snapshot = state_token.decode(token, SECRET)
+    assert decoded_ids == ids
+    assert snapshot == engine.snapshot()
+    assert ranking_engine.MergeRanker.restore(snapshot).next_pair() == engine.next_pair()
+
+
+def test_rejects_tampered_truncated_and_foreign_tokens():
+    token = state_token.encode([550, 680], ranking_engine.MergeRanker(2).snapshot(), SECRET)
+    raw = _raw(token)
+    tampered = bytearray(raw)
+    tampered[len(raw) // 3] ^= 0x01
+    for bad in (_token(bytes(tampered)), _token(raw[:-1]), _token(raw[:state_token.MAC_BYTES]), "", "!!!"):
+        with pytest.raises(state_token.InvalidToken):
+            state_token.decode(bad, SECRET)
+    with pytest.raises(state_token.InvalidToken):
+        state_token.decode(token, b"another-secret")
+
+
+def test_rejects_oversized_input():
+    with pytest.raises(state_token.InvalidToken):
+        state_token.decode("A" * (state_token.MAX_TOKEN_CHARS + 1), SECRET)
+    # Correctly signed, but inflates past the decompression cap
+    payload = zlib.compress(b"\x00" * (state_token.MAX_STATE_BYTES + 1), 9)
+    bomb = _token(payload + state_token._sign(SECRET, payload))
+    assert len(bomb) <= state_token.MAX_TOKEN_CHARS
+    with pytest.raises(state_token.InvalidToken, match="too large"):
+        state_token.decode(bomb, SECRET)
+    with pytest.raises(ValueError):
+        state_token.encode([-1, 2], ranking_engine.MergeRanker(2).snapshot(), SECRET)
+
+
+def test_stale_version_gets_409_with_the_current_comparison(tmdb, client, monkeypatch):
+    monkeypatch.setattr(api, "STATE_TOKEN_SECRET", SECRET)
+    started = client.post("/api/stateless/ranking/start", json={"tmdb_ids": [11, 12, 13, 14]}).get_json()
+    assert started["comparison"]["version"] == 0
+    first = client.post("/api/stateless/ranking/choice",
+                        json={"state": started["state"], "choice": "left", "version": 0})
+    assert first.status_code == 200
+    after = first.get_json()
+    assert after["comparison"]["version"] == 1
+
+    # The first answer sent again with the newer token (e.g. a double click)
+    stale = client.post("/api/stateless/ranking/choice",
+                        json={"state": after["state"], "choice": "right", "version": 0})
+    assert stale.status_code == 409
+    body = stale.get_json()
+    assert "Stale comparison" in body["error"]
+    assert body["comparison"] == after["comparison"]
+    assert body["status"]["comparisons"] == 1
+
+    bad = client.post("/api/stateless/ranking/choice", json={"state": after["state"], "choice": "left", "version": "1"})
+    assert bad.status_code == 400
@@ -0,0 +1,33 @@
+import title_index
+
+from conftest import FakeTMDb, api
+
+
+def test_index_hit_without_local_stores_makes_no_upstream_call(tmdb, client, monkeypatch):
+    monkeypatch.setattr(api, "TITLE_INDEX", title_index.TitleIndex(keep_display=True))
+    monkeypatch.setattr(tmdb, "movie", lambda movie_id: {**FakeTMDb.movie(movie_id), "overview": "x" * 300})
+    matcher = api.MovieRankingSession("tmp")
+
+    searched = matcher._search_best_matches(["Movie 7", "Movie 9"])
+    assert [m["id"] for m in searched] == [7, 9]
+    calls = len(tmdb.calls)
+
+    # Both titles are indexed now: served from the index, shown exactly as the search result was
+    assert matcher._search_best_matches(["movie 9", "Movie 7"]) == [searched[1], searched[0]]
+    assert len(tmdb.calls) == calls
+    assert searched[0]["poster_url"].endswith("/p7.jpg")
+    assert searched[0]["overview"] == "x" * 200 + "..."
+
+    entries = client.post("/api/tmdb/enrich", json={"titles": ["Movie 7"]}).get_json()["items"]
+    assert entries[0]["id"] == 7 and entries[0]["poster_url"].endswith("/p7.jpg")
+    assert tmdb.count("/movie/") == 0 and len(tmdb.calls) == calls
+
+
+def test_only_a_display_index_keeps_poster_and_overview():
+    movie = {"id": 1, "title": "Heat", "release_date": "1995-12-15", "poster_path": "/heat.jpg", "overview": "LA"}
+    plain, display = title_index.TitleIndex(), title_index.TitleIndex(keep_display=True)
+    plain.add(movie)
+    display.add(movie)
+    assert "poster_path" not in plain.best_match("Heat")[1] and plain.poster_paths == []
+    assert display.best_match("Heat")[1]["poster_path"] == "/heat.jpg"
+    assert display.best_match("Heat")[1]["overview"] == "LA"
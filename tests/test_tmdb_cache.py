@@ -0,0 +1,30 @@
+import json
+import os
+
+import tmdb_cache
+
+
+def test_disk_cache_stats_track_rows_without_scanning(tmp_path):
+    cache = tmdb_cache.DiskCache(str(tmp_path / "cache.db"), 10 * 1024 * 1024)
+    for i in range(5):
+        cache.put("movie", f"k{i}", json.dumps({"id": i}).encode())
+    cache.put("movie", "k0", json.dumps({"id": 0, "title": "replaced"}).encode())
+    assert cache.stats()["size"] == 5
+    assert cache.stats()["bytes"] == cache._totals()[1]
+
+    traced = []
+    cache._conn().set_trace_callback(traced.append)
+    cache.stats()
+    len(cache)
+    assert traced == []
+
+
+def test_disk_cache_eviction_updates_row_count(tmp_path):
+    cache = tmdb_cache.DiskCache(str(tmp_path / "cache.db"), 20 * 1024)
+    for i in range(50):
+        # Random hex barely compresses, so the bodies outgrow the budget
+        cache.put("movie", f"k{i}", json.dumps({"overview": os.urandom(1000).hex()}).encode())
+    rows, size = cache._totals()
+    assert rows < 50
+    assert cache.stats()["size"] == rows
+    assert cache.stats()["bytes"] == size <= 20 * 1024
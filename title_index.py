@@ -0,0 +1,329 @@
+"""
+In-process title index for fuzzy movie matching.
+
+Token and trigram inverted lists over locally known movies (the TMDb catalog
+mirror plus anything seen in TMDb search results), ranked with the same
+scoring formula the API applies to TMDb search results. Lets most enrich
+lookups resolve without leaving the process.
+"""
+import heapq
+import re
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Minimum match scores; ultra-short queries (<= 3 chars, e.g. "F1") need stronger evidence
+MIN_SCORE_SHORT = 0.55
+MIN_SCORE = 0.35
+
+# Postings longer than this belong to "common" tokens ("the", "of", "love"). They are only
+# scanned when the candidates from rarer tokens cannot already be proven to contain the top-k.
+COMMON_POSTING = 2000
+
+# Overview characters kept per movie with keep_display (as many as the API shows)
+OVERVIEW_CHARS = 200
+
+# Largest score a candidate can get from quality signals (votes, rating, popularity)
+_MAX_QUALITY = 0.4
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9\s\-]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_for_match(s: str) -> str:
+    """Normalize titles for fuzzy match: lowercase, strip punctuation, normalize symbols."""
+    if not s:
+        return ""
+    s = s.lower()
+    # Common symbol normalizations
+    s = s.replace("²", " 2").replace("*", "").replace("–", "-").replace("—", "-")
+    # Remove non-alnum except spaces and hyphens
+    s = _NON_ALNUM_RE.sub(" ", s)
+    # Collapse whitespace
+    return _WHITESPACE_RE.sub(" ", s).strip()
+
+
+def word_overlap_score(a: str, b: str) -> float:
+    """Simple word-overlap score between normalized strings (0..1)."""
+    wa = set(a.split())
+    wb = set(b.split())
+    if not wa or not wb:
+        return 0.0
+    inter = len(wa & wb)
+    union = len(wa | wb)
+    return inter / union if union else 0.0
+
+
+def is_short_query(norm_q: str) -> bool:
+    return len(norm_q) <= 3
+
+
+def min_score(norm_q: str) -> float:
+    return MIN_SCORE_SHORT if is_short_query(norm_q) else MIN_SCORE
+
+
+def release_year(release_date: Optional[str]) -> Optional[int]:
+    rd = release_date or ""
+    try:
+        return int(rd[:4]) if len(rd) >= 4 else None
+    except ValueError:
+        return None
+
+
+def score_candidate(norm_q: str, norm_c: str, vote_count: float, vote_avg: float,
+                    popularity: float, year: Optional[int]) -> float:
+    """Title similarity plus quality signals for one candidate (shared by TMDb search and the index)."""
+    short_query = is_short_query(norm_q)
+    # Exact normalized match gets very high score
+    score = 0.0
+    if norm_c == norm_q and norm_c:
+        score += 1.0
+    else:
+        # Word overlap
+        score += 0.6 * word_overlap_score(norm_q, norm_c)
+        # Startswith bonus for short queries like "F1"
+        if short_query and norm_c.startswith(norm_q):
+            score += 0.3
+        # Substring bonus
+        if not short_query and norm_q and norm_q in norm_c:
+            score += 0.15
+
+    # Quality signals
+    score += min(vote_count / 5000.0, 0.2)  # up to +0.2
+    score += min(vote_avg / 50.0, 0.1)      # up to +0.1
+    score += min(popularity / 500.0, 0.1)   # up to +0.1
+
+    # Year recency slight bias (avoid random 1960s matches unless exact)
+    if year is not None and year < 1980 and norm_c != norm_q:
+        score -= 0.15
+    return score
+
+
+def score_result(norm_q: str, movie: Dict) -> float:
+    """score_candidate for a TMDb search/discover result dict."""
+    cand_title = movie.get("title") or movie.get("original_title") or ""
+    return score_candidate(norm_q, normalize_for_match(cand_title), movie.get("vote_count") or 0,
+                           movie.get("vote_average") or 0.0, movie.get("popularity") or 0.0,
+                           release_year(movie.get("release_date")))
+
+
+def trigrams(norm: str) -> set:
+    padded = f" {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """Token + trigram inverted index over movie titles.
+
+    Movies are stored column-wise (parallel arrays indexed by document number) and
+    postings are arrays of document numbers, so a million titles stay compact.
+    Writes take a lock; searches read without one.
+
+    With a memory-mapped movie table (movie_table.py), its rows are documents
+    0..len(table)-1 and their postings are read from the file; movies added later
+    are stored in process and numbered after them.
+
+    With keep_display, in-process movies also keep their poster path and the start of
+    their overview, so a match can be shown without fetching the movie again (meant for
+    an index fed only by search results, not a catalog of a million titles).
+    """
+
+    def __init__(self, table=None, keep_display: bool = False):
+        self.table = table
+        self.keep_display = keep_display
+        self._base = len(table) if table is not None else 0
+        self._lock = threading.Lock()
+        self._doc_by_id: Dict[int, int] = {}
+        self.ids = array("q")
+        self.titles: List[str] = []
+        self.norms: List[str] = []
+        self.release_dates: List[str] = []
+        self.vote_counts = array("d")
+        self.vote_avgs = array("d")
+        self.popularities = array("d")
+        self.years = array("i")  # 0 = unknown
+        self.poster_paths: List[str] = []  # only with keep_display
+        self.overviews: List[str] = []
+        self._tokens: Dict[str, array] = {}
+        self._trigrams: Dict[str, array] = {}
+        self._token_sets: Dict[str, array] = {}  # sorted distinct tokens -> documents
+        # A table is complete when mapped; a catalog-built index once the build finishes
+        self.ready = table is not None
+
+    def __len__(self) -> int:
+        return self._base + len(self.ids)
+
+    def add(self, movie: Dict) -> bool:
+        """Index a TMDb-shaped movie dict; returns False if it has no id/title or is already indexed."""
+        movie_id = movie.get("id")
+        title = movie.get("title") or movie.get("original_title") or ""
+        norm = normalize_for_match(title)
+        if not movie_id or not norm:
+            return False
+        with self._lock:
+            if movie_id in self._doc_by_id or (self.table is not None and self.table.find(movie_id) is not None):
+                return False
+            doc = self._base + len(self.ids)
+            self.titles.append(title)
+            self.norms.append(norm)
+            self.release_dates.append(movie.get("release_date") or "")
+            self.vote_counts.append(movie.get("vote_count") or 0)
+            self.vote_avgs.append(movie.get("vote_average") or 0.0)
+            self.popularities.append(movie.get("popularity") or 0.0)
+            self.years.append(release_year(movie.get("release_date")) or 0)
+            if self.keep_display:
+                self.poster_paths.append(movie.get("poster_path") or "")
+                self.overviews.append((movie.get("overview") or "")[:OVERVIEW_CHARS])
+            # Publish the id last: a concurrent search only sees fully written documents
+            self.ids.append(movie_id)
+            self._doc_by_id[movie_id] = doc
+            tokens = set(norm.split())
+            for token in tokens:
+                self._tokens.setdefault(token, array("i")).append(doc)
+            self._token_sets.setdefault(" ".join(sorted(tokens)), array("i")).append(doc)
+            for gram in trigrams(norm):
+                self._trigrams.setdefault(gram, array("i")).append(doc)
+        return True
+
+    def add_many(self, movies: Iterable[Dict]) -> int:
+        return sum(1 for movie in movies if self.add(movie))
+
+    def _posting(self, local: Dict[str, array], section: str, key: str):
+        """Documents under a key: the table's, then those added in process; None if there are none."""
+        extra = local.get(key)
+        if self.table is None:
+            return extra
+        mapped = self.table.postings(section, key)
+        if mapped is None or extra is None:
+            return extra if mapped is None else mapped
+        merged = array("i", mapped.tobytes())
+        merged.extend(extra)
+        return merged
+
+    def _norm(self, doc: int) -> str:
+        return self.table.norm(doc) if doc < self._base else self.norms[doc - self._base]
+
+    def _score_fields(self, doc: int) -> Tuple[str, float, float, float, int]:
+        if doc < self._base:
+            return self.table.score_fields(doc)
+        i = doc - self._base
+        return self.norms[i], self.vote_counts[i], self.vote_avgs[i], self.popularities[i], self.years[i]
+
+    def _substring_candidates(self, norm_q: str, limit: int) -> Optional[set]:
+        """Documents whose title contains norm_q, via trigram intersection; None if too costly to tell."""
+        # Unpadded query trigrams, so matches inside longer words ("war" in "warrior") count too
+        grams = [self._posting(self._trigrams, "trigrams", norm_q[i:i + 3]) for i in range(len(norm_q) - 2)]
+        if not all(grams):
+            return set()
+        grams.sort(key=len)
+        if len(grams[0]) > COMMON_POSTING:
+            return None
+        common = set(grams[0])
+        for posting in grams[1:]:
+            common.intersection_update(posting)
+            if not common:
+                break
+        return {d for d in common if d < limit and norm_q in self._norm(d)}
+
+    def _score_docs(self, norm_q: str, docs: Iterable[int]) -> List[Tuple]:
+        scored = []
+        for doc in docs:
+            norm, vote_count, vote_avg, popularity, year = self._score_fields(doc)
+            score = score_candidate(norm_q, norm, vote_count, vote_avg, popularity, year or None)
+            scored.append((score, popularity, -doc, doc))
+        return scored
+
+    def search(self, title: str, k: int = 5) -> List[Tuple[float, Dict]]:
+        """Top-k (score, movie) pairs for a raw title, best first.
+
+        Titles with exactly the query's words are scored first; when they already beat the best
+        score any other title could reach, nothing else is touched (the common case for exact
+        titles). Otherwise candidates come from rare-token postings plus trigram substring matches. Documents
+        reachable only through common tokens are scored only when an upper bound on their score
+        could beat the current k-th result, so results match scoring every title sharing a word
+        with the query. Queries made solely of common tokens are limited to titles containing
+        all of them.
+        """
+        norm_q = normalize_for_match(title)
+        if not norm_q:
+            return []
+        limit = len(self)
+        q_tokens = set(norm_q.split())
+
+        same_words = [d for d in self._posting(self._token_sets, "token_sets", " ".join(sorted(q_tokens))) or ()
+                      if d < limit]
+        if same_words:
+            top = heapq.nlargest(k, self._score_docs(norm_q, same_words))
+            # Any other title has word overlap <= n/(n+1) and no exact-match bonus
+            bound = 0.6 * len(q_tokens) / (len(q_tokens) + 1) + _MAX_QUALITY
+            bound += 0.3 if is_short_query(norm_q) else 0.15
+            if len(top) == k and top[-1][0] >= bound:
+                return [(score, self._movie(doc)) for score, _pop, _neg, doc in top]
+
+        postings = [p for p in (self._posting(self._tokens, "tokens", t) for t in q_tokens) if p]
+        rare = [p for p in postings if len(p) <= COMMON_POSTING]
+        common = sorted((p for p in postings if len(p) > COMMON_POSTING), key=len)
+
+        candidates: set = set()
+        for posting in rare:
+            candidates.update(posting)
+        if common and not rare:
+            candidates.update(common[0])
+            for posting in common[1:]:
+                candidates.intersection_update(posting)
+        candidates = {d for d in candidates if d < limit}
+        substrings = None if is_short_query(norm_q) else self._substring_candidates(norm_q, limit)
+        if substrings:
+            candidates |= substrings
+
+        scored = self._score_docs(norm_q, candidates)
+        top = heapq.nlargest(k, scored)
+        if common and rare:
+            # Unscanned documents lack every rare query token: not exact, overlap <= common/|query|
+            bound = 0.6 * len(common) / len(q_tokens) + _MAX_QUALITY
+            bound += 0.3 if is_short_query(norm_q) else (0.15 if substrings is None else 0.0)
+            if len(top) < k or top[-1][0] < bound:
+                extra = {d for posting in common for d in posting if d < limit} - candidates
+                top = heapq.nlargest(k, scored + self._score_docs(norm_q, extra))
+        return [(score, self._movie(doc)) for score, _pop, _neg, doc in top]
+
+    def best_match(self, title: str) -> Optional[Tuple[float, Dict]]:
+        """Best (score, movie) if it clears the match threshold, else None."""
+        top = self.search(title, k=1)
+        if not top or top[0][0] < min_score(normalize_for_match(title)):
+            return None
+        return top[0]
+
+    def _movie(self, doc: int) -> Dict:
+        if doc < self._base:
+            row = self.table.row(doc)
+            _norm, vote_count, vote_avg, popularity, _year = self.table.score_fields(doc)
+            return {
+                "id": row.id,
+                "title": row.title or row.text("original_title"),
+                "release_date": row.release_date,
+                "vote_count": float(vote_count),
+                "vote_average": vote_avg,
+                "popularity": popularity
+            }
+        i = doc - self._base
+        movie = {
+            "id": self.ids[i],
+            "title": self.titles[i],
+            "release_date": self.release_dates[i],
+            "vote_count": self.vote_counts[i],
+            "vote_average": self.vote_avgs[i],
+            "popularity": self.popularities[i]
+        }
+        if self.keep_display:
+            movie["poster_path"] = self.poster_paths[i]
+            movie["overview"] = self.overviews[i]
+        return movie
+
+    def stats(self) -> Dict[str, int]:
+        stats = {"movies": len(self), "tokens": len(self._tokens), "trigrams": len(self._trigrams),
+                 "token_sets": len(self._token_sets)}
+        if self.table is not None:
+            for name in ("tokens", "trigrams", "token_sets"):
+                stats[f"mapped_{name}"] = self.table.stats()[name]
+        return stats
@@ -0,0 +1,335 @@
+"""
+TMDb response cache.
+
+Successful TMDb JSON bodies are kept as raw bytes in a byte-bounded LRU, keyed
+by endpoint type plus URL and query parameters (the API key is left out), with
+a TTL per endpoint type. Cached bodies are handed back as CachedResponse
+objects, which offer the raise_for_status()/json() subset of requests.Response
+that the API uses.
+
+The cache can be written to a gzipped JSON-lines snapshot and restored from
+it, so a restarted (or spun-down and woken) server starts with the TMDb data
+it already had instead of refetching everything.
+
+DiskCache is the second, persistent tier: a SQLite file shared by every
+worker process, holding normalized (compact, re-encoded) bodies compressed
+with zlib together with their ETag/Last-Modified validators. Expired entries
+are kept for conditional revalidation, and the least recently used entries
+are evicted once the file's bodies exceed a size budget.
+"""
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+# Seconds a response stays fresh, per endpoint type
+TTL_SECONDS = {
+    "discover": 6 * 3600,
+    "collection": 24 * 3600,
+    "movie": 24 * 3600,
+    "search": 3600,
+}
+DEFAULT_TTL = 3600
+
+
+def expiry(endpoint: str) -> float:
+    """Expiry time for a response of this endpoint type fetched now."""
+    return time.time() + TTL_SECONDS.get(endpoint, DEFAULT_TTL)
+
+_SKIP_PARAMS = frozenset({"api_key"})
+
+
+def cache_key(url: str, params: Dict) -> str:
+    """Stable key for a TMDb request, independent of the API key and parameter order."""
+    items = sorted((k, str(v)) for k, v in params.items() if k not in _SKIP_PARAMS and v is not None)
+    return url + "?" + "&".join(f"{k}={v}" for k, v in items)
+
+
+class CachedResponse:
+    """A cached TMDb body with the parts of the requests.Response interface callers use."""
+    __slots__ = ("content", "status_code")
+
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """Byte-bounded LRU of TMDb bodies with per-endpoint TTLs. Safe to share across threads."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (endpoint, key) -> (expires_at, body)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, endpoint: str, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get((endpoint, key))
+            if entry is None or entry[0] < time.time():
+                self.misses += 1
+                return None
+            self._entries.move_to_end((endpoint, key))
+            self.hits += 1
+        return CachedResponse(entry[1])
+
+    def put(self, endpoint: str, key: str, body: bytes, expires_at: Optional[float] = None):
+        if expires_at is None:
+            expires_at = expiry(endpoint)
+        with self._lock:
+            old = self._entries.pop((endpoint, key), None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[(endpoint, key)] = (expires_at, body)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "bytes": self._bytes}
+
+    def save(self, path: str) -> int:
+        """Write unexpired entries to a snapshot, least recently used first; returns the count.
+
+        Entries already in the snapshot that this cache doesn't hold are kept (up to max_bytes),
+        so several worker processes saving to one path add to it rather than overwrite it."""
+        now = time.time()
+        with self._lock:
+            entries = OrderedDict((k, v) for k, v in self._entries.items() if v[0] >= now)
+        size = sum(len(v[1]) for v in entries.values())
+        older = []
+        for key, value in _read_snapshot(path):
+            if key not in entries and value[0] >= now:
+                older.append((key, value))
+        for key, value in reversed(older):
+            if size + len(value[1]) > self.max_bytes:
+                break
+            entries[key] = value
+            entries.move_to_end(key, last=False)
+            size += len(value[1])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as f:
+            for (endpoint, key), (expires_at, body) in entries.items():
+                f.write(json.dumps({"e": endpoint, "k": key, "x": expires_at,
+                                    "b": body.decode("utf-8")}, ensure_ascii=False))
+                f.write("\n")
+        os.replace(tmp, path)
+        return len(entries)
+
+    def load(self, path: str) -> int:
+        """Add unexpired entries from a snapshot; returns the count (0 if the file is missing)."""
+        now = time.time()
+        count = 0
+        for (endpoint, key), (expires_at, body) in _read_snapshot(path):
+            if expires_at >= now:
+                self.put(endpoint, key, body, expires_at)
+                count += 1
+        return count
+
+
+def _read_snapshot(path: str) -> Iterator[Tuple[Tuple[str, str], Tuple[float, bytes]]]:
+    """Records of a snapshot file in file order; nothing if it is missing, stops at a torn tail."""
+    if not os.path.exists(path):
+        return
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)
+                yield (rec["e"], rec["k"]), (rec["x"], rec["b"].encode("utf-8"))
+    except (OSError, EOFError, ValueError, KeyError):
+        return
+
+
+DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    endpoint TEXT,
+    key TEXT,
+    body BLOB,
+    size INTEGER,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL,
+    accessed_at REAL,
+    PRIMARY KEY (endpoint, key)
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+"""
+
+# Re-count the file's rows and total size after this many writes (other processes write to it too)
+_SIZE_CHECK_EVERY = 100
+# Eviction trims the file to this fraction of its budget, so it doesn't run on every write
+_EVICT_TO = 0.9
+# Hits refresh an entry's access time at most this often (saves a write per hit)
+_TOUCH_INTERVAL = 60
+
+
+class DiskEntry(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at >= time.time()
+
+
+def normalize_body(body: bytes) -> bytes:
+    """Compact UTF-8 re-encoding of a JSON body, so equal documents store identically."""
+    return json.dumps(json.loads(body), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class DiskCache:
+    """SQLite-backed TMDb response cache with validators and a size budget. Safe to share across
+    threads; each process (e.g. a forked gunicorn worker) opens its own connections."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        conn = self._conn()
+        with conn:
+            conn.executescript(DISK_SCHEMA)
+        # Running totals (kept here so stats() never scans the table), re-synced every
+        # _SIZE_CHECK_EVERY writes
+        self._rows, self._bytes = self._totals()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        """Close this thread's connection (e.g. in a process about to fork; SQLite connections
+        must not be carried across a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _totals(self) -> Tuple[int, int]:
+        """(rows, body bytes) of the whole file; a full scan."""
+        return tuple(self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone())
+
+    def get(self, endpoint: str, key: str) -> Optional[DiskEntry]:
+        """The stored entry, fresh or not (check .fresh), or None."""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT body, etag, last_modified, expires_at, accessed_at FROM responses "
+            "WHERE endpoint = ? AND key = ?", (endpoint, key)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        entry = DiskEntry(zlib.decompress(row[0]), row[1], row[2], row[3])
+        if entry.fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        now = time.time()
+        if now - row[4] > _TOUCH_INTERVAL:
+            with conn:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE endpoint = ? AND key = ?",
+                             (now, endpoint, key))
+        return entry
+
+    def put(self, endpoint: str, key: str, body: bytes, etag: Optional[str] = None,
+            last_modified: Optional[str] = None, expires_at: Optional[float] = None) -> bytes:
+        """Store a 200 body; returns the normalized body that was stored."""
+        body = normalize_body(body)
+        packed = zlib.compress(body, 6)
+        conn = self._conn()
+        with conn:
+            old = conn.execute("SELECT size FROM responses WHERE endpoint = ? AND key = ?",
+                               (endpoint, key)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (endpoint, key, packed, len(packed), etag, last_modified,
+                 expires_at if expires_at is not None else expiry(endpoint), time.time()))
+        with self._lock:
+            self._bytes += len(packed) - (old[0] if old else 0)
+            self._rows += 0 if old else 1
+            self._writes += 1
+            recount = self._writes % _SIZE_CHECK_EVERY == 0
+        if recount:
+            self._rows, self._bytes = self._totals()
+        if self._bytes > self.max_bytes:
+            self.evict()
+        return body
+
+    def revalidated(self, endpoint: str, key: str, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None) -> float:
+        """Mark an entry fresh again after a 304; returns its new expiry time."""
+        expires_at = expiry(endpoint)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE responses SET expires_at = ?, accessed_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE endpoint = ? AND key = ?",
+                (expires_at, time.time(), etag, last_modified, endpoint, key))
+        return expires_at
+
+    def evict(self):
+        """Drop least recently used entries until the bodies fit in the budget (with headroom)."""
+        conn = self._conn()
+        rows_left, total = self._totals()
+        target = int(self.max_bytes * _EVICT_TO)
+        while total > target:
+            rows = conn.execute(
+                "SELECT endpoint, key, size FROM responses ORDER BY accessed_at LIMIT 256").fetchall()
+            if not rows:
+                break
+            with conn:
+                conn.executemany("DELETE FROM responses WHERE endpoint = ? AND key = ?",
+                                 [(r[0], r[1]) for r in rows])
+            total -= sum(r[2] for r in rows)
+            rows_left -= len(rows)
+        self._rows, self._bytes = rows_left, total
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": self._rows, "bytes": self._bytes}
+
+
+def open_disk_cache(path: str, max_bytes: int) -> Optional[DiskCache]:
+    """Open (creating if needed) the disk tier; None if path is empty or the file can't be opened."""
+    if not path:
+        return None
+    try:
+        return DiskCache(path, max_bytes)
+    except sqlite3.Error as e:
+        print(f"Could not open TMDb disk cache at {path}: {e}")
+        return None
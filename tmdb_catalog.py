@@ -0,0 +1,450 @@
+"""
+Local TMDb catalog mirror (SQLite).
+
+Built from TMDb's daily id export plus movie detail dumps, so year loads,
+category loads and movie detail lookups can be answered without a TMDb round
+trip. The API falls back to TMDb only when the mirror has no answer, and
+writes those upstream detail responses back into the mirror.
+
+A year, collection, keyword or company is only answered from the mirror when
+it holds the whole set: fetch-totals stores TMDb's own count for each set
+(catalog_totals), and the mirror answers only while it has at least that many
+movies for it. A popularity-filtered fetch-details import, or the movies
+written back one at a time, would otherwise pass for a complete year or
+collection.
+
+CLI:
+  # 1) Daily id export (https://developer.themoviedb.org/docs/daily-id-exports)
+  python tmdb_catalog.py ingest-ids movie_ids_10_18_2026.json.gz
+  # 2a) Detail dump: JSON lines of /movie/{id}?append_to_response=keywords responses
+  python tmdb_catalog.py ingest-details movie_details.jsonl.gz
+  # 2b) ...or fetch details from TMDb for exported ids above a popularity floor
+  python tmdb_catalog.py fetch-details --min-popularity 2 --limit 50000
+  # 3) TMDb's totals for every year and collection in the mirror (plus category keywords/companies)
+  python tmdb_catalog.py fetch-totals --keyword 180547 --keyword 12360 --company 3
+  python tmdb_catalog.py stats
+
+The database path defaults to tmdb_catalog.db (override with --db or TMDB_CATALOG_PATH).
+"""
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_CATALOG_PATH = "tmdb_catalog.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    original_title TEXT,
+    poster_path TEXT,
+    release_date TEXT,
+    year INTEGER,
+    vote_average REAL,
+    vote_count INTEGER,
+    popularity REAL,
+    overview TEXT,
+    runtime INTEGER,
+    adult INTEGER DEFAULT 0,
+    video INTEGER DEFAULT 0,
+    genre_ids TEXT,
+    collection_id INTEGER,
+    has_details INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS movies_year_popularity ON movies (year, popularity DESC);
+CREATE INDEX IF NOT EXISTS movies_collection ON movies (collection_id);
+CREATE TABLE IF NOT EXISTS movie_keywords (
+    keyword_id INTEGER,
+    movie_id INTEGER,
+    PRIMARY KEY (keyword_id, movie_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS movie_companies (
+    company_id INTEGER,
+    movie_id INTEGER,
+    PRIMARY KEY (company_id, movie_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS catalog_totals (
+    kind TEXT,
+    key INTEGER,
+    expected INTEGER,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+"""
+
+# catalog_totals kinds
+YEAR = "year"
+COLLECTION = "collection"
+KEYWORD = "keyword"
+COMPANY = "company"
+
+# Local counts comparable with TMDb's totals (discover defaults exclude adult and video titles)
+_COUNT_SQL = {
+    YEAR: "SELECT COUNT(*) FROM movies WHERE year = ? AND has_details = 1 AND adult = 0 AND video = 0",
+    COLLECTION: "SELECT COUNT(*) FROM movies WHERE collection_id = ? AND has_details = 1",
+    KEYWORD: ("SELECT COUNT(*) FROM movie_keywords k JOIN movies m ON m.id = k.movie_id "
+              "WHERE k.keyword_id = ? AND m.has_details = 1 AND m.adult = 0 AND m.video = 0"),
+    COMPANY: ("SELECT COUNT(*) FROM movie_companies c JOIN movies m ON m.id = c.movie_id "
+              "WHERE c.company_id = ? AND m.has_details = 1 AND m.adult = 0 AND m.video = 0"),
+}
+
+_MOVIE_COLUMNS = ("id, title, original_title, poster_path, release_date, vote_average, vote_count, "
+                  "popularity, overview, runtime, adult, video, genre_ids")
+
+# Mirrors the discover filters used for keyword/company categories (feature films, no documentaries).
+# TMDb's release-type filter has no local equivalent; adult/video flags stand in for it.
+_FEATURE_FILTER = ("m.has_details = 1 AND m.adult = 0 AND m.video = 0 AND m.release_date != '' "
+                   "AND m.runtime >= 60 AND (',' || m.genre_ids || ',') NOT LIKE '%,99,%'")
+
+
+def _open_lines(path: str) -> Iterator[str]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def _row_to_tmdb(row: sqlite3.Row) -> Dict:
+    """Shape a row like a TMDb discover/movie result so existing formatting code applies."""
+    return {
+        "id": row["id"],
+        "title": row["title"] or "",
+        "original_title": row["original_title"] or "",
+        "poster_path": row["poster_path"],
+        "release_date": row["release_date"] or "",
+        "vote_average": row["vote_average"] or 0,
+        "vote_count": row["vote_count"] or 0,
+        "popularity": row["popularity"] or 0.0,
+        "overview": row["overview"] or "",
+        "runtime": row["runtime"] or 0,
+        "adult": bool(row["adult"]),
+        "video": bool(row["video"]),
+        "genre_ids": [int(g) for g in (row["genre_ids"] or "").split(",") if g]
+    }
+
+
+class TMDbCatalog:
+    """SQLite-backed mirror of TMDb movie metadata. Safe to share across threads; each process
+    (e.g. a forked gunicorn worker) opens its own connections."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            # New thread, or a forked worker: never reuse a connection opened in another process
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        """Close this thread's connection (e.g. in a process about to fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Lookups (return TMDb-shaped dicts, or None when the mirror has no answer)
+
+    def covers(self, kind: str, key: int) -> bool:
+        """Whether the mirror holds every movie TMDb counts for this year/collection/keyword/company
+        (False when no total has been fetched for it)."""
+        conn = self._conn()
+        row = conn.execute("SELECT expected FROM catalog_totals WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        if row is None:
+            return False
+        return conn.execute(_COUNT_SQL[kind], (key,)).fetchone()[0] >= row["expected"]
+
+    def get_movie(self, movie_id: int) -> Optional[Dict]:
+        row = self._conn().execute(
+            f"SELECT {_MOVIE_COLUMNS} FROM movies WHERE id = ? AND has_details = 1", (movie_id,)
+        ).fetchone()
+        return _row_to_tmdb(row) if row else None
+
+    def discover_year(self, year: int, limit: int) -> Optional[List[Dict]]:
+        """Most popular movies of a year that have a title and poster."""
+        if not self.covers(YEAR, year):
+            return None
+        rows = self._conn().execute(
+            f"SELECT {_MOVIE_COLUMNS} FROM movies WHERE year = ? AND has_details = 1 AND adult = 0 "
+            "AND title != '' AND poster_path IS NOT NULL AND poster_path != '' "
+            "ORDER BY popularity DESC LIMIT ?", (year, limit)
+        ).fetchall()
+        return [_row_to_tmdb(r) for r in rows] or None
+
+    def collection_parts(self, collection_id: int) -> Optional[List[Dict]]:
+        if not self.covers(COLLECTION, collection_id):
+            return None
+        rows = self._conn().execute(
+            f"SELECT {_MOVIE_COLUMNS} FROM movies WHERE collection_id = ? AND has_details = 1 "
+            "ORDER BY release_date", (collection_id,)
+        ).fetchall()
+        return [_row_to_tmdb(r) for r in rows] or None
+
+    def discover_keyword(self, keyword_id: int, company_id: Optional[int] = None) -> Optional[List[Dict]]:
+        # Either complete set contains all of their intersection
+        if not self.covers(KEYWORD, keyword_id) and not (company_id and self.covers(COMPANY, company_id)):
+            return None
+        sql = (f"SELECT {', '.join('m.' + c.strip() for c in _MOVIE_COLUMNS.split(','))} FROM movies m "
+               "JOIN movie_keywords k ON k.movie_id = m.id ")
+        params: List = []
+        if company_id:
+            sql += "JOIN movie_companies c ON c.movie_id = m.id AND c.company_id = ? "
+            params.append(company_id)
+        sql += f"WHERE k.keyword_id = ? AND {_FEATURE_FILTER} ORDER BY m.release_date"
+        params.append(keyword_id)
+        rows = self._conn().execute(sql, params).fetchall()
+        return [_row_to_tmdb(r) for r in rows] or None
+
+    def discover_company(self, company_id: int) -> Optional[List[Dict]]:
+        if not self.covers(COMPANY, company_id):
+            return None
+        sql = (f"SELECT {', '.join('m.' + c.strip() for c in _MOVIE_COLUMNS.split(','))} FROM movies m "
+               f"JOIN movie_companies c ON c.movie_id = m.id WHERE c.company_id = ? AND {_FEATURE_FILTER} "
+               "ORDER BY m.release_date")
+        rows = self._conn().execute(sql, (company_id,)).fetchall()
+        return [_row_to_tmdb(r) for r in rows] or None
+
+    def iter_movies(self) -> Iterator[Dict]:
+        """All movies with details (used to build the in-process title index)."""
+        for row in self._conn().execute(f"SELECT {_MOVIE_COLUMNS} FROM movies WHERE has_details = 1"):
+            yield _row_to_tmdb(row)
+
+    # Ingest
+
+    def ingest_id_export(self, lines: Iterable[str], batch_size: int = 10000) -> int:
+        """Load TMDb's daily id export (JSON lines of {id, original_title, popularity, adult, video})."""
+        conn = self._conn()
+        count = 0
+        batch = []
+        for line in lines:
+            rec = json.loads(line)
+            batch.append((rec["id"], rec.get("original_title") or "", rec.get("popularity") or 0.0,
+                          int(bool(rec.get("adult"))), int(bool(rec.get("video")))))
+            if len(batch) >= batch_size:
+                count += self._upsert_ids(conn, batch)
+                batch = []
+        if batch:
+            count += self._upsert_ids(conn, batch)
+        return count
+
+    @staticmethod
+    def _upsert_ids(conn: sqlite3.Connection, batch: List[tuple]) -> int:
+        with conn:
+            conn.executemany(
+                "INSERT INTO movies (id, original_title, popularity, adult, video) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET popularity = excluded.popularity, adult = excluded.adult, "
+                "video = excluded.video", batch)
+        return len(batch)
+
+    def upsert_details(self, movie: Dict):
+        """Store one /movie/{id} response (keywords included when appended)."""
+        self.upsert_details_many([movie])
+
+    def upsert_details_many(self, movies: Iterable[Dict]) -> int:
+        conn = self._conn()
+        count = 0
+        with conn:
+            for movie in movies:
+                if not movie.get("id"):
+                    continue
+                release_date = movie.get("release_date") or ""
+                year = int(release_date[:4]) if release_date[:4].isdigit() else None
+                genre_ids = movie.get("genre_ids") or [g.get("id") for g in movie.get("genres") or []]
+                collection = movie.get("belongs_to_collection") or {}
+                conn.execute(
+                    "INSERT OR REPLACE INTO movies (id, title, original_title, poster_path, release_date, year, "
+                    "vote_average, vote_count, popularity, overview, runtime, adult, video, genre_ids, "
+                    "collection_id, has_details) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)",
+                    (movie["id"], movie.get("title") or "", movie.get("original_title") or "",
+                     movie.get("poster_path"), release_date, year,
+                     movie.get("vote_average") or 0, movie.get("vote_count") or 0, movie.get("popularity") or 0.0,
+                     movie.get("overview") or "", movie.get("runtime") or 0,
+                     int(bool(movie.get("adult"))), int(bool(movie.get("video"))),
+                     ",".join(str(g) for g in genre_ids if g is not None), collection.get("id")))
+                keywords = (movie.get("keywords") or {}).get("keywords")
+                if keywords is not None:
+                    conn.execute("DELETE FROM movie_keywords WHERE movie_id = ?", (movie["id"],))
+                    conn.executemany("INSERT OR IGNORE INTO movie_keywords (keyword_id, movie_id) VALUES (?, ?)",
+                                     [(k["id"], movie["id"]) for k in keywords if k.get("id")])
+                companies = movie.get("production_companies")
+                if companies is not None:
+                    conn.execute("DELETE FROM movie_companies WHERE movie_id = ?", (movie["id"],))
+                    conn.executemany("INSERT OR IGNORE INTO movie_companies (company_id, movie_id) VALUES (?, ?)",
+                                     [(c["id"], movie["id"]) for c in companies if c.get("id")])
+                count += 1
+        return count
+
+    def set_totals(self, totals: Dict[tuple, int]):
+        """Store TMDb's movie counts, keyed by (kind, key)."""
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO catalog_totals (kind, key, expected) VALUES (?, ?, ?)",
+                             [(kind, key, expected) for (kind, key), expected in totals.items()])
+
+    def keys(self, kind: str) -> List[int]:
+        """Years or collection ids present in the mirror (the sets fetch-totals checks by default)."""
+        column = {YEAR: "year", COLLECTION: "collection_id"}[kind]
+        rows = self._conn().execute(
+            f"SELECT DISTINCT {column} FROM movies WHERE has_details = 1 AND {column} IS NOT NULL").fetchall()
+        return [r[0] for r in rows]
+
+    def ids_missing_details(self, min_popularity: float, limit: int) -> List[int]:
+        rows = self._conn().execute(
+            "SELECT id FROM movies WHERE has_details = 0 AND adult = 0 AND popularity >= ? "
+            "ORDER BY popularity DESC LIMIT ?", (min_popularity, limit)
+        ).fetchall()
+        return [r["id"] for r in rows]
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._conn()
+        return {
+            "movies": conn.execute("SELECT COUNT(*) FROM movies").fetchone()[0],
+            "with_details": conn.execute("SELECT COUNT(*) FROM movies WHERE has_details = 1").fetchone()[0],
+            "keyword_links": conn.execute("SELECT COUNT(*) FROM movie_keywords").fetchone()[0],
+            "company_links": conn.execute("SELECT COUNT(*) FROM movie_companies").fetchone()[0],
+            "totals": conn.execute("SELECT COUNT(*) FROM catalog_totals").fetchone()[0]
+        }
+
+
+def open_catalog(path: Optional[str] = None) -> Optional[TMDbCatalog]:
+    """Open the catalog if its file exists (the API runs without a mirror otherwise)."""
+    path = path or os.getenv("TMDB_CATALOG_PATH") or DEFAULT_CATALOG_PATH
+    if not os.path.exists(path):
+        return None
+    try:
+        return TMDbCatalog(path)
+    except sqlite3.Error as e:
+        print(f"Could not open TMDb catalog at {path}: {e}")
+        return None
+
+
+def _fetch_details(catalog: TMDbCatalog, api_key: str, api_base: str, min_popularity: float,
+                   limit: int, workers: int) -> int:
+    import requests
+
+    ids = catalog.ids_missing_details(min_popularity, limit)
+    http = requests.Session()
+    print(f"Fetching details for {len(ids)} movies...")
+
+    def fetch(movie_id: int) -> Optional[Dict]:
+        try:
+            resp = http.get(f"{api_base}/movie/{movie_id}",
+                            params={"api_key": api_key, "append_to_response": "keywords"}, timeout=10)
+            return resp.json() if resp.status_code == 200 else None
+        except Exception as e:
+            print(f"Error fetching movie {movie_id}: {e}")
+            return None
+
+    stored = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        batch = []
+        for movie in pool.map(fetch, ids):
+            if movie:
+                batch.append(movie)
+            if len(batch) >= 500:
+                stored += catalog.upsert_details_many(batch)
+                batch = []
+                print(f"  stored {stored}")
+        stored += catalog.upsert_details_many(batch)
+    return stored
+
+
+def _fetch_totals(catalog: TMDbCatalog, api_key: str, api_base: str, keywords: List[int],
+                  companies: List[int], workers: int) -> int:
+    """Ask TMDb how many movies each year and collection in the mirror (and each given keyword and
+    company) has, and store the counts; returns how many were stored."""
+    import requests
+
+    wanted = ([(YEAR, y) for y in catalog.keys(YEAR)] + [(COLLECTION, c) for c in catalog.keys(COLLECTION)]
+              + [(KEYWORD, k) for k in keywords] + [(COMPANY, c) for c in companies])
+    http = requests.Session()
+    print(f"Fetching TMDb totals for {len(wanted)} years, collections, keywords and companies...")
+
+    def fetch(kind_key: tuple) -> Optional[int]:
+        kind, key = kind_key
+        try:
+            if kind == COLLECTION:
+                resp = http.get(f"{api_base}/collection/{key}", params={"api_key": api_key}, timeout=10)
+                return len(resp.json().get("parts") or []) if resp.status_code == 200 else None
+            param = {YEAR: "primary_release_year", KEYWORD: "with_keywords", COMPANY: "with_companies"}[kind]
+            resp = http.get(f"{api_base}/discover/movie", params={"api_key": api_key, param: key}, timeout=10)
+            return resp.json().get("total_results") if resp.status_code == 200 else None
+        except Exception as e:
+            print(f"Error fetching the total for {kind} {key}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        totals = {kind_key: total for kind_key, total in zip(wanted, pool.map(fetch, wanted)) if total is not None}
+    catalog.set_totals(totals)
+    return len(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local TMDb catalog mirror")
+    parser.add_argument("--db", default=os.getenv("TMDB_CATALOG_PATH") or DEFAULT_CATALOG_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ids = sub.add_parser("ingest-ids", help="Load a daily id export (.json.gz)")
+    p_ids.add_argument("path")
+    p_details = sub.add_parser("ingest-details", help="Load JSON lines of /movie/{id} responses")
+    p_details.add_argument("path")
+    p_fetch = sub.add_parser("fetch-details", help="Fetch missing details from TMDb")
+    p_fetch.add_argument("--min-popularity", type=float, default=1.0)
+    p_fetch.add_argument("--limit", type=int, default=20000)
+    p_fetch.add_argument("--workers", type=int, default=4)
+    p_fetch.add_argument("--api-key", default=os.getenv("TMDB_API_KEY"))
+    p_fetch.add_argument("--api-base", default=os.getenv("TMDB_API_BASE", "https://api.themoviedb.org/3"))
+    p_totals = sub.add_parser("fetch-totals", help="Fetch TMDb's movie counts so complete sets are served locally")
+    p_totals.add_argument("--keyword", type=int, action="append", default=[], help="Category keyword id (repeatable)")
+    p_totals.add_argument("--company", type=int, action="append", default=[], help="Category company id (repeatable)")
+    p_totals.add_argument("--workers", type=int, default=4)
+    p_totals.add_argument("--api-key", default=os.getenv("TMDB_API_KEY"))
+    p_totals.add_argument("--api-base", default=os.getenv("TMDB_API_BASE", "https://api.themoviedb.org/3"))
+    sub.add_parser("stats", help="Show catalog counts")
+    args = parser.parse_args()
+
+    catalog = TMDbCatalog(args.db)
+    if args.command == "ingest-ids":
+        print(f"Ingested {catalog.ingest_id_export(_open_lines(args.path))} ids")
+    elif args.command == "ingest-details":
+        count = 0
+        batch = []
+        for line in _open_lines(args.path):
+            batch.append(json.loads(line))
+            if len(batch) >= 1000:
+                count += catalog.upsert_details_many(batch)
+                batch = []
+        count += catalog.upsert_details_many(batch)
+        print(f"Ingested details for {count} movies")
+    elif args.command in ("fetch-details", "fetch-totals"):
+        if not args.api_key:
+            print("TMDb API key required (--api-key or TMDB_API_KEY)")
+            sys.exit(1)
+        if args.command == "fetch-details":
+            stored = _fetch_details(catalog, args.api_key, args.api_base.rstrip("/"), args.min_popularity,
+                                    args.limit, args.workers)
+            print(f"Stored details for {stored} movies")
+        else:
+            stored = _fetch_totals(catalog, args.api_key, args.api_base.rstrip("/"), args.keyword,
+                                   args.company, args.workers)
+            print(f"Stored {stored} totals")
+    print(json.dumps(catalog.stats()))
+
+
+if __name__ == "__main__":
+    main()